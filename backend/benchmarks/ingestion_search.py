@@ -0,0 +1,253 @@
+"""Ingestion and search benchmark over a synthetic codebase.
+
+Run from the backend directory:
+
+    python benchmarks/ingestion_search.py --files 1000 --output results.json
+
+Everything the run creates (indexes, caches, uploads) goes to a temporary
+directory. The LLM is replaced by a local stub, so search latency covers
+retrieval and response building only. ``--stub-embeddings`` also swaps the
+embedding model for a hashing embedder to measure the pipeline itself.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_codebase import generate_codebase, generate_queries
+
+class StubLLMService:
+    """Answers like LLMService without calling Groq, after an optional fixed delay"""
+
+    def __init__(self, delay_ms: float = 0.0):
+        self.delay = delay_ms / 1000
+
+    async def generate_explanation(self, query: str, search_results: list) -> str:
+        await asyncio.sleep(self.delay)
+        return f"Stub explanation of {len(search_results)} chunks for: {query}"
+
+    async def extract_code_examples(self, query: str, search_results: list) -> List[Dict[str, Any]]:
+        await asyncio.sleep(self.delay)
+        return [
+            {"title": "Example", "code": doc.page_content[:200], "explanation": "Stub", "file_path": doc.metadata.get("file_path")}
+            for doc in search_results[:3]
+        ]
+
+class HashEmbeddings:
+    """Deterministic bag-of-words vectors, for measuring everything but the model"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.split():
+            vector[int.from_bytes(hashlib.blake2b(word.encode(), digest_size=4).digest(), "little") % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3)
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+async def benchmark_ingestion(main, source_root: Path, filenames: List[str]) -> Dict[str, Any]:
+    """End-to-end ingestion through the job runner, then each stage on its own"""
+    from services.ingestion_jobs import read_local_files
+    from utils.process_utils import get_peak_rss_bytes, get_rss_bytes
+
+    codebase_id = str(uuid.uuid4())
+    main.codebase_registry.create(codebase_id, {"status": "processing", "total_files": len(filenames), "processed_files": 0})
+    rss_before = get_rss_bytes()
+    started = time.perf_counter()
+    await main.ingestion_runner.process_upload(codebase_id, read_local_files(source_root, filenames), len(filenames))
+    seconds = time.perf_counter() - started
+    status = main.codebase_registry.get(codebase_id)
+    if status["status"] != "completed":
+        raise RuntimeError(f"Ingestion failed: {status['message']}")
+
+    end_to_end = {
+        "seconds": round(seconds, 3),
+        "files_per_second": round(len(filenames) / seconds, 1),
+        "chunks_per_second": round(status["chunk_count"] / seconds, 1),
+        "chunks": status["chunk_count"],
+        "duplicates_collapsed": status.get("duplicates_collapsed", 0),
+        "rss_before_bytes": rss_before,
+        "peak_rss_bytes": get_peak_rss_bytes()
+    }
+
+    # Parse and chunk alone
+    documents = []
+    started = time.perf_counter()
+    async for _, parsed in main.file_parser.parse_stream(read_local_files(source_root, filenames), "benchmark"):
+        documents.extend(parsed)
+    parse_seconds = time.perf_counter() - started
+
+    # Embed alone, bypassing the embedding cache that the end-to-end run filled
+    texts = [doc.page_content for doc in documents]
+    started = time.perf_counter()
+    embeddings = await asyncio.to_thread(main.vector_db.embeddings.embed_documents, texts)
+    embed_seconds = time.perf_counter() - started
+
+    # Store alone, into a separate codebase
+    stage_codebase = str(uuid.uuid4())
+    cleaned = main.vector_db._clean_documents(documents)
+    started = time.perf_counter()
+    for i in range(0, len(cleaned), 500):
+        await main.vector_db.store_embeddings(stage_codebase, cleaned[i:i + 500], embeddings[i:i + 500])
+    await main.vector_db.finalize_codebase(stage_codebase)
+    store_seconds = time.perf_counter() - started
+    await main.vector_db.delete_codebase(stage_codebase)
+
+    stage = lambda seconds: {
+        "seconds": round(seconds, 3),
+        "files_per_second": round(len(filenames) / seconds, 1) if seconds else None,
+        "chunks_per_second": round(len(documents) / seconds, 1) if seconds else None
+    }
+    return {
+        "codebase_id": codebase_id,
+        "end_to_end": end_to_end,
+        "stages": {
+            "parse_and_chunk": stage(parse_seconds),
+            "embed": stage(embed_seconds),
+            "store": stage(store_seconds)
+        }
+    }
+
+async def benchmark_search(main, codebase_id: str, queries: List[str], concurrency: int) -> Dict[str, Any]:
+    """Latency of /api/search requests through the ASGI app"""
+    import httpx
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def search(query: str):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/search", json={"codebase_id": codebase_id, "query": query})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        # Warm up the query path (model load, collection open) outside the measurement
+        await search(queries[0])
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*[search(query) for query in queries[1:]])
+        seconds = time.perf_counter() - started
+
+    return {
+        "queries": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "queries_per_second": round(len(latencies) / seconds, 1),
+        **percentiles(latencies)
+    }
+
+async def run(args, workdir: Path) -> Dict[str, Any]:
+    source_root = workdir / "codebase"
+    started = time.perf_counter()
+    filenames = generate_codebase(source_root, args.files, args.seed)
+    generate_seconds = time.perf_counter() - started
+
+    # Services write their state relative to the working directory
+    os.chdir(workdir)
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    import main
+    from config import EMBEDDING_ENGINE, VECTOR_BACKEND, CHUNKING_STRATEGY, PARSE_WORKERS
+    from services.model_registry import model_registry, embedding_model_id
+
+    if args.stub_embeddings:
+        model_registry._models[embedding_model_id()] = HashEmbeddings()
+    main.llm_service = StubLLMService(args.llm_delay_ms)
+
+    async with main.lifespan(main.app):
+        ingestion = await benchmark_ingestion(main, source_root, filenames)
+        search = await benchmark_search(main, ingestion.pop("codebase_id"), generate_queries(args.queries + 1, args.seed), args.concurrency)
+
+    return {
+        "benchmark": "ingestion_search",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "settings": {
+            "files": args.files,
+            "seed": args.seed,
+            "queries": args.queries,
+            "concurrency": args.concurrency,
+            "llm_delay_ms": args.llm_delay_ms,
+            "stub_embeddings": args.stub_embeddings,
+            "embedding_engine": EMBEDDING_ENGINE,
+            "vector_backend": VECTOR_BACKEND,
+            "chunking_strategy": CHUNKING_STRATEGY,
+            "parse_workers": PARSE_WORKERS
+        },
+        "codebase": {
+            "files": len(filenames),
+            "bytes": sum((source_root / name).stat().st_size for name in filenames),
+            "generate_seconds": round(generate_seconds, 3)
+        },
+        "ingestion": ingestion,
+        "search": search
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion throughput and search latency")
+    parser.add_argument("--files", type=int, default=500, help="Size of the synthetic codebase")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1, help="Searches in flight at once")
+    parser.add_argument("--llm-delay-ms", type=float, default=0.0, help="Simulated LLM latency per call")
+    parser.add_argument("--stub-embeddings", action="store_true", help="Use a hashing embedder instead of the model")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    args = parser.parse_args()
+
+    output = Path(args.output).resolve() if args.output else None
+    with tempfile.TemporaryDirectory(prefix="codebase-benchmark-") as workdir:
+        report = asyncio.run(run(args, Path(workdir)))
+
+    print(json.dumps(report, indent=2))
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
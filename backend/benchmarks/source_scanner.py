@@ -0,0 +1,193 @@
+"""Single-pass source scanner against the regex passes it replaced.
+
+Run from the backend directory:
+
+    python benchmarks/source_scanner.py --size-mb 4
+    python benchmarks/source_scanner.py --path /path/to/repo
+
+Without --path, one large synthetic file is generated per language. Each file
+goes through the legacy per-file work of FileParserService (clean_code, the
+structure regexes over the cleaned and the original text, and the import
+scan) and through ``scan_source``. The report gives the throughput of both and
+how many definitions and imports each found.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Tuple, Any
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_codebase import _render
+from utils.source_scanner import scan_source, EXTENSION_LANGUAGES
+
+# Frozen copy of the text_processing functions and FileParserService._extract_imports
+# as they were before the scanner, kept here for comparison
+
+_LEGACY_NAME = r'([a-zA-Z_][a-zA-Z0-9_]*)'
+
+_LEGACY_PATTERNS = {
+    'python': [
+        ('function', re.compile(r'^[ \t]*(?:async\s+)?def\s+' + _LEGACY_NAME + r'\s*\(', re.MULTILINE)),
+        ('class', re.compile(r'^[ \t]*class\s+' + _LEGACY_NAME, re.MULTILINE)),
+    ],
+    'javascript': [
+        ('function', re.compile(r'function\s+' + _LEGACY_NAME + r'\s*\(')),
+        ('function', re.compile(r'const\s+' + _LEGACY_NAME + r'\s*=\s*(?:async\s+)?\(')),
+        ('function', re.compile(_LEGACY_NAME + r'\s*:\s*(?:async\s+)?function')),
+        ('function', re.compile(_LEGACY_NAME + r'\s*\([^)]*\)\s*=>')),
+        ('class', re.compile(r'class\s+' + _LEGACY_NAME)),
+    ],
+    'java': [
+        ('function', re.compile(r'(?:public|private|protected|static|\s)+[\w<>\[\]]+\s+' + _LEGACY_NAME + r'\s*\(')),
+        ('class', re.compile(r'(?:public|private|protected|\s)*class\s+' + _LEGACY_NAME)),
+    ],
+    'cpp': [
+        ('function', re.compile(r'^\s*(?:[\w:*&<>]+\s+)*' + _LEGACY_NAME + r'\s*\([^)]*\)\s*[{;]', re.MULTILINE)),
+        ('class', re.compile(r'class\s+' + _LEGACY_NAME)),
+    ],
+}
+_LEGACY_EXTENSIONS = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.ts': 'javascript', '.tsx': 'javascript',
+    '.java': 'java', '.cpp': 'cpp', '.c': 'cpp', '.h': 'cpp'
+}
+_LEGACY_KEYWORDS = {'if', 'for', 'while', 'switch', 'return'}
+
+def legacy_clean_code_with_line_map(content: str) -> Tuple[str, List[int]]:
+    lines = content.split('\n')
+    cleaned_lines = [line.rstrip() for line in lines]
+    result_lines, line_map = [], []
+    empty_count = 0
+    for line_number, line in enumerate(cleaned_lines, start=1):
+        if line.strip() == '':
+            empty_count += 1
+            if empty_count <= 2:
+                result_lines.append(line)
+                line_map.append(line_number)
+        else:
+            empty_count = 0
+            result_lines.append(line)
+            line_map.append(line_number)
+    return '\n'.join(result_lines), line_map
+
+def legacy_extract_symbol_definitions(content: str, file_ext: str) -> List[Dict[str, Any]]:
+    symbols = []
+    patterns = _LEGACY_PATTERNS.get(_LEGACY_EXTENSIONS.get(file_ext))
+    if not patterns:
+        return symbols
+    line_starts = [0] + [match.end() for match in re.finditer('\n', content)]
+    for kind, pattern in patterns:
+        for match in pattern.finditer(content):
+            if match.group(1) not in _LEGACY_KEYWORDS:
+                symbols.append({"name": match.group(1), "kind": kind, "line": bisect_right(line_starts, match.start(1))})
+    return symbols
+
+def legacy_extract_imports(content: str, file_ext: str) -> List[str]:
+    imports = []
+    for line in content.split('\n')[:50]:
+        line = line.strip()
+        if file_ext == '.py':
+            if line.startswith('import ') or line.startswith('from '):
+                imports.append(line)
+        elif file_ext in ['.js', '.jsx', '.ts', '.tsx']:
+            if line.startswith('import ') or line.startswith('const ') or line.startswith('require('):
+                imports.append(line)
+        elif file_ext == '.java':
+            if line.startswith('import '):
+                imports.append(line)
+    return imports[:10]
+
+def legacy_scan(content: str, file_ext: str) -> Dict[str, Any]:
+    """The per-file work FileParserService.parse_content did before the scanner"""
+    cleaned, line_map = legacy_clean_code_with_line_map(content)
+    if file_ext in ['.py', '.js', '.jsx', '.ts', '.tsx']:
+        legacy_extract_symbol_definitions(cleaned, file_ext)
+    symbols = legacy_extract_symbol_definitions(content, file_ext)
+    imports = legacy_extract_imports(cleaned, file_ext)
+    return {"cleaned": cleaned, "line_map": line_map, "symbols": symbols, "imports": imports}
+
+# Hand-written files for languages the synthetic generator does not produce
+_TEMPLATES = {
+    '.c': '#include <stdlib.h>\n\n/* {sentence} */\nstatic int {name}(struct ctx *c, int n)\n{{\n    int total = 0;\n    for (int i = 0; i < n; i++) {{\n        total += lookup(c, i);\n    }}\n    return total;\n}}\n',
+    '.cs': 'using System.Linq;\n\npublic class {cls}\n{{\n    /// {sentence}\n    public async Task<int> {name}(int id)\n    {{\n        var item = await repository.FindAsync(id);\n        return item.Count;\n    }}\n}}\n',
+    '.rs': 'use std::collections::HashMap;\n\n/// {sentence}\npub fn {name}(items: &[u32]) -> HashMap<u32, usize> {{\n    let mut counts = HashMap::new();\n    for item in items {{\n        *counts.entry(*item).or_insert(0) += 1;\n    }}\n    counts\n}}\n',
+    '.rb': "require 'json'\n\nclass {cls}\n  # {sentence}\n  def {name}(payload)\n    data = JSON.parse(payload)\n    data.fetch('items', []).map {{ |item| item['id'] }}\n  end\nend\n",
+    '.php': "<?php\nuse App\\\\Models\\\\Item;\n\nclass {cls}\n{{\n    // {sentence}\n    public function {name}(array $items): int\n    {{\n        return count(array_filter($items));\n    }}\n}}\n",
+    '.swift': 'import Foundation\n\n/// {sentence}\nfinal class {cls} {{\n    func {name}(_ items: [Int]) -> Int {{\n        return items.reduce(0, +)\n    }}\n}}\n',
+    '.kt': 'import kotlin.math.max\n\n// {sentence}\nclass {cls} {{\n    fun {name}(items: List<Int>): Int {{\n        return items.fold(0) {{ acc, item -> max(acc, item) }}\n    }}\n}}\n',
+}
+
+def synthetic_file(file_ext: str, size: int, rng: random.Random) -> str:
+    """A file of at least ``size`` characters in the given language"""
+    from synthetic_codebase import _identifier, _class_name, _sentence
+
+    parts, total = [], 0
+    while total < size:
+        if file_ext in _TEMPLATES:
+            part = _TEMPLATES[file_ext].format(name=_identifier(rng, "snake"), cls=_class_name(rng), sentence=_sentence(rng))
+        else:
+            part = _render(rng, file_ext)
+        parts.append(part)
+        total += len(part) + 2
+    return "\n\n\n\n".join(parts)
+
+def measure(function, content: str, file_ext: str, repeats: int) -> float:
+    """Best of several runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(content, file_ext)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the source scanner with the legacy text_processing passes")
+    parser.add_argument("--path", help="Scan the files of this tree instead of synthetic files")
+    parser.add_argument("--size-mb", type=float, default=2.0, help="Size of each synthetic file")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    files: Dict[str, List[str]] = defaultdict(list)
+    if args.path:
+        root = Path(args.path)
+        for path in sorted(root.rglob("*")):
+            if path.is_file() and path.suffix.lower() in EXTENSION_LANGUAGES:
+                files[path.suffix.lower()].append(path.read_text(encoding="utf-8", errors="ignore"))
+    else:
+        rng = random.Random(args.seed)
+        for file_ext in ['.py', '.ts', '.js', '.java', '.go', '.c', '.cs', '.rs', '.rb', '.php', '.swift', '.kt']:
+            files[file_ext].append(synthetic_file(file_ext, int(args.size_mb * 1024 * 1024), rng))
+
+    report = []
+    for file_ext, contents in files.items():
+        size = sum(len(content) for content in contents)
+        legacy_seconds = sum(measure(legacy_scan, content, file_ext, args.repeats) for content in contents)
+        scanner_seconds = sum(measure(scan_source, content, file_ext, args.repeats) for content in contents)
+        legacy_results = [legacy_scan(content, file_ext) for content in contents]
+        scans = [scan_source(content, file_ext) for content in contents]
+        report.append({
+            "extension": file_ext,
+            "files": len(contents),
+            "megabytes": round(size / 1024 / 1024, 2),
+            "legacy_mb_per_second": round(size / 1024 / 1024 / legacy_seconds, 1),
+            "scanner_mb_per_second": round(size / 1024 / 1024 / scanner_seconds, 1),
+            "speedup": round(legacy_seconds / scanner_seconds, 2),
+            "legacy_symbols": sum(len(result["symbols"]) for result in legacy_results),
+            "scanner_symbols": sum(len(scan.symbols) for scan in scans),
+            "legacy_imports": sum(len(result["imports"]) for result in legacy_results),
+            "scanner_imports": sum(len(scan.imports) for scan in scans),
+            "cleaned_identical": all(result["cleaned"] == scan.cleaned for result, scan in zip(legacy_results, scans))
+        })
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Deterministic generator of synthetic multi-language codebases for benchmarks.
+
+The same seed and size always produce byte-identical trees, so results of
+different releases can be compared. Run from the backend directory:
+
+    python benchmarks/synthetic_codebase.py /tmp/synthetic --files 1000
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import List
+
+# Domain words that identifiers, comments and search queries are built from
+NOUNS = [
+    "user", "order", "invoice", "payment", "session", "token", "account", "cart", "product", "report",
+    "cache", "queue", "message", "event", "config", "profile", "shipment", "review", "coupon", "ledger",
+    "tenant", "webhook", "schedule", "inventory", "notification", "permission", "audit", "upload", "search", "metric"
+]
+VERBS = [
+    "create", "update", "delete", "fetch", "validate", "parse", "render", "sync", "publish", "retry",
+    "merge", "compute", "export", "import", "refresh", "resolve", "archive", "notify", "authorize", "serialize"
+]
+ADJECTIVES = ["pending", "active", "expired", "cached", "remote", "local", "batched", "signed", "draft", "primary"]
+
+# Extensions in the mix, weighted like a typical web service repository
+LANGUAGES = [(".py", 5), (".ts", 3), (".js", 2), (".java", 2), (".go", 1), (".md", 1), (".json", 1)]
+
+# Share of files that are verbatim copies of an earlier file (vendored code)
+VENDORED_SHARE = 0.05
+
+def _identifier(rng: random.Random, style: str) -> str:
+    words = [rng.choice(VERBS), rng.choice(ADJECTIVES), rng.choice(NOUNS)][:rng.randint(2, 3)]
+    if style == "snake":
+        return "_".join(words)
+    return words[0] + "".join(word.capitalize() for word in words[1:])
+
+def _class_name(rng: random.Random) -> str:
+    return rng.choice(NOUNS).capitalize() + rng.choice(["Service", "Manager", "Client", "Handler", "Repository"])
+
+def _sentence(rng: random.Random) -> str:
+    return f"{rng.choice(VERBS).capitalize()} the {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} and {rng.choice(VERBS)} its {rng.choice(NOUNS)}"
+
+def _python_file(rng: random.Random) -> str:
+    lines = ["import logging", "from typing import Dict, List, Optional", "", "logger = logging.getLogger(__name__)", ""]
+    for _ in range(rng.randint(1, 3)):
+        lines += [f"class {_class_name(rng)}:", f'    """{_sentence(rng)}"""', ""]
+        for _ in range(rng.randint(2, 6)):
+            name, arg = _identifier(rng, "snake"), rng.choice(NOUNS)
+            lines += [f"    def {name}(self, {arg}: Dict) -> Optional[Dict]:", f'        """{_sentence(rng)}"""']
+            for step in range(rng.randint(2, 10)):
+                lines.append(f"        {rng.choice(NOUNS)}_{step} = {arg}.get('{rng.choice(NOUNS)}', {rng.randint(0, 99)})")
+            lines += [f"        logger.info(f\"{name} finished for {{{arg}}}\")", f"        return {arg}", ""]
+    return "\n".join(lines)
+
+def _script_file(rng: random.Random, typed: bool) -> str:
+    lines = [f"import {{ {_identifier(rng, 'camel')} }} from './{rng.choice(NOUNS)}';", ""]
+    for _ in range(rng.randint(2, 6)):
+        name, arg = _identifier(rng, "camel"), rng.choice(NOUNS)
+        signature = f"{arg}: Record<string, unknown>): Promise<void>" if typed else f"{arg})"
+        lines += [f"// {_sentence(rng)}", f"export async function {name}({signature} {{"]
+        for step in range(rng.randint(2, 10)):
+            lines.append(f"  const {rng.choice(NOUNS)}{step} = await {arg}.{_identifier(rng, 'camel')}({rng.randint(0, 99)});")
+        lines += ["}", ""]
+    return "\n".join(lines)
+
+def _java_file(rng: random.Random) -> str:
+    class_name = _class_name(rng)
+    lines = ["package com.example.service;", "", "import java.util.Map;", "", f"/** {_sentence(rng)} */", f"public class {class_name} {{"]
+    for _ in range(rng.randint(2, 6)):
+        name, arg = _identifier(rng, "camel"), rng.choice(NOUNS)
+        lines += [f"    public Map<String, Object> {name}(Map<String, Object> {arg}) {{"]
+        for step in range(rng.randint(2, 8)):
+            lines.append(f"        Object {rng.choice(NOUNS)}{step} = {arg}.get(\"{rng.choice(NOUNS)}\");")
+        lines += [f"        return {arg};", "    }", ""]
+    lines.append("}")
+    return "\n".join(lines)
+
+def _go_file(rng: random.Random) -> str:
+    lines = [f"package {rng.choice(NOUNS)}", "", 'import "context"', ""]
+    for _ in range(rng.randint(2, 6)):
+        name = _identifier(rng, "camel")
+        lines += [f"// {name[0].upper() + name[1:]} will {_sentence(rng).lower()}", f"func {name[0].upper() + name[1:]}(ctx context.Context, id string) error {{"]
+        for step in range(rng.randint(2, 8)):
+            lines.append(f"\t{rng.choice(NOUNS)}{step} := lookup(ctx, \"{rng.choice(NOUNS)}\", {rng.randint(0, 99)})")
+        lines += ["\treturn nil", "}", ""]
+    return "\n".join(lines)
+
+def _markdown_file(rng: random.Random) -> str:
+    sections = []
+    for _ in range(rng.randint(2, 5)):
+        sections.append(f"## {rng.choice(NOUNS).capitalize()} {rng.choice(['flow', 'design', 'notes'])}\n\n" + ". ".join(_sentence(rng) for _ in range(rng.randint(3, 8))) + ".")
+    return f"# {_class_name(rng)}\n\n" + "\n\n".join(sections)
+
+def _json_file(rng: random.Random) -> str:
+    entries = [f'  "{rng.choice(NOUNS)}_{i}": {{"enabled": {str(rng.random() > 0.5).lower()}, "limit": {rng.randint(1, 500)}}}' for i in range(rng.randint(3, 15))]
+    return "{\n" + ",\n".join(entries) + "\n}"
+
+def _render(rng: random.Random, extension: str) -> str:
+    if extension == ".py":
+        return _python_file(rng)
+    if extension in (".ts", ".js"):
+        return _script_file(rng, extension == ".ts")
+    if extension == ".java":
+        return _java_file(rng)
+    if extension == ".go":
+        return _go_file(rng)
+    if extension == ".md":
+        return _markdown_file(rng)
+    return _json_file(rng)
+
+def generate_codebase(root: Path, files: int, seed: int = 0) -> List[str]:
+    """Write ``files`` source files under root and return their relative paths"""
+    rng = random.Random(seed)
+    root = Path(root)
+    extensions = [extension for extension, _ in LANGUAGES]
+    weights = [weight for _, weight in LANGUAGES]
+
+    paths, contents = [], []
+    for index in range(files):
+        extension = rng.choices(extensions, weights)[0]
+        if contents and rng.random() < VENDORED_SHARE:
+            # A copy of an earlier file under a vendor directory
+            source = rng.randrange(len(contents))
+            extension, content = Path(paths[source]).suffix, contents[source]
+            relative = f"vendor/{rng.choice(NOUNS)}_{index}/{Path(paths[source]).name}"
+        else:
+            content = _render(rng, extension)
+            relative = f"{rng.choice(['src', 'lib', 'app', 'docs'])}/{rng.choice(NOUNS)}/{rng.choice(VERBS)}_{index}{extension}"
+
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content + "\n", encoding="utf-8")
+        paths.append(relative)
+        contents.append(content)
+
+    return paths
+
+def generate_queries(count: int, seed: int = 0) -> List[str]:
+    """Natural language and identifier queries over the generator's vocabulary"""
+    rng = random.Random(seed + 1)
+    queries = []
+    for index in range(count):
+        if index % 4 == 3:
+            queries.append(_identifier(rng, "snake"))
+        else:
+            queries.append(f"how do we {rng.choice(VERBS)} the {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index}")
+    return queries
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic multi-language codebase")
+    parser.add_argument("root", help="Directory to write the files to")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    written = generate_codebase(Path(args.root), args.files, args.seed)
+    print(f"Wrote {len(written)} files to {args.root}")
@@ -0,0 +1,129 @@
+"""Compare the Chroma and NumPy vector backends on synthetic embeddings.
+
+Run from the backend directory:
+
+    python benchmarks/vector_backends.py --chunks 50000 --dim 384
+
+Reports insert and cold-open time, single-query latency percentiles, batched
+query throughput and Chroma's recall@k against the exact NumPy results.
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.numpy_index import NumpyVectorClient
+
+def synthetic_embeddings(count: int, dim: int, seed: int) -> np.ndarray:
+    """Normalized vectors grouped around a few hundred centres, like chunks of related code"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, count // 200), dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, len(centres), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3)
+    }
+
+def run_backend(name: str, client, vectors: np.ndarray, queries: np.ndarray, k: int, batch: int, reopen) -> dict:
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    metadatas = [{"file_path": f"src/file_{i // 20}.py", "chunk_index": i % 20} for i in range(len(vectors))]
+    documents = [f"chunk {i}" for i in range(len(vectors))]
+
+    collection = client.get_or_create_collection(f"bench_{name}", embedding_function=None)
+    started = time.perf_counter()
+    # Chroma caps the size of a single add
+    for i in range(0, len(vectors), 5000):
+        collection.add(
+            ids=ids[i:i + 5000],
+            embeddings=vectors[i:i + 5000].tolist(),
+            metadatas=metadatas[i:i + 5000],
+            documents=documents[i:i + 5000]
+        )
+    if hasattr(collection, "persist"):
+        collection.persist()
+    insert_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    collection = reopen()
+    collection.count()
+    open_seconds = time.perf_counter() - started
+
+    latencies = []
+    results = []
+    for query in queries:
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=["distances"])
+        latencies.append(time.perf_counter() - started)
+        results.append(result["ids"][0])
+
+    started = time.perf_counter()
+    for i in range(0, len(queries), batch):
+        collection.query(query_embeddings=queries[i:i + batch].tolist(), n_results=k, include=["distances"])
+    batched_seconds = time.perf_counter() - started
+
+    return {
+        "insert_seconds": round(insert_seconds, 3),
+        "open_seconds": round(open_seconds, 3),
+        "single_query": percentiles(latencies),
+        "batched_queries_per_second": round(len(queries) / batched_seconds, 1),
+        "results": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Chroma and NumPy vector backends")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=32, help="Queries per call in the batched run")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.chunks, args.dim, seed=1)
+    queries = synthetic_embeddings(args.queries, args.dim, seed=2)
+    report = {"chunks": args.chunks, "dim": args.dim, "k": args.k, "backends": {}}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        numpy_dir = Path(workdir) / "numpy"
+        report["backends"]["numpy"] = run_backend(
+            "numpy", NumpyVectorClient(numpy_dir), vectors, queries, args.k, args.batch,
+            lambda: NumpyVectorClient(numpy_dir).get_or_create_collection("bench_numpy")
+        )
+
+        try:
+            import chromadb
+        except ImportError:
+            print("chromadb is not installed, skipping the Chroma backend", file=sys.stderr)
+        else:
+            chroma_dir = str(Path(workdir) / "chroma")
+            report["backends"]["chroma"] = run_backend(
+                "chroma", chromadb.PersistentClient(path=chroma_dir), vectors, queries, args.k, args.batch,
+                lambda: chromadb.PersistentClient(path=chroma_dir).get_or_create_collection("bench_chroma")
+            )
+
+    # NumPy search is exact, so its results are the ground truth
+    exact = report["backends"]["numpy"].pop("results")
+    for name, backend in report["backends"].items():
+        found = backend.pop("results", exact)
+        hits = sum(len(set(a) & set(b)) for a, b in zip(found, exact))
+        backend[f"recall_at_{args.k}"] = round(hits / (len(exact) * args.k), 4)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -24,4 +24,5 @@ python -m pip install sentence-transformers==2.2.2
 python -m pip install "huggingface_hub<=0.19.4"
 python -m pip install langchain
 python -m pip install langchain-community==0.0.38
-python -m pip install chromadb==0.4.18
\ No newline at end of file
+python -m pip install chromadb==0.4.18
+python -m pip install prometheus_client
\ No newline at end of file
@@ -11,13 +11,33 @@ if not GROQ_API_KEY:
 
 # Database Configuration
 CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+CHROMA_HOST = os.getenv("CHROMA_HOST")  # Use a Chroma server instead of the local directory (required with INGESTION_MODE=queue)
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", 8001))  # The API itself listens on 8000
 COLLECTION_NAME = "codebase_collection"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # Options: chroma, numpy (exact in-process search over memory-mapped .npy files)
+VECTOR_INDEX_DIR = Path(os.getenv("VECTOR_INDEX_DIR", "./vector_index"))  # Used by the numpy backend
+LEXICAL_INDEX_DIR = Path(os.getenv("LEXICAL_INDEX_DIR", "./lexical_index"))
+SYMBOL_INDEX_DIR = Path(os.getenv("SYMBOL_INDEX_DIR", "./symbol_index"))
+REGISTRY_DB_PATH = Path(os.getenv("REGISTRY_DB_PATH", "./codebase_registry.sqlite3"))  # Codebase status, kept across restarts
+SOURCE_STORE_DIR = Path(os.getenv("SOURCE_STORE_DIR", "./source_store"))  # Copies of indexed files, served by the file range endpoint
+STORE_SOURCE_FILES = os.getenv("STORE_SOURCE_FILES", "true").lower() == "true"  # Disable to save disk when file ranges are not needed
 
 # Embedding Configuration
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"  # Free local embedding model
+EMBEDDING_ENGINE = os.getenv("EMBEDDING_ENGINE", "torch")  # Options: torch (PyTorch fp32), onnx (ONNX Runtime fp32), onnx-int8 (dynamically quantized); re-index after changing
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", "./onnx_models"))  # ONNX exports and their int8 variants
+EMBEDDING_BATCH_SIZE = 32  # Texts per ONNX Runtime call
+EMBEDDING_MAX_TOKENS = 256  # Longer texts are truncated, as sentence-transformers does for this model
+
+# Embedding Cache Configuration
+EMBEDDING_CACHE_DIR = Path(os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", 1024 * 1024 * 1024))  # 1GB of vectors
 
 # LLM Configuration
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama3-8b-8192")  # Options: llama3-8b-8192, mixtral-8x7b-32768, gemma-7b-it
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))  # Groq calls in flight per process
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))  # Per-call timeout
+LLM_CODE_EXAMPLES_MODE = os.getenv("LLM_CODE_EXAMPLES_MODE", "parallel")  # Options: parallel, batched (one prompt for all snippets)
 
 # File Processing Configuration
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB per file
@@ -27,17 +47,57 @@ SUPPORTED_EXTENSIONS = {
     '.css', '.sql', '.json', '.yaml', '.yml', '.md', '.txt'
 }
 
+# Parsing Configuration
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", os.cpu_count() or 1))  # Processes used for parsing, 1 parses inline
+PARSE_BATCH_FILES = 16  # Files per work unit sent to a parse worker
+PARSE_MIN_UNITS = 20  # Smaller uploads are split into at least this many units, so their progress advances in steps
+
+# Ingestion Pipeline Configuration
+EMBED_BATCH_SIZE = 50  # Chunks embedded and inserted together
+INGEST_QUEUE_SIZE = 4  # Batches buffered between pipeline stages
+
+# Near-Duplicate Detection Configuration
+NEAR_DUPLICATE_DETECTION = os.getenv("NEAR_DUPLICATE_DETECTION", "true").lower() == "true"  # Embed copies of a chunk found in several files once
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", 3))  # Differing SimHash bits (of 64) still counted as a copy
+NEAR_DUPLICATE_MIN_TOKENS = 30  # Shorter chunks are never collapsed
+
+# Ingestion Worker Configuration
+INGESTION_MODE = os.getenv("INGESTION_MODE", "inprocess")  # Options: inprocess (API background tasks), queue (worker.py processes)
+JOB_QUEUE_DB_PATH = Path(os.getenv("JOB_QUEUE_DB_PATH", "./ingestion_jobs.sqlite3"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1))  # Idle workers check for jobs this often
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 120))  # A job whose worker stops renewing its lease is retried
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+if INGESTION_MODE == "queue" and VECTOR_BACKEND == "chroma" and not CHROMA_HOST:
+    # Separate processes cannot share a local Chroma directory
+    raise ValueError("CHROMA_HOST environment variable is required when INGESTION_MODE=queue")
+
 # Chunking Configuration
-CHUNK_SIZE = 1000
-CHUNK_OVERLAP = 200
+# Compare settings on your own code with tools/parameter_sweep.py before changing them
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))  # Only used by the recursive text splitter
+CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "syntax")  # Options: syntax (function/class boundaries, falls back to recursive), recursive
 
 # Search Configuration
-MAX_SEARCH_RESULTS = 10
-SIMILARITY_THRESHOLD = 0.7
+MAX_SEARCH_RESULTS = int(os.getenv("MAX_SEARCH_RESULTS", 10))
+SEARCH_MAX_DISTANCE = float(os.getenv("SEARCH_MAX_DISTANCE", 1.5))  # Vector matches farther than this (squared L2 of unit vectors, 0-4) are dropped; lexical matches are kept
+RRF_K = 60  # Reciprocal rank fusion constant for hybrid lexical + vector results
+QUERY_BATCHING = os.getenv("QUERY_BATCHING", "true").lower() == "true"  # Queries arriving while one is embedding are embedded together next
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", 32))  # Queries embedded together at most
+RETRIEVE_CANDIDATES = int(os.getenv("RETRIEVE_CANDIDATES", 100))  # Chunks ranked per paginated retrieval listing
+COMPACT_SNIPPET_CHARS = int(os.getenv("COMPACT_SNIPPET_CHARS", 160))  # Snippet length of compact search responses
+
+# Response Cache Configuration
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 3600))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # 64MB
 
 # Upload Configuration
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+MAX_ARCHIVE_SIZE = int(os.getenv("MAX_ARCHIVE_SIZE", 500 * 1024 * 1024))  # 500MB compressed
+MAX_EXTRACTED_SIZE = int(os.getenv("MAX_EXTRACTED_SIZE", 2 * 1024 * 1024 * 1024))  # 2GB of extracted source files
+# Server-local directories (and their subdirectories) that may be ingested in place, separated by os.pathsep; empty disables it
+LOCAL_INGEST_ALLOWLIST = [Path(path).resolve() for path in os.getenv("LOCAL_INGEST_ALLOWLIST", "").split(os.pathsep) if path]
 
 # Server Configuration
 HOST = "0.0.0.0"
@@ -1,18 +1,37 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, Query, HTTPException, BackgroundTasks, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple, Union
 import asyncio
+import base64
+import json
 import logging
 from pathlib import Path
 import uuid
+import tarfile
+import zipfile
+import aiofiles
+from langchain_core.documents import Document
 
-from models.codebase import CodebaseCreate, CodebaseResponse
-from models.search import SearchRequest, SearchResponse, RelevantFile, CodeExample
-from services.file_parser import FileParserService
-from services.vector_db import VectorDBService
-from services.llm_service import LLMService
+from models.codebase import CodebaseCreate, CodebaseResponse, LocalIngestRequest
+from models.search import (
+    SearchRequest, SearchResponse, RelevantFile, CodeExample,
+    CompactSearchResponse, CompactRelevantFile, FileRangeResponse,
+    RetrieveRequest, RetrieveResponse, RetrievedChunk
+)
+from models.symbols import SymbolLookupResponse
+from services.file_parser import FileParserService, shutdown_parse_executor
+from services.vector_db import VectorDBService, parse_duplicate_paths
+from services.llm_service import LLMService, ExplanationFailure, EXPLANATION_FAILED_PREFIX
+from services.ingestion_jobs import IngestionJobRunner
+from services.job_queue import JobQueue
+from services.model_registry import model_registry
+from services.response_cache import ResponseCache
+from services.codebase_registry import CodebaseRegistry
+from services.metrics import request_timings, timed_stage, server_timing_header, render_metrics
+from utils.file_utils import extract_archive, strip_common_root, cleanup_temp_files, get_supported_files
 from config import *
 
 # Configure logging
@@ -23,9 +42,21 @@ logger = logging.getLogger(__name__)
 file_parser = FileParserService()
 vector_db = VectorDBService()
 llm_service = LLMService()
+response_cache = ResponseCache()
+
+# Codebase processing status, persisted so indexed codebases survive restarts
+codebase_registry = CodebaseRegistry()
+
+# Uploads run here as background tasks, or in worker.py processes fed by the job queue
+ingestion_runner = IngestionJobRunner(file_parser, vector_db, codebase_registry, response_cache)
+job_queue = JobQueue() if INGESTION_MODE == "queue" else None
 
-# In-memory storage for codebase processing status
-codebase_status = {}
+# Largest page the retrieval endpoint returns
+MAX_RETRIEVE_LIMIT = 100
+
+
+# Statuses in which a codebase can be searched
+SEARCHABLE_STATUSES = {"completed", "updating"}
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -33,14 +64,17 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up application...")
     await vector_db.initialize()
-    logger.info("Application started successfully")
+    # Collections and indexes of known codebases are reopened lazily on first use
+    if INGESTION_MODE != "queue":
+        # Queued jobs outlive the API process; only background tasks die with it
+        codebase_registry.recover_interrupted()
+    logger.info(f"Application started successfully with {len(codebase_registry)} registered codebases")
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
-    # Add any cleanup code here if needed
-    # For example: await vector_db.close()
+    shutdown_parse_executor()
     logger.info("Application shutdown complete")
 
 # Initialize FastAPI app with lifespan
@@ -74,18 +108,7 @@ async def upload_codebase(
         if not files:
             raise HTTPException(status_code=400, detail="No files provided")
         
-        valid_files = []
-        for file in files:
-            if file.size > MAX_FILE_SIZE:
-                logger.warning(f"File {file.filename} exceeds size limit")
-                continue
-                
-            file_ext = Path(file.filename).suffix.lower()
-            if file_ext not in SUPPORTED_EXTENSIONS:
-                logger.warning(f"File {file.filename} has unsupported extension")
-                continue
-                
-            valid_files.append(file)
+        valid_files = filter_valid_files(files)
         
         if not valid_files:
             raise HTTPException(
@@ -95,19 +118,15 @@ async def upload_codebase(
             )
         
         # Initialize processing status
-        codebase_status[codebase_id] = {
+        codebase_registry.create(codebase_id, {
             "status": "processing",
             "total_files": len(valid_files),
             "processed_files": 0,
             "message": "Starting file processing..."
-        }
+        })
         
         # Start background processing
-        background_tasks.add_task(
-            process_codebase_files, 
-            codebase_id, 
-            valid_files
-        )
+        await start_ingestion(background_tasks, codebase_id, "upload", valid_files)
         
         return CodebaseResponse(
             codebase_id=codebase_id,
@@ -121,178 +140,727 @@ async def upload_codebase(
         logger.error(f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
-async def process_codebase_files(codebase_id: str, files: List[UploadFile]):
-    """Background task to process uploaded files"""
+def filter_valid_files(files: List[UploadFile]) -> List[UploadFile]:
+    """Drop files that are too large or have unsupported extensions"""
+    valid_files = []
+    for file in files:
+        if file.size > MAX_FILE_SIZE:
+            logger.warning(f"File {file.filename} exceeds size limit")
+            continue
+            
+        file_ext = Path(file.filename).suffix.lower()
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            logger.warning(f"File {file.filename} has unsupported extension")
+            continue
+            
+        valid_files.append(file)
+    
+    return valid_files
+
+async def read_upload_files(files: List[UploadFile]) -> AsyncIterator[Tuple[str, bytes]]:
+    """Yield (filename, content) for each uploaded file"""
+    for file in files:
+        try:
+            yield file.filename, await file.read()
+        except Exception as e:
+            logger.error(f"Failed to read file {file.filename}: {str(e)}")
+
+async def spool_upload_files(files: List[UploadFile]) -> Tuple[Path, List[str]]:
+    """Write uploaded files to disk for an ingestion worker, returning the spool directory and filenames"""
+    spool_dir = UPLOAD_DIR / "jobs" / str(uuid.uuid4())
+    spool_dir.mkdir(parents=True)
+    
+    filenames = []
+    for position, file in enumerate(files):
+        async with aiofiles.open(spool_dir / f"{position:06d}", "wb") as f:
+            while chunk := await file.read(1024 * 1024):
+                await f.write(chunk)
+        filenames.append(file.filename)
+    
+    return spool_dir, filenames
+
+async def start_ingestion(
+    background_tasks: BackgroundTasks,
+    codebase_id: str,
+    kind: str,
+    files: List[UploadFile],
+    deleted_files: Optional[List[str]] = None
+):
+    """Hand an upload or re-index to a background task or, in queue mode, to the worker processes"""
+    if INGESTION_MODE == "queue":
+        spool_dir, filenames = await spool_upload_files(files)
+        submit_disk_job(background_tasks, codebase_id, kind, {
+            "spool_dir": str(spool_dir),
+            "files": filenames,
+            "deleted_files": deleted_files or []
+        })
+    elif kind == "upload":
+        background_tasks.add_task(
+            ingestion_runner.process_upload,
+            codebase_id,
+            read_upload_files(files),
+            len(files)
+        )
+    else:
+        background_tasks.add_task(
+            ingestion_runner.reindex,
+            codebase_id,
+            read_upload_files(files),
+            [file.filename for file in files],
+            deleted_files or []
+        )
+
+def submit_disk_job(
+    background_tasks: BackgroundTasks,
+    codebase_id: str,
+    kind: str,
+    payload: Dict[str, Any]
+):
+    """Run a job over files already on disk, here or in a worker process"""
+    if INGESTION_MODE == "queue":
+        job_queue.enqueue(codebase_id, kind, payload)
+    else:
+        job = {"codebase_id": codebase_id, "kind": kind, "attempts": 1, "payload": payload}
+        background_tasks.add_task(ingestion_runner.run_job, job)
+
+@app.post("/api/upload-archive", response_model=CodebaseResponse)
+async def upload_archive(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...)
+):
+    """Upload a whole codebase as one zip or tar.gz archive"""
+    codebase_id = str(uuid.uuid4())
+    archive_path = UPLOAD_DIR / "archives" / f"{codebase_id}.archive"
+    extract_dir = UPLOAD_DIR / "jobs" / codebase_id
+    
     try:
-        codebase_status[codebase_id]["message"] = "Parsing files..."
-        
-        # Parse files
-        documents = []
-        processed_count = 0
+        # Stream the archive to disk instead of holding it in memory
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        size = 0
+        async with aiofiles.open(archive_path, "wb") as f:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > MAX_ARCHIVE_SIZE:
+                    raise HTTPException(status_code=413, detail=f"Archive exceeds {MAX_ARCHIVE_SIZE} bytes")
+                await f.write(chunk)
         
-        for file in files:
-            try:
-                # Read file content
-                content = await file.read()
-                
-                # Parse file
-                parsed_docs = await file_parser.parse_file(
-                    filename=file.filename,
-                    content=content,
-                    codebase_id=codebase_id
-                )
-                
-                documents.extend(parsed_docs)
-                processed_count += 1
-                
-                # Update status
-                codebase_status[codebase_id].update({
-                    "processed_files": processed_count,
-                    "message": f"Processed {processed_count}/{len(files)} files..."
-                })
-                
-            except Exception as e:
-                logger.error(f"Failed to parse file {file.filename}: {str(e)}")
-                continue
+        try:
+            paths = await asyncio.to_thread(
+                extract_archive,
+                archive_path,
+                extract_dir,
+                SUPPORTED_EXTENSIONS,
+                MAX_FILE_SIZE,
+                MAX_EXTRACTED_SIZE
+            )
+        except (ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid archive: {str(e)}")
         
-        if not documents:
-            codebase_status[codebase_id].update({
-                "status": "error",
-                "message": "No documents could be processed"
-            })
-            return
+        if not paths:
+            raise HTTPException(
+                status_code=400,
+                detail="No valid files found in archive. Supported extensions: " +
+                       ", ".join(SUPPORTED_EXTENSIONS)
+            )
         
-        # Store in vector database
-        codebase_status[codebase_id]["message"] = "Creating embeddings..."
-        await vector_db.add_documents(codebase_id, documents)
+        codebase_registry.create(codebase_id, {
+            "status": "processing",
+            "total_files": len(paths),
+            "processed_files": 0,
+            "message": "Starting file processing..."
+        })
         
-        # Update final status
-        codebase_status[codebase_id].update({
-            "status": "completed",
-            "processed_files": processed_count,
-            "message": f"Successfully processed {processed_count} files"
+        submit_disk_job(background_tasks, codebase_id, "upload", {
+            "spool_dir": str(extract_dir),
+            "files": strip_common_root(paths),
+            "paths": paths,
+            "deleted_files": []
         })
         
-        logger.info(f"Codebase {codebase_id} processed successfully")
+        return CodebaseResponse(
+            codebase_id=codebase_id,
+            status="processing",
+            files_processed=0,
+            total_files=len(paths),
+            message="Codebase archive extracted. Processing in background."
+        )
         
+    except HTTPException:
+        cleanup_temp_files(extract_dir)
+        raise
     except Exception as e:
-        logger.error(f"Background processing failed: {str(e)}")
-        codebase_status[codebase_id].update({
-            "status": "error",
-            "message": f"Processing failed: {str(e)}"
-        })
+        cleanup_temp_files(extract_dir)
+        logger.error(f"Archive upload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Archive upload failed: {str(e)}")
+    finally:
+        archive_path.unlink(missing_ok=True)
+
+@app.post("/api/ingest-local", response_model=CodebaseResponse)
+async def ingest_local_directory(request: LocalIngestRequest, background_tasks: BackgroundTasks):
+    """Index a directory or git checkout that is already on the server, without uploading it"""
+    if not LOCAL_INGEST_ALLOWLIST:
+        raise HTTPException(status_code=403, detail="Local ingestion is disabled")
+    
+    # Resolving symlinks first keeps the allowlist check from being bypassed
+    root = Path(request.path).resolve()
+    if not any(root == allowed or allowed in root.parents for allowed in LOCAL_INGEST_ALLOWLIST):
+        raise HTTPException(status_code=403, detail="Path is not in the local ingestion allowlist")
+    if not root.is_dir():
+        raise HTTPException(status_code=404, detail="Directory not found")
+    
+    try:
+        files = await asyncio.to_thread(
+            get_supported_files,
+            root,
+            SUPPORTED_EXTENSIONS,
+            request.respect_gitignore,
+            MAX_FILE_SIZE
+        )
+        # Symlinked files must not expose anything outside the directory
+        filenames = [
+            path.relative_to(root).as_posix()
+            for path in files
+            if not path.is_symlink() or root in path.resolve().parents
+        ]
+    except Exception as e:
+        logger.error(f"Local ingestion failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Local ingestion failed: {str(e)}")
+    
+    if not filenames:
+        raise HTTPException(
+            status_code=400,
+            detail="No valid files found. Supported extensions: " +
+                   ", ".join(SUPPORTED_EXTENSIONS)
+        )
+    
+    codebase_id = str(uuid.uuid4())
+    codebase_registry.create(codebase_id, {
+        "status": "processing",
+        "total_files": len(filenames),
+        "processed_files": 0,
+        "source_dir": str(root),
+        "message": "Starting file processing..."
+    })
+    
+    submit_disk_job(background_tasks, codebase_id, "upload", {
+        "source_dir": str(root),
+        "files": filenames,
+        "deleted_files": []
+    })
+    
+    return CodebaseResponse(
+        codebase_id=codebase_id,
+        status="processing",
+        files_processed=0,
+        total_files=len(filenames),
+        message="Local directory ingestion started. Processing in background."
+    )
+
+@app.post("/api/codebase/{codebase_id}/reindex", response_model=CodebaseResponse)
+async def reindex_codebase(
+    codebase_id: str,
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File([]),
+    deleted_files: List[str] = Form([])
+):
+    """Re-index only the added, modified and deleted files of an existing codebase"""
+    status = codebase_registry.get(codebase_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Codebase not found")
+    
+    if status["status"] not in {"completed", "error"}:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Codebase is busy. Status: {status['status']}"
+        )
+    
+    valid_files = filter_valid_files(files)
+    if not valid_files and not deleted_files:
+        raise HTTPException(status_code=400, detail="No changed or deleted files provided")
+    
+    ingestion_runner.index_changed(codebase_id)
+    codebase_registry.update(codebase_id, {
+        "status": "updating",
+        "processed_files": 0,
+        "message": f"Re-indexing {len(valid_files)} changed and {len(deleted_files)} deleted files..."
+    })
+    
+    await start_ingestion(background_tasks, codebase_id, "reindex", valid_files, deleted_files)
+    
+    return CodebaseResponse(
+        codebase_id=codebase_id,
+        status="updating",
+        files_processed=0,
+        total_files=len(valid_files),
+        message="Codebase re-index started. Processing in background."
+    )
 
 @app.get("/api/codebase/{codebase_id}/status")
 async def get_codebase_status(codebase_id: str):
     """Get processing status of a codebase"""
-    if codebase_id not in codebase_status:
+    status = codebase_registry.get(codebase_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Codebase not found")
+    
+    # Live queue depths while the ingestion pipeline is running
+    pipeline = ingestion_runner.active_pipelines.get(codebase_id)
+    if pipeline:
+        status["queues"] = pipeline.queue_depths()
+    
+    return status
+
+@app.get("/api/codebase/{codebase_id}/symbols", response_model=SymbolLookupResponse)
+async def lookup_symbol(
+    codebase_id: str,
+    q: str = Query(..., min_length=1),
+    mode: str = Query("exact", pattern="^(exact|prefix|fuzzy)$"),
+    limit: int = Query(20, ge=1, le=200),
+    include_usages: bool = True
+):
+    """Find where a symbol is defined and used, without vector search or the LLM"""
+    if codebase_id not in codebase_registry:
+        raise HTTPException(status_code=404, detail="Codebase not found")
+    
+    result = vector_db.lookup_symbol(codebase_id, q, mode, limit, include_usages)
+    return SymbolLookupResponse(query=q, mode=mode, **result)
+
+@app.get("/api/codebase/{codebase_id}/file", response_model=FileRangeResponse)
+async def get_file_range(
+    codebase_id: str,
+    path: str = Query(..., min_length=1),
+    start_line: int = Query(1, ge=1),
+    end_line: Optional[int] = Query(None, ge=1),
+    start_byte: Optional[int] = Query(None, ge=0),
+    end_byte: Optional[int] = Query(None, ge=0)
+):
+    """Serve a range of an indexed file, by lines or by the byte offsets of a search result.
+
+    Without an end the rest of the file is returned.
+    """
+    if codebase_id not in codebase_registry:
+        raise HTTPException(status_code=404, detail="Codebase not found")
+    source_store = file_parser.source_store
+    if source_store is None:
+        raise HTTPException(status_code=404, detail="Source files are not stored (STORE_SOURCE_FILES=false)")
+    
+    if start_byte is not None or end_byte is not None:
+        start_byte = start_byte or 0
+        if end_byte is None:
+            end_byte = MAX_FILE_SIZE
+        if end_byte < start_byte:
+            raise HTTPException(status_code=400, detail="end_byte must not be before start_byte")
+        content = await asyncio.to_thread(source_store.read_bytes, codebase_id, path, start_byte, end_byte)
+        start_line = last_line = None
+    else:
+        if end_line is not None and end_line < start_line:
+            raise HTTPException(status_code=400, detail="end_line must not be before start_line")
+        lines = await asyncio.to_thread(source_store.read_lines, codebase_id, path, start_line, end_line)
+        content, start_byte, last_line = lines if lines is not None else (None, None, None)
+    
+    if content is None:
+        raise HTTPException(status_code=404, detail="File not found in codebase")
+    
+    return FileRangeResponse(
+        file_path=path,
+        content=content.decode('utf-8', errors='ignore'),
+        start_byte=start_byte,
+        end_byte=start_byte + len(content),
+        start_line=start_line,
+        end_line=last_line
+    )
+
+def ensure_searchable(codebase_id: str) -> Dict[str, Any]:
+    """Return the codebase's status, raising an HTTP error unless it exists and is ready for search"""
+    status = codebase_registry.get(codebase_id)
+    if status is None:
+        logger.error(f"Codebase {codebase_id} not found in registry")
         raise HTTPException(status_code=404, detail="Codebase not found")
     
-    return codebase_status[codebase_id]
+    logger.info(f"Codebase status: {status}")
+    
+    if status["status"] not in SEARCHABLE_STATUSES:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Codebase is not ready. Status: {status['status']}"
+        )
+    
+    # A worker may have recreated the codebase's collection since this process cached it
+    vector_db.sync_index_version(codebase_id, status["index_version"])
+    return status
 
-@app.post("/api/search", response_model=SearchResponse)
-async def search_codebase(request: SearchRequest):
+@app.post("/api/search", response_model=Union[CompactSearchResponse, SearchResponse])
+async def search_codebase(request: SearchRequest, response: Response):
     """Search codebase and get AI explanation"""
+    with request_timings() as timings:
+        result, cache_hit = await answer_search(request)
+    
+    # Full responses are cached; the compact form is derived from them
+    if request.response_format == "compact":
+        result = to_compact_response(result)
+    
+    # Per-stage durations show up in the browser's network panel
+    response.headers["Server-Timing"] = server_timing_header(timings, {"cache": "hit"} if cache_hit else None)
+    return result
+
+async def answer_search(request: SearchRequest) -> Tuple[Any, bool]:
+    """Answer a search from the response cache or by building it, and tell which one it was"""
     try:
         # Add debugging
         logger.info(f"Received search request for codebase_id: {request.codebase_id}")
-        logger.info(f"Available codebases: {list(codebase_status.keys())}")
         
         # Validate codebase exists and is ready
-        if request.codebase_id not in codebase_status:
-            logger.error(f"Codebase {request.codebase_id} not found in status dict")
-            raise HTTPException(status_code=404, detail="Codebase not found")
+        status = ensure_searchable(request.codebase_id)
         
-        status = codebase_status[request.codebase_id]
-        logger.info(f"Codebase status: {status}")
+        # Repeated questions are answered from the response cache
+        generation = status["index_version"]
+        cached = response_cache.get(request.codebase_id, request.query, generation)
+        if cached is not None:
+            logger.info(f"Response cache hit for query: {request.query}")
+            return cached, True
         
-        if status["status"] != "completed":
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Codebase is not ready. Status: {status['status']}"
-            )
+        response = await build_search_response(request)
+        
+        # Responses carrying an LLM failure are not worth repeating
+        if not response.explanation.startswith(EXPLANATION_FAILED_PREFIX):
+            response_cache.put(request.codebase_id, request.query, jsonable_encoder(response), generation)
+        
+        return response, False
         
-        # Perform vector search
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Search failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+async def build_search_response(request: SearchRequest) -> SearchResponse:
+    """Retrieve relevant chunks and have the LLM explain them"""
+    # Perform vector search
+    with timed_stage("retrieval", request.codebase_id):
         search_results = await vector_db.search(
             codebase_id=request.codebase_id,
             query=request.query,
             k=MAX_SEARCH_RESULTS
         )
-        
-        if not search_results:
-            return SearchResponse(
-                query=request.query,
-                explanation="No relevant code found for your query.",
-                relevant_files=[],
-                code_examples=[]
-            )
-        
-        # Generate AI explanation
-        explanation = await llm_service.generate_explanation(
+    
+    if not search_results:
+        return SearchResponse(
             query=request.query,
-            search_results=search_results
+            explanation="No relevant code found for your query.",
+            relevant_files=[],
+            code_examples=[]
         )
-        
-        # Extract relevant files with proper RelevantFile model structure
-        relevant_files = []
-        for result in search_results:
-            relevant_file = RelevantFile(
-                file_path=result.metadata.get("file_path", "Unknown"),
-                relevance_score=result.metadata.get("score", 0.0),
-                snippet=result.page_content[:500] + "..." if len(result.page_content) > 500 else result.page_content,
-                content=result.page_content
+    
+    # Generate AI explanation and code examples concurrently
+    with timed_stage("llm", request.codebase_id):
+        explanation, code_examples_data = await asyncio.gather(
+            llm_service.generate_explanation(
+                query=request.query,
+                search_results=search_results
+            ),
+            llm_service.extract_code_examples(
+                query=request.query,
+                search_results=search_results
             )
-            relevant_files.append(relevant_file)
-        
-        # Generate code examples with proper CodeExample model structure
-        code_examples_data = await llm_service.extract_code_examples(
+        )
+    
+    # Extract relevant files with proper RelevantFile model structure
+    relevant_files = to_relevant_files(search_results)
+    
+    # Convert to CodeExample objects if llm_service returns dict/raw data
+    code_examples = [to_code_example(example) for example in code_examples_data or []]
+    
+    return SearchResponse(
+        query=request.query,
+        explanation=explanation,
+        relevant_files=relevant_files,
+        code_examples=code_examples
+    )
+
+def to_relevant_files(search_results: List[Document]) -> List[RelevantFile]:
+    """Convert retrieved chunks to RelevantFile models"""
+    relevant_files = []
+    for result in search_results:
+        relevant_file = RelevantFile(
+            file_path=result.metadata.get("file_path", "Unknown"),
+            relevance_score=result.metadata.get("score", 0.0),
+            snippet=result.page_content[:500] + "..." if len(result.page_content) > 500 else result.page_content,
+            content=result.page_content,
+            duplicate_paths=parse_duplicate_paths(result.metadata.get("duplicate_paths")),
+            start_line=result.metadata.get("start_line"),
+            end_line=result.metadata.get("end_line"),
+            start_byte=result.metadata.get("start_byte"),
+            end_byte=result.metadata.get("end_byte")
+        )
+        relevant_files.append(relevant_file)
+    return relevant_files
+
+def to_compact_response(response: Union[SearchResponse, Dict[str, Any]]) -> CompactSearchResponse:
+    """Reduce a search response, or its cached form, to line ranges and short snippets"""
+    data = response if isinstance(response, dict) else jsonable_encoder(response)
+    return CompactSearchResponse(
+        query=data["query"],
+        explanation=data["explanation"],
+        relevant_files=to_compact_files(data["relevant_files"]),
+        code_examples=data["code_examples"]
+    )
+
+def to_compact_files(relevant_files: List[Dict[str, Any]]) -> List[CompactRelevantFile]:
+    """Convert serialized RelevantFile models to their compact form"""
+    compact_files = []
+    for relevant_file in relevant_files:
+        text = relevant_file.get("content") or relevant_file["snippet"]
+        compact_files.append(CompactRelevantFile(
+            file_path=relevant_file["file_path"],
+            relevance_score=relevant_file["relevance_score"],
+            snippet=text[:COMPACT_SNIPPET_CHARS] + "..." if len(text) > COMPACT_SNIPPET_CHARS else text,
+            start_line=relevant_file.get("start_line"),
+            end_line=relevant_file.get("end_line"),
+            start_byte=relevant_file.get("start_byte"),
+            end_byte=relevant_file.get("end_byte"),
+            duplicate_paths=relevant_file.get("duplicate_paths", [])
+        ))
+    return compact_files
+
+def to_code_example(example: Any) -> CodeExample:
+    """Convert a code example from llm_service (dict or raw data) to a CodeExample"""
+    if isinstance(example, dict):
+        return CodeExample(
+            title=example.get("title", "Code Example"),
+            code=example.get("code", ""),
+            explanation=example.get("explanation"),
+            file_path=example.get("file_path")
+        )
+    
+    # If it's just a string, create a simple example
+    return CodeExample(
+        title="Code Example",
+        code=str(example),
+        explanation=None,
+        file_path=None
+    )
+
+@app.post("/api/search/stream")
+async def search_codebase_stream(request: SearchRequest):
+    """Search codebase and stream results as server-sent events.
+
+    Events are sent in this order: ``relevant_files`` as soon as retrieval is
+    done, then ``explanation`` deltas and ``code_example`` items interleaved as
+    the LLM produces them, and finally ``done`` (or ``error``).
+    """
+    logger.info(f"Received streaming search request for codebase_id: {request.codebase_id}")
+    status = ensure_searchable(request.codebase_id)
+    
+    return StreamingResponse(
+        stream_search_events(request, status["index_version"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def stream_search_events(request: SearchRequest, generation: int) -> AsyncIterator[str]:
+    """Produce the server-sent events of a streaming search"""
+    compact = request.response_format == "compact"
+    cached = response_cache.get(request.codebase_id, request.query, generation)
+    if cached is not None:
+        yield sse_event("relevant_files", to_compact_files(cached["relevant_files"]) if compact else cached["relevant_files"])
+        yield sse_event("explanation", {"delta": cached["explanation"]})
+        for example in cached["code_examples"]:
+            yield sse_event("code_example", example)
+        yield sse_event("done", {"cached": True})
+        return
+    
+    tasks = []
+    try:
+        search_results = await vector_db.search(
+            codebase_id=request.codebase_id,
             query=request.query,
-            search_results=search_results
+            k=MAX_SEARCH_RESULTS
         )
         
-        # Convert to CodeExample objects if llm_service returns dict/raw data
+        relevant_files = to_relevant_files(search_results)
+        yield sse_event("relevant_files", to_compact_files(jsonable_encoder(relevant_files)) if compact else relevant_files)
+        
+        explanation_parts = []
         code_examples = []
-        if code_examples_data:
-            for example in code_examples_data:
-                if isinstance(example, dict):
-                    code_example = CodeExample(
-                        title=example.get("title", "Code Example"),
-                        code=example.get("code", ""),
-                        explanation=example.get("explanation"),
-                        file_path=example.get("file_path")
-                    )
+        # A failed LLM stream is reported to the client but never cached
+        failed = False
+        
+        if not search_results:
+            explanation_parts.append("No relevant code found for your query.")
+            yield sse_event("explanation", {"delta": explanation_parts[0]})
+        else:
+            # Both LLM streams feed one queue so events go out as soon as either produces
+            events: asyncio.Queue = asyncio.Queue()
+            
+            async def pump(kind: str, items: AsyncIterator[Any]):
+                try:
+                    async for item in items:
+                        await events.put((kind, item))
+                finally:
+                    await events.put((kind, None))
+            
+            tasks = [
+                asyncio.ensure_future(pump("explanation", llm_service.stream_explanation(
+                    query=request.query,
+                    search_results=search_results
+                ))),
+                asyncio.ensure_future(pump("code_example", llm_service.iter_code_examples(
+                    query=request.query,
+                    search_results=search_results
+                )))
+            ]
+            
+            remaining = len(tasks)
+            while remaining:
+                kind, item = await events.get()
+                if item is None:
+                    remaining -= 1
+                elif kind == "explanation":
+                    failed = failed or isinstance(item, ExplanationFailure)
+                    explanation_parts.append(item)
+                    yield sse_event("explanation", {"delta": item})
                 else:
-                    # If it's just a string, create a simple example
-                    code_example = CodeExample(
-                        title="Code Example",
-                        code=str(example),
-                        explanation=None,
-                        file_path=None
-                    )
-                code_examples.append(code_example)
+                    code_example = to_code_example(item)
+                    code_examples.append(code_example)
+                    yield sse_event("code_example", code_example)
         
-        return SearchResponse(
-            query=request.query,
-            explanation=explanation,
-            relevant_files=relevant_files,
-            code_examples=code_examples
-        )
+        if not failed:
+            response = SearchResponse(
+                query=request.query,
+                explanation="".join(explanation_parts),
+                relevant_files=relevant_files,
+                code_examples=code_examples
+            )
+            response_cache.put(request.codebase_id, request.query, jsonable_encoder(response), generation)
+        
+        yield sse_event("done", {"cached": False})
         
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Search failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+        logger.error(f"Streaming search failed: {str(e)}")
+        yield sse_event("error", {"detail": f"Search failed: {str(e)}"})
+    finally:
+        # The client may disconnect mid-stream
+        for task in tasks:
+            task.cancel()
+
+@app.post("/api/retrieve", response_model=RetrieveResponse)
+async def retrieve_chunks(request: RetrieveRequest, response: Response):
+    """Return ranked chunks without LLM explanation, with metadata filters and cursor pagination"""
+    ensure_searchable(request.codebase_id)
+    
+    if not 1 <= request.limit <= MAX_RETRIEVE_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_RETRIEVE_LIMIT}")
+    if request.cursor:
+        offset, depth = decode_cursor(request.cursor)
+    else:
+        offset, depth = 0, max(RETRIEVE_CANDIDATES, request.limit)
+    # Paging past the ranked pool re-ranks with a deeper one
+    while offset + request.limit > depth:
+        depth *= 2
+    
+    try:
+        with request_timings() as timings:
+            documents, has_more = await vector_db.retrieve(
+                codebase_id=request.codebase_id,
+                query=request.query,
+                limit=request.limit,
+                offset=offset,
+                depth=depth,
+                language=request.language,
+                file_type=request.file_type,
+                path_glob=request.path_glob
+            )
+    except Exception as e:
+        logger.error(f"Retrieval failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Retrieval failed: {str(e)}")
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    
+    results = [
+        RetrievedChunk(
+            chunk_id=doc.metadata["chunk_id"],
+            file_path=doc.metadata.get("file_path", "Unknown"),
+            content=doc.page_content,
+            score=doc.metadata.get("score", 0.0),
+            retrieval=doc.metadata.get("retrieval", "vector"),
+            language=doc.metadata.get("language"),
+            start_line=doc.metadata.get("start_line"),
+            end_line=doc.metadata.get("end_line"),
+            start_byte=doc.metadata.get("start_byte"),
+            end_byte=doc.metadata.get("end_byte"),
+            duplicate_paths=parse_duplicate_paths(doc.metadata.get("duplicate_paths"))
+        )
+        for doc in documents
+    ]
+    
+    return RetrieveResponse(
+        query=request.query,
+        results=results,
+        next_cursor=encode_cursor(offset + len(results), depth) if has_more else None
+    )
+
+def encode_cursor(offset: int, depth: int) -> str:
+    """Build the opaque pagination cursor for a result offset"""
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset, "depth": depth}).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Read the result offset and ranking depth back from a pagination cursor"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        offset, depth = data["offset"], data["depth"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(offset, int) or not isinstance(depth, int) or offset < 0 or depth < 1:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset, depth
+
+@app.delete("/api/codebase/{codebase_id}")
+async def delete_codebase(codebase_id: str):
+    """Delete a codebase and everything indexed for it"""
+    status = codebase_registry.get(codebase_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Codebase not found")
+    
+    if status["status"] in {"processing", "updating"}:
+        raise HTTPException(status_code=409, detail="Codebase is still being processed")
+    
+    await vector_db.delete_codebase(codebase_id)
+    if file_parser.source_store:
+        await asyncio.to_thread(file_parser.source_store.delete, codebase_id)
+    response_cache.invalidate(codebase_id)
+    codebase_registry.delete(codebase_id)
+    
+    return {"codebase_id": codebase_id, "status": "deleted"}
 
 # Add debugging endpoint
 @app.get("/api/debug/codebases")
 async def list_codebases():
     """Debug endpoint to list all codebases and their status"""
+    codebases = codebase_registry.all()
     return {
-        "codebases": codebase_status,
-        "total_count": len(codebase_status)
+        "codebases": codebases,
+        "total_count": len(codebases),
+        "embedding_cache": vector_db.embedding_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "jobs": job_queue.stats() if job_queue else None
     }
 
+@app.get("/api/debug/models")
+async def list_models():
+    """Debug endpoint to show loaded embedding models and their cost"""
+    return {
+        "models": model_registry.stats(),
+        "query_batching": vector_db.query_batcher.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of ingestion stages, searches and LLM calls"""
+    content, content_type = render_metrics()
+    return Response(content=content, headers={"Content-Type": content_type})
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -10,4 +10,8 @@ class CodebaseResponse(BaseModel):
     status: str
     files_processed: int
     total_files: int
-    message: str
\ No newline at end of file
+    message: str
+
+class LocalIngestRequest(BaseModel):
+    path: str
+    respect_gitignore: bool = True
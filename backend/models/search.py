@@ -1,15 +1,21 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional, Dict, Any, Literal
 
 class SearchRequest(BaseModel):
     codebase_id: str
     query: str
+    response_format: Literal["full", "compact"] = "full"  # compact drops chunk contents, see CompactSearchResponse
 
 class RelevantFile(BaseModel):
     file_path: str
     relevance_score: float
     snippet: str
     content: Optional[str] = None
+    duplicate_paths: List[str] = []  # Other files holding a copy of this code
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    start_byte: Optional[int] = None
+    end_byte: Optional[int] = None
 
 class CodeExample(BaseModel):
     title: str
@@ -21,4 +27,61 @@ class SearchResponse(BaseModel):
     query: str
     explanation: str
     relevant_files: List[RelevantFile]
-    code_examples: List[CodeExample] = []
\ No newline at end of file
+    code_examples: List[CodeExample] = []
+
+# Compact models reject unknown fields so full responses are never mistaken for them
+class CompactRelevantFile(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    file_path: str
+    relevance_score: float
+    snippet: str
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    start_byte: Optional[int] = None
+    end_byte: Optional[int] = None
+    duplicate_paths: List[str] = []
+
+class CompactSearchResponse(BaseModel):
+    """Search response with line ranges and short snippets; fetch code from the file range endpoint"""
+    model_config = ConfigDict(extra="forbid")
+
+    query: str
+    explanation: str
+    relevant_files: List[CompactRelevantFile]
+    code_examples: List[CodeExample] = []
+
+class FileRangeResponse(BaseModel):
+    file_path: str
+    content: str
+    start_byte: int
+    end_byte: int
+    start_line: Optional[int] = None  # Only known when the range was requested by lines
+    end_line: Optional[int] = None
+
+class RetrieveRequest(BaseModel):
+    codebase_id: str
+    query: str
+    limit: int = 10
+    language: Optional[str] = None
+    file_type: Optional[str] = None
+    path_glob: Optional[str] = None
+    cursor: Optional[str] = None
+
+class RetrievedChunk(BaseModel):
+    chunk_id: str
+    file_path: str
+    content: str
+    score: float
+    retrieval: str
+    language: Optional[str] = None
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    start_byte: Optional[int] = None
+    end_byte: Optional[int] = None
+    duplicate_paths: List[str] = []
+
+class RetrieveResponse(BaseModel):
+    query: str
+    results: List[RetrievedChunk]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SymbolDefinition(BaseModel):
+    name: str
+    kind: str
+    file_path: str
+    line: int
+    chunk_index: Optional[int] = None
+    chunk_id: Optional[str] = None
+
+class SymbolUsage(BaseModel):
+    name: str
+    file_path: str
+    chunk_id: str
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+
+class SymbolLookupResponse(BaseModel):
+    query: str
+    mode: str
+    definitions: List[SymbolDefinition]
+    usages: List[SymbolUsage] = []
@@ -0,0 +1,165 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from config import REGISTRY_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Statuses of a codebase whose ingestion was still running
+IN_PROGRESS_STATUSES = ("processing", "updating")
+
+class CodebaseRegistry:
+    """Persistent record of every codebase and its processing status.
+
+    Rows live in SQLite next to the Chroma data, so indexed codebases survive
+    restarts and deploys. Every update is written through immediately; fields
+    without a column of their own (e.g. embedding cache stats) go in ``extra``.
+    ``index_version`` is bumped whenever a codebase's index changes, which lets
+    every API and worker process tell when its caches are stale.
+    """
+
+    COLUMNS = ("status", "total_files", "processed_files", "chunk_count", "message")
+
+    def __init__(self, db_path: Path = REGISTRY_DB_PATH):
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS codebases (
+                codebase_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                total_files INTEGER NOT NULL DEFAULT 0,
+                processed_files INTEGER NOT NULL DEFAULT 0,
+                chunk_count INTEGER NOT NULL DEFAULT 0,
+                message TEXT NOT NULL DEFAULT '',
+                extra TEXT NOT NULL DEFAULT '{}',
+                index_version INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(codebases)")}
+        if "index_version" not in columns:
+            self.conn.execute("ALTER TABLE codebases ADD COLUMN index_version INTEGER NOT NULL DEFAULT 0")
+        self.conn.commit()
+
+    def __contains__(self, codebase_id: str) -> bool:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM codebases WHERE codebase_id = ?", (codebase_id,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM codebases").fetchone()[0]
+
+    def get(self, codebase_id: str) -> Optional[Dict[str, Any]]:
+        """Return a codebase's status record, or None if it is unknown"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM codebases WHERE codebase_id = ?", (codebase_id,)
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Return the status records of all codebases, oldest first"""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM codebases ORDER BY created_at").fetchall()
+        return {row["codebase_id"]: self._to_record(row) for row in rows}
+
+    def create(self, codebase_id: str, fields: Dict[str, Any]):
+        """Register a new codebase"""
+        now = time.time()
+        columns, extra = self._split(fields)
+        with self._lock:
+            self.conn.execute(
+                f"""INSERT INTO codebases (codebase_id, {", ".join(columns)}, extra, created_at, updated_at)
+                    VALUES (?, {", ".join("?" * len(columns))}, ?, ?, ?)""",
+                [codebase_id, *columns.values(), json.dumps(extra), now, now]
+            )
+            self.conn.commit()
+
+    def update(self, codebase_id: str, fields: Dict[str, Any]):
+        """Change some fields of a codebase's record"""
+        if not fields:
+            return
+        columns, extra = self._split(fields)
+        with self._lock:
+            if extra:
+                row = self.conn.execute(
+                    "SELECT extra FROM codebases WHERE codebase_id = ?", (codebase_id,)
+                ).fetchone()
+                if row is None:
+                    return
+                columns["extra"] = json.dumps({**json.loads(row["extra"]), **extra})
+
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            self.conn.execute(
+                f"UPDATE codebases SET {assignments}, updated_at = ? WHERE codebase_id = ?",
+                [*columns.values(), time.time(), codebase_id]
+            )
+            self.conn.commit()
+
+    def bump_index_version(self, codebase_id: str) -> int:
+        """Record that a codebase's index changed and return its new version"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE codebases SET index_version = index_version + 1, updated_at = ? WHERE codebase_id = ?",
+                (time.time(), codebase_id)
+            )
+            self.conn.commit()
+            row = self.conn.execute(
+                "SELECT index_version FROM codebases WHERE codebase_id = ?", (codebase_id,)
+            ).fetchone()
+        return row["index_version"] if row else 0
+
+    def delete(self, codebase_id: str):
+        """Forget a codebase"""
+        with self._lock:
+            self.conn.execute("DELETE FROM codebases WHERE codebase_id = ?", (codebase_id,))
+            self.conn.commit()
+
+    def recover_interrupted(self) -> List[str]:
+        """Mark codebases whose ingestion was cut short by a restart as failed"""
+        placeholders = ",".join("?" * len(IN_PROGRESS_STATUSES))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT codebase_id FROM codebases WHERE status IN ({placeholders})",
+                IN_PROGRESS_STATUSES
+            ).fetchall()
+            self.conn.execute(
+                f"""UPDATE codebases SET status = 'error', updated_at = ?,
+                    message = 'Processing was interrupted by a restart. Re-upload or re-index the files.'
+                    WHERE status IN ({placeholders})""",
+                [time.time(), *IN_PROGRESS_STATUSES]
+            )
+            self.conn.commit()
+
+        interrupted = [row["codebase_id"] for row in rows]
+        if interrupted:
+            logger.warning(f"Marked {len(interrupted)} interrupted codebases as failed: {interrupted}")
+        return interrupted
+
+    def _split(self, fields: Dict[str, Any]):
+        columns = {key: value for key, value in fields.items() if key in self.COLUMNS}
+        extra = {key: value for key, value in fields.items() if key not in self.COLUMNS}
+        return columns, extra
+
+    def _to_record(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = {column: row[column] for column in self.COLUMNS}
+        record.update(json.loads(row["extra"]))
+        record["index_version"] = row["index_version"]
+        record["created_at"] = row["created_at"]
+        record["updated_at"] = row["updated_at"]
+        return record
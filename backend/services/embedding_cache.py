@@ -0,0 +1,200 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_BYTES
+from services.model_registry import embedding_model_id
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Persistent, content-addressed store of chunk embeddings.
+
+    Vectors are keyed by a hash of the embedding model name (with its inference
+    engine) plus the chunk text, so identical chunks share a vector across
+    uploads and codebases. When the
+    stored vectors exceed ``max_bytes`` the least recently used ones are evicted.
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    _QUERY_BATCH = 500
+
+    def __init__(
+        self,
+        cache_dir: Path = EMBEDDING_CACHE_DIR,
+        max_bytes: int = EMBEDDING_CACHE_MAX_BYTES,
+        model_name: Optional[str] = None
+    ):
+        # Engines round differently, so their vectors are cached separately
+        self.model_name = model_name or embedding_model_id()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(cache_dir) / "embeddings.sqlite3"
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self.conn.commit()
+        self.total_bytes = self._stored_bytes()
+
+    def make_key(self, text: str) -> str:
+        """Build the cache key for a chunk of text"""
+        digest = hashlib.sha256()
+        digest.update(self.model_name.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8', errors='ignore'))
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up stored vectors, returning only the keys that were found"""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            for i in range(0, len(unique_keys), self._QUERY_BATCH):
+                batch = unique_keys[i:i + self._QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = self._decode(blob)
+
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self.conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Store vectors and evict old entries if the cache grew past its limit"""
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = self._encode(vector)
+            rows.append((key, blob, len(blob), now))
+
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+            if self.conn.total_changes - before == len(rows):
+                self.total_bytes += sum(row[2] for row in rows)
+            else:
+                # Some keys were already present (e.g. written by another process)
+                self.total_bytes = self._stored_bytes()
+
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def stats(self) -> Dict[str, float]:
+        """Return process-wide hit/miss counters and cache size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def _evict(self):
+        """Drop least recently used vectors until the cache is below 90% of its limit"""
+        # Other processes may share the file, so resync before deciding what to drop
+        self.total_bytes = self._stored_bytes()
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+
+        while self.total_bytes > target:
+            rows = self.conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_used LIMIT ?",
+                (self._QUERY_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+
+            self.conn.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key, _ in rows])
+            self.total_bytes -= sum(size for _, size in rows)
+            evicted += len(rows)
+
+        self.conn.commit()
+        logger.info(f"Evicted {evicted} embeddings from cache ({self.total_bytes} bytes remaining)")
+
+    def _stored_bytes(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def _encode(vector: List[float]) -> bytes:
+        return array('f', vector).tobytes()
+
+    @staticmethod
+    def _decode(blob: bytes) -> List[float]:
+        vector = array('f')
+        vector.frombytes(blob)
+        return vector.tolist()
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves document vectors from an EmbeddingCache"""
+
+    def __init__(self, embeddings: Embeddings, cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.cache = cache or EmbeddingCache()
+
+    def embed_with_stats(self, texts: List[str]) -> Tuple[List[List[float]], int]:
+        """Embed texts, returning the vectors and how many came from the cache"""
+        keys = [self.cache.make_key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Only run the model on texts we have never seen, once per distinct text
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            cached.update(computed)
+
+        hits = sum(1 for key in keys if key not in missing)
+        return [cached[key] for key in keys], hits
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_with_stats(texts)[0]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
@@ -1,19 +1,15 @@
 import asyncio
 import logging
 from typing import List
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
 from config import EMBEDDING_MODEL
+from services.model_registry import model_registry
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
     def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=EMBEDDING_MODEL,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        self.embeddings = model_registry.embeddings(EMBEDDING_MODEL)
     
     async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Create embeddings for a list of texts"""
@@ -1,15 +1,79 @@
 import asyncio
+import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple, Union
 import logging
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
-from config import CHUNK_SIZE, CHUNK_OVERLAP
-from utils.text_processing import clean_code, extract_functions_and_classes
+from config import (
+    CHUNK_SIZE, CHUNK_OVERLAP, CHUNKING_STRATEGY, PARSE_WORKERS, PARSE_BATCH_FILES, PARSE_MIN_UNITS,
+    NEAR_DUPLICATE_DETECTION, NEAR_DUPLICATE_MIN_TOKENS, STORE_SOURCE_FILES
+)
+from utils.code_chunker import CodeChunker
+from utils.near_duplicates import simhash
+from services.metrics import StageClock, observe_stage
+from services.source_store import SourceStore
+from utils.file_utils import read_file_bytes, is_binary_content
+from utils.source_scanner import scan_source, EXTENSION_LANGUAGES
 
 logger = logging.getLogger(__name__)
 
+# Process pool shared by all parse requests, created on first use
+_parse_executor: Optional[ProcessPoolExecutor] = None
+
+# Parser instance owned by each pool worker process
+_worker_parser = None
+
+def get_parse_executor() -> Optional[ProcessPoolExecutor]:
+    """Return the shared parse process pool, or None when parsing runs inline"""
+    global _parse_executor
+    if _parse_executor is None and PARSE_WORKERS > 1:
+        _parse_executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        logger.info(f"Started parse pool with {PARSE_WORKERS} workers")
+    return _parse_executor
+
+def shutdown_parse_executor():
+    """Stop the shared parse process pool"""
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(cancel_futures=True)
+        _parse_executor = None
+
+def _parse_batch(
+    batch: List[Tuple[str, Union[bytes, Path]]],
+    codebase_id: str,
+    store_source: bool = False
+) -> Tuple[List[Document], List[Tuple[str, str, float]]]:
+    """Parse a work unit of files inside a pool worker.
+
+    Returns the documents and the (stage, language, seconds) timings of each file,
+    which the parent process records since metrics live there.
+    """
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = FileParserService()
+    
+    documents = []
+    timings = []
+    for filename, content in batch:
+        if isinstance(content, Path):
+            # Server-local files are read by the worker, so only paths cross the process boundary
+            clock = StageClock(timings, _worker_parser._detect_language(content.suffix.lower()))
+            try:
+                content = read_file_bytes(content)
+            except Exception as e:
+                logger.error(f"Failed to read file {filename}: {str(e)}")
+                continue
+            clock.lap("read")
+            if is_binary_content(content):
+                continue
+        documents.extend(_worker_parser.parse_content(filename, content, codebase_id, timings, store_source))
+    return documents, timings
+
 class FileParserService:
     def __init__(self):
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -18,35 +82,146 @@ class FileParserService:
             length_function=len,
             separators=["\n\n", "\n", " ", ""]
         )
+        # Code is chunked on function and class boundaries where its structure is known
+        self.code_chunker = (
+            CodeChunker(CHUNK_SIZE, self.text_splitter.split_text)
+            if CHUNKING_STRATEGY == "syntax" else None
+        )
+        # Parsed files are kept so ranges of them can be served later
+        self.source_store = SourceStore() if STORE_SOURCE_FILES else None
     
     async def parse_file(
         self, 
         filename: str, 
         content: bytes, 
-        codebase_id: str
+        codebase_id: str,
+        store_source: bool = False
     ) -> List[Document]:
         """Parse a single file and create documents"""
+        return self.parse_content(filename, content, codebase_id, store_source=store_source)
+    
+    async def parse_stream(
+        self,
+        sources: AsyncIterator[Tuple[str, Union[bytes, Path]]],
+        codebase_id: str,
+        store_source: bool = False,
+        total_files: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, List[Document]]]:
+        """Parse (filename, content) pairs on the process pool.
+        
+        Files are grouped into work units of up to PARSE_BATCH_FILES. Each yielded item is
+        (files in the unit, documents), in the same order as the input. Content may
+        also be the Path of a server-local file, which is then read by the worker.
+        With ``store_source``, parsed files are also kept in the source store. Given
+        ``total_files``, an upload of fewer than PARSE_MIN_UNITS full units is cut
+        into smaller ones, so it is spread over the workers and reported in steps.
+        """
+        loop = asyncio.get_running_loop()
+        executor = get_parse_executor()
+        max_in_flight = PARSE_WORKERS * 2
+        pending = deque()
+        batch_files = PARSE_BATCH_FILES
+        if total_files:
+            batch_files = max(1, min(PARSE_BATCH_FILES, -(-total_files // PARSE_MIN_UNITS)))
+        
+        async def submit(batch):
+            if executor is None:
+                documents, timings = _parse_batch(batch, codebase_id, store_source)
+            else:
+                documents, timings = await loop.run_in_executor(executor, _parse_batch, batch, codebase_id, store_source)
+            for stage, language, seconds in timings:
+                observe_stage(stage, seconds, codebase_id, language)
+            return documents
+        
+        batch = []
+        async for filename, content in sources:
+            batch.append((filename, content))
+            if len(batch) < batch_files:
+                continue
+            
+            pending.append((len(batch), asyncio.ensure_future(submit(batch))))
+            batch = []
+            
+            # Bound the number of work units (and file contents) held in memory
+            while len(pending) >= max_in_flight:
+                count, future = pending.popleft()
+                yield count, await future
+        
+        if batch:
+            pending.append((len(batch), asyncio.ensure_future(submit(batch))))
+        
+        while pending:
+            count, future = pending.popleft()
+            yield count, await future
+    
+    def parse_content(
+        self,
+        filename: str,
+        content: bytes,
+        codebase_id: str,
+        timings: Optional[List[Tuple[str, str, float]]] = None,
+        store_source: bool = False
+    ) -> List[Document]:
+        """Parse a single file synchronously, suitable for worker processes.
+
+        If ``timings`` is given, the duration of each parsing stage is appended to it.
+        Only ingestion sets ``store_source``, so tools parsing files for inspection
+        leave the source store alone.
+        """
         try:
+            clock = StageClock(timings, self._detect_language(Path(filename).suffix.lower()))
+            
             # Decode content
             text_content = content.decode('utf-8', errors='ignore')
+            clock.lap("decode")
             
             if not text_content.strip():
                 return []
             
-            # Clean and process code
-            cleaned_content = clean_code(text_content)
+            # One pass cleans the code, remembering where each cleaned line came from,
+            # and finds definitions (with their original lines) and imports
+            file_ext = Path(filename).suffix.lower()
+            scan = scan_source(text_content, file_ext)
+            cleaned_content, line_map, symbols = scan.cleaned, scan.line_map, scan.symbols
+            clock.lap("scan")
+            
+            file_info = {
+                "language": self._detect_language(file_ext),
+                "functions": scan.functions,
+                "classes": scan.classes,
+                "imports": scan.imports
+            }
             
-            # Extract structural information
-            file_info = self._extract_file_info(filename, cleaned_content)
+            # Create chunks; the chunker takes definitions at their cleaned lines
+            definitions = [
+                {**symbol, "line": bisect_left(line_map, symbol["line"]) + 1}
+                for symbol in symbols
+            ]
+            chunks = self._split_with_lines(cleaned_content, line_map, file_ext, definitions)
+            clock.lap("split")
             
-            # Create chunks
-            chunks = self.text_splitter.split_text(cleaned_content)
+            # Byte offsets of the original lines; they match the character offsets of ASCII files
+            if len(text_content) == len(content):
+                line_starts = scan.line_offsets
+            else:
+                line_starts = [0] + [match.end() for match in re.finditer(b'\n', content)]
             
             documents = []
-            for i, chunk in enumerate(chunks):
+            assigned = set()
+            for i, (chunk, start_line, end_line, chunk_symbol) in enumerate(chunks):
                 if not chunk.strip():
                     continue
                 
+                # Each definition belongs to the first chunk containing its line
+                defined_symbols = []
+                for j, symbol in enumerate(symbols):
+                    if j not in assigned and start_line <= symbol["line"] <= end_line:
+                        assigned.add(j)
+                        defined_symbols.append(f"{symbol['kind']}:{symbol['name']}:{symbol['line']}")
+                
+                # Fingerprint used by the ingestion pipeline to collapse copies of this chunk
+                fingerprint = simhash(chunk, NEAR_DUPLICATE_MIN_TOKENS) if NEAR_DUPLICATE_DETECTION else None
+                
                 # Create metadata
                 metadata = {
                     "file_path": filename,
@@ -54,6 +229,14 @@ class FileParserService:
                     "chunk_index": i,
                     "file_type": Path(filename).suffix.lower(),
                     "file_size": len(text_content),
+                    "start_line": start_line,
+                    "end_line": end_line,
+                    # Byte range of the chunk's lines in the original file, end exclusive
+                    "start_byte": line_starts[start_line - 1],
+                    "end_byte": line_starts[end_line] - 1 if end_line < len(line_starts) else len(content),
+                    "defined_symbols": defined_symbols,
+                    "symbol": chunk_symbol,
+                    "simhash": f"{fingerprint:016x}" if fingerprint is not None else None,
                     **file_info
                 }
                 
@@ -63,6 +246,11 @@ class FileParserService:
                     metadata=metadata
                 )
                 documents.append(doc)
+            clock.lap("fingerprint")
+            
+            if store_source and self.source_store and documents:
+                self._store_source(filename, content, codebase_id)
+                clock.lap("store_source")
             
             logger.info(f"Parsed {filename}: {len(documents)} chunks created")
             return documents
@@ -71,66 +259,49 @@ class FileParserService:
             logger.error(f"Failed to parse {filename}: {str(e)}")
             return []
     
-    def _extract_file_info(self, filename: str, content: str) -> Dict[str, Any]:
-        """Extract structural information from file"""
-        file_ext = Path(filename).suffix.lower()
-        
-        info = {
-            "language": self._detect_language(file_ext),
-            "functions": [],
-            "classes": [],
-            "imports": []
-        }
+    def _store_source(self, filename: str, content: bytes, codebase_id: str):
+        """Keep the file for the file range endpoint; its chunks are usable without it"""
+        try:
+            self.source_store.put(codebase_id, filename, content)
+        except Exception as e:
+            logger.error(f"Failed to store source of {filename}: {str(e)}")
+    
+    def _split_with_lines(
+        self,
+        content: str,
+        line_map: List[int],
+        file_ext: str,
+        definitions: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Tuple[str, int, int, Optional[str]]]:
+        """Split content into chunks with the original first and last line of each, and their symbol"""
+        if self.code_chunker:
+            chunks = self.code_chunker.split(content, file_ext, definitions)
+            if chunks is not None:
+                return [
+                    (chunk, line_map[start_line - 1], line_map[end_line - 1], symbol)
+                    for chunk, start_line, end_line, symbol in chunks
+                ]
         
-        # Extract functions and classes based on language
-        if file_ext in ['.py', '.js', '.jsx', '.ts', '.tsx']:
-            functions, classes = extract_functions_and_classes(content, file_ext)
-            info["functions"] = functions
-            info["classes"] = classes
+        chunks = self.text_splitter.split_text(content)
+        line_starts = [0] + [match.end() for match in re.finditer('\n', content)]
         
-        # Extract imports/includes
-        info["imports"] = self._extract_imports(content, file_ext)
+        result = []
+        search_from = 0
+        for chunk in chunks:
+            # Chunks appear in order but overlap, so search just past the previous start
+            start = content.find(chunk, search_from)
+            if start < 0:
+                start = search_from
+            else:
+                search_from = start + 1
+            end = max(start, start + len(chunk) - 1)
+            
+            start_line = bisect_right(line_starts, start)
+            end_line = bisect_right(line_starts, min(end, len(content) - 1))
+            result.append((chunk, line_map[start_line - 1], line_map[end_line - 1], None))
         
-        return info
+        return result
     
     def _detect_language(self, file_ext: str) -> str:
         """Detect programming language from file extension"""
-        language_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.jsx': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.c': 'c',
-            '.h': 'c',
-            '.cs': 'csharp',
-            '.php': 'php',
-            '.rb': 'ruby',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-        }
-        return language_map.get(file_ext, 'text')
-    
-    def _extract_imports(self, content: str, file_ext: str) -> List[str]:
-        """Extract import statements from code"""
-        imports = []
-        lines = content.split('\n')
-        
-        for line in lines[:50]:  # Check first 50 lines
-            line = line.strip()
-            
-            if file_ext == '.py':
-                if line.startswith('import ') or line.startswith('from '):
-                    imports.append(line)
-            elif file_ext in ['.js', '.jsx', '.ts', '.tsx']:
-                if line.startswith('import ') or line.startswith('const ') or line.startswith('require('):
-                    imports.append(line)
-            elif file_ext == '.java':
-                if line.startswith('import '):
-                    imports.append(line)
-        
-        return imports[:10]  # Limit to first 10 imports
\ No newline at end of file
+        return EXTENSION_LANGUAGES.get(file_ext, 'text')
@@ -0,0 +1,73 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+class IndexStore:
+    """Loads, caches and persists one index per codebase as a JSON file.
+
+    ``index_cls`` must provide ``to_dict()`` and a ``from_dict()`` classmethod,
+    and be constructible without arguments for codebases with no index yet.
+    Indexes are reloaded when their file is rewritten by another process, such
+    as an ingestion worker.
+    """
+
+    def __init__(self, index_dir: Path, index_cls: Type):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.index_cls = index_cls
+        self.indexes: Dict[str, Any] = {}
+        # Modification time of each index file when it was last loaded or saved
+        self.mtimes: Dict[str, Optional[int]] = {}
+
+    def get(self, codebase_id: str):
+        """Return the codebase's index, loading it from disk on first use or after it changed there"""
+        mtime = self._mtime(codebase_id)
+        index = self.indexes.get(codebase_id)
+        if index is None or mtime != self.mtimes.get(codebase_id):
+            index = self._load(codebase_id) or self.index_cls()
+            self.indexes[codebase_id] = index
+            self.mtimes[codebase_id] = mtime
+        return index
+
+    def save(self, codebase_id: str):
+        """Write the codebase's index to disk"""
+        index = self.indexes.get(codebase_id)
+        if index is None:
+            return
+
+        path = self._path(codebase_id)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index.to_dict(), f)
+        tmp_path.replace(path)
+        self.mtimes[codebase_id] = self._mtime(codebase_id)
+
+    def delete(self, codebase_id: str):
+        """Forget the codebase's index in memory and on disk"""
+        self.indexes.pop(codebase_id, None)
+        self.mtimes.pop(codebase_id, None)
+        self._path(codebase_id).unlink(missing_ok=True)
+
+    def _load(self, codebase_id: str) -> Optional[Any]:
+        path = self._path(codebase_id)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                return self.index_cls.from_dict(json.load(f))
+        except Exception as e:
+            logger.error(f"Failed to load {self.index_cls.__name__} for {codebase_id}: {str(e)}")
+            return None
+
+    def _mtime(self, codebase_id: str) -> Optional[int]:
+        try:
+            return self._path(codebase_id).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _path(self, codebase_id: str) -> Path:
+        return self.index_dir / f"{codebase_id}.json"
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple, Union
+from langchain_core.documents import Document
+
+from config import EMBED_BATCH_SIZE, INGEST_QUEUE_SIZE, NEAR_DUPLICATE_DETECTION, NEAR_DUPLICATE_MAX_DISTANCE
+from services.file_parser import FileParserService
+from services.vector_db import VectorDBService
+from utils.near_duplicates import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+class IngestionPipeline:
+    """Streaming parse -> embed -> store pipeline for one ingestion run.
+
+    Stages run concurrently and hand batches of chunks to each other through
+    bounded queues, so embedding starts as soon as the first files are parsed
+    and memory use does not grow with the size of the upload.
+    """
+
+    def __init__(
+        self,
+        file_parser: FileParserService,
+        vector_db: VectorDBService,
+        batch_size: int = EMBED_BATCH_SIZE,
+        queue_size: int = INGEST_QUEUE_SIZE
+    ):
+        self.file_parser = file_parser
+        self.vector_db = vector_db
+        self.batch_size = batch_size
+        self.embed_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.store_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.stats = {
+            "processed_files": 0,
+            "parsed_chunks": 0,
+            "stored_chunks": 0,
+            "duplicates_collapsed": 0,
+            "cache_hits": 0,
+            "cache_misses": 0
+        }
+        # Chunks of this run that other files' copies were collapsed into
+        self.duplicate_index = NearDuplicateIndex(NEAR_DUPLICATE_MAX_DISTANCE) if NEAR_DUPLICATE_DETECTION else None
+        self.representatives: List[Tuple[str, int]] = []
+        self.duplicate_paths: Dict[int, List[str]] = {}
+        # Copies are indexed under their own paths as soon as their representative
+        # is stored; until then they wait here, which only spans the chunks in flight
+        self.unstored: Dict[Tuple[str, int], int] = {}
+        self.stored_ids: Dict[int, str] = {}
+        self.waiting_copies: Dict[int, List[Document]] = {}
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Number of batches waiting in front of each stage"""
+        return {
+            "embed": self.embed_queue.qsize(),
+            "store": self.store_queue.qsize()
+        }
+
+    async def run(
+        self,
+        codebase_id: str,
+        sources: AsyncIterator[Tuple[str, Union[bytes, Path]]],
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        total_files: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Ingest (filename, content) pairs into the codebase and return run statistics"""
+        tasks = [
+            asyncio.ensure_future(self._parse_stage(codebase_id, sources, on_progress, total_files)),
+            asyncio.ensure_future(self._embed_stage()),
+            asyncio.ensure_future(self._store_stage(codebase_id))
+        ]
+
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            # A failed stage would leave its neighbours blocked on a queue
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        if self.duplicate_paths:
+            await self.vector_db.record_duplicates(codebase_id, {
+                self.representatives[key]: paths for key, paths in self.duplicate_paths.items()
+            })
+        await self.vector_db.finalize_codebase(codebase_id)
+
+        lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+        self.stats["cache_hit_rate"] = round(self.stats["cache_hits"] / lookups, 4) if lookups else 0.0
+
+        logger.info(
+            f"Ingested {self.stats['processed_files']} files into codebase {codebase_id}: "
+            f"{self.stats['stored_chunks']} chunks stored, {self.stats['duplicates_collapsed']} duplicates collapsed"
+        )
+        return self.stats
+
+    async def _parse_stage(
+        self,
+        codebase_id: str,
+        sources: AsyncIterator[Tuple[str, Union[bytes, Path]]],
+        on_progress: Optional[Callable[[Dict[str, Any]], None]],
+        total_files: Optional[int] = None
+    ):
+        """Parse files and emit fixed-size batches of chunks"""
+        pending: List[Document] = []
+
+        async for file_count, documents in self.file_parser.parse_stream(
+            sources, codebase_id, store_source=True, total_files=total_files
+        ):
+            self.stats["processed_files"] += file_count
+            self.stats["parsed_chunks"] += len(documents)
+            unique, copies = self._collapse_duplicates(documents)
+            pending.extend(unique)
+            if copies:
+                await self.vector_db.index_copies(codebase_id, copies)
+
+            while len(pending) >= self.batch_size:
+                await self.embed_queue.put(pending[:self.batch_size])
+                pending = pending[self.batch_size:]
+
+            if on_progress:
+                on_progress(self.stats)
+
+        if pending:
+            await self.embed_queue.put(pending)
+        await self.embed_queue.put(_DONE)
+
+    def _collapse_duplicates(self, documents: List[Document]) -> Tuple[List[Document], List[Tuple[str, Document]]]:
+        """Drop chunks that copy a chunk of another file seen earlier in this run.
+
+        The copy's file path is recorded on the chunk that is kept. Returns the
+        chunks to embed and the (stored chunk id, copy) pairs that can be indexed
+        now; copies of chunks not stored yet are indexed by the store stage. Runs
+        do not see each other's chunks, so re-indexed files are only compared
+        among themselves.
+        """
+        if self.duplicate_index is None:
+            return documents, []
+
+        unique = []
+        copies = []
+        for doc in documents:
+            fingerprint = doc.metadata.get("simhash")
+            if not fingerprint:
+                unique.append(doc)
+                continue
+
+            fingerprint = int(fingerprint, 16)
+            file_path = doc.metadata["file_path"]
+            # Similar chunks within one file are kept, each has its own lines
+            original = next(
+                (key for key in self.duplicate_index.find(fingerprint) if self.representatives[key][0] != file_path),
+                None
+            )
+            if original is None:
+                self.duplicate_index.add(fingerprint)
+                self.unstored[(file_path, doc.metadata["chunk_index"])] = len(self.representatives)
+                self.representatives.append((file_path, doc.metadata["chunk_index"]))
+                unique.append(doc)
+                continue
+
+            paths = self.duplicate_paths.setdefault(original, [])
+            if file_path not in paths:
+                paths.append(file_path)
+            if original in self.stored_ids:
+                copies.append((self.stored_ids[original], doc))
+            else:
+                self.waiting_copies.setdefault(original, []).append(doc)
+            self.stats["duplicates_collapsed"] += 1
+
+        return unique, copies
+
+    async def _embed_stage(self):
+        """Embed chunk batches, serving repeated chunks from the embedding cache"""
+        while True:
+            batch = await self.embed_queue.get()
+            if batch is _DONE:
+                break
+
+            documents, embeddings, hits = await self.vector_db.embed_documents(batch)
+            self.stats["cache_hits"] += hits
+            self.stats["cache_misses"] += len(documents) - hits
+
+            await self.store_queue.put((documents, embeddings))
+
+        await self.store_queue.put(_DONE)
+
+    async def _store_stage(self, codebase_id: str):
+        """Insert embedded batches into the vector database"""
+        while True:
+            item = await self.store_queue.get()
+            if item is _DONE:
+                break
+
+            documents, embeddings = item
+            ids = await self.vector_db.store_embeddings(codebase_id, documents, embeddings)
+            self.stats["stored_chunks"] += len(documents)
+            if self.duplicate_index is None:
+                continue
+
+            # Symbols and terms of copies stay findable under their own paths
+            copies = []
+            for doc_id, doc in zip(ids, documents):
+                key = self.unstored.pop((doc.metadata["file_path"], doc.metadata["chunk_index"]), None)
+                if key is None:
+                    continue
+                self.stored_ids[key] = doc_id
+                copies.extend((doc_id, copy) for copy in self.waiting_copies.pop(key, []))
+            if copies:
+                await self.vector_db.index_copies(codebase_id, copies)
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import shutil
+from pathlib import Path
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple, Union
+import aiofiles
+
+from services.file_parser import FileParserService
+from services.vector_db import VectorDBService
+from services.ingestion import IngestionPipeline
+from services.codebase_registry import CodebaseRegistry
+from services.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+def cache_stats_from(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Embedding cache counters of an ingestion run, as shown in the codebase status"""
+    return {
+        "hits": stats["cache_hits"],
+        "misses": stats["cache_misses"],
+        "hit_rate": stats["cache_hit_rate"]
+    }
+
+async def read_spooled_files(
+    spool_dir: Path,
+    filenames: List[str],
+    paths: Optional[List[str]] = None
+) -> AsyncIterator[Tuple[str, bytes]]:
+    """Yield (filename, content) for files spooled to disk by the API.
+
+    ``paths`` locates each file inside spool_dir; by default the files are
+    named after their position.
+    """
+    if paths is None:
+        paths = [f"{position:06d}" for position in range(len(filenames))]
+
+    for filename, path in zip(filenames, paths):
+        try:
+            async with aiofiles.open(Path(spool_dir) / path, "rb") as f:
+                yield filename, await f.read()
+        except Exception as e:
+            logger.error(f"Failed to read spooled file {filename}: {str(e)}")
+
+def remove_spooled_files(payload: Dict[str, Any]):
+    """Remove the spooled copy of a job's files; server-local directories belong to the caller"""
+    if "spool_dir" in payload:
+        shutil.rmtree(payload["spool_dir"], ignore_errors=True)
+
+async def read_local_files(root: Path, filenames: List[str]) -> AsyncIterator[Tuple[str, Path]]:
+    """Yield (filename, path) for files of a server-local directory; parse workers read them"""
+    for filename in filenames:
+        yield filename, Path(root) / filename
+
+class IngestionJobRunner:
+    """Runs upload and re-index jobs and records their progress in the codebase registry.
+
+    The API uses it directly in ``inprocess`` mode; worker processes use it to
+    execute jobs taken from the job queue.
+    """
+
+    def __init__(
+        self,
+        file_parser: FileParserService,
+        vector_db: VectorDBService,
+        codebase_registry: CodebaseRegistry,
+        response_cache: Optional[ResponseCache] = None
+    ):
+        self.file_parser = file_parser
+        self.vector_db = vector_db
+        self.codebase_registry = codebase_registry
+        self.response_cache = response_cache
+        # Ingestion pipelines currently running in this process, by codebase id
+        self.active_pipelines: Dict[str, IngestionPipeline] = {}
+
+    def index_changed(self, codebase_id: str):
+        """Make every process treat cached results for the codebase as stale"""
+        version = self.codebase_registry.bump_index_version(codebase_id)
+        if self.response_cache:
+            self.response_cache.invalidate(codebase_id, version)
+
+    async def run_job(self, job: Dict[str, Any], retryable: bool = False):
+        """Execute a job over files on disk, removing them afterwards if they were spooled.
+
+        A retryable job raises when it fails and keeps its spooled files for the
+        next attempt; the caller removes them once it gives up on the job.
+        """
+        payload = job["payload"]
+        status = self.codebase_registry.get(job["codebase_id"])
+        if status:
+            # Another worker may have recreated the collection since this one last used it
+            self.vector_db.sync_index_version(job["codebase_id"], status["index_version"])
+        if "source_dir" in payload:
+            sources = read_local_files(payload["source_dir"], payload["files"])
+        else:
+            sources = read_spooled_files(payload["spool_dir"], payload["files"], payload.get("paths"))
+
+        try:
+            if job["kind"] == "upload":
+                # A retried upload may have stored some chunks before its worker died
+                await self.process_upload(
+                    job["codebase_id"], sources, len(payload["files"]),
+                    retry=job["attempts"] > 1, raise_errors=retryable
+                )
+            elif job["kind"] == "reindex":
+                await self.reindex(
+                    job["codebase_id"], sources, payload["files"], payload["deleted_files"],
+                    raise_errors=retryable
+                )
+            else:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+        except Exception:
+            if not retryable:
+                remove_spooled_files(payload)
+            raise
+        remove_spooled_files(payload)
+
+    async def ingest(
+        self,
+        codebase_id: str,
+        sources: AsyncIterator[Tuple[str, Union[bytes, Path]]],
+        total_files: int
+    ) -> Dict[str, Any]:
+        """Run the streaming ingestion pipeline, reporting progress in the codebase status"""
+        pipeline = IngestionPipeline(self.file_parser, self.vector_db)
+        self.active_pipelines[codebase_id] = pipeline
+
+        def on_progress(stats: Dict[str, Any]):
+            self.codebase_registry.update(codebase_id, {
+                "processed_files": stats["processed_files"],
+                "message": f"Processed {stats['processed_files']}/{total_files} files..."
+            })
+
+        try:
+            return await pipeline.run(codebase_id, sources, on_progress, total_files)
+        finally:
+            self.active_pipelines.pop(codebase_id, None)
+
+    async def process_upload(
+        self,
+        codebase_id: str,
+        sources: AsyncIterator[Tuple[str, Union[bytes, Path]]],
+        total_files: int,
+        retry: bool = False,
+        raise_errors: bool = False
+    ):
+        """Index a newly uploaded codebase"""
+        try:
+            self.codebase_registry.update(codebase_id, {"message": "Parsing files..."})
+
+            if retry:
+                await self.vector_db.delete_codebase(codebase_id)
+                if self.file_parser.source_store:
+                    await asyncio.to_thread(self.file_parser.source_store.delete, codebase_id)
+
+            # Parse, embed and store files as a stream
+            stats = await self.ingest(codebase_id, sources, total_files)
+            processed_count = stats["processed_files"]
+
+            if not stats["stored_chunks"]:
+                self.codebase_registry.update(codebase_id, {
+                    "status": "error",
+                    "message": "No documents could be processed"
+                })
+                return
+
+            # Update final status
+            self.index_changed(codebase_id)
+            self.codebase_registry.update(codebase_id, {
+                "status": "completed",
+                "processed_files": processed_count,
+                "chunk_count": stats["stored_chunks"],
+                "duplicates_collapsed": stats["duplicates_collapsed"],
+                "embedding_cache": cache_stats_from(stats),
+                "message": f"Successfully processed {processed_count} files"
+            })
+
+            logger.info(f"Codebase {codebase_id} processed successfully")
+
+        except Exception as e:
+            logger.error(f"Background processing failed: {str(e)}")
+            self.codebase_registry.update(codebase_id, {
+                "status": "error",
+                "message": f"Processing failed: {str(e)}"
+            })
+            if raise_errors:
+                raise
+
+    async def reindex(
+        self,
+        codebase_id: str,
+        sources: AsyncIterator[Tuple[str, Union[bytes, Path]]],
+        changed_files: List[str],
+        deleted_files: List[str],
+        raise_errors: bool = False
+    ):
+        """Replace the chunks of changed files"""
+        previous_total = self.codebase_registry.get(codebase_id)["total_files"]
+
+        try:
+            # Added files have no chunks yet, modified and deleted ones lose their stale chunks
+            stale_paths = list(dict.fromkeys(changed_files + deleted_files))
+            removed = set(await self.vector_db.delete_files(codebase_id, stale_paths))
+            # Changed files are stored again as they are parsed
+            if self.file_parser.source_store:
+                await asyncio.to_thread(self.file_parser.source_store.delete_files, codebase_id, deleted_files)
+
+            stats = await self.ingest(codebase_id, sources, len(changed_files))
+
+            self.index_changed(codebase_id)
+
+            added = sum(1 for path in changed_files if path not in removed)
+            deleted = sum(1 for path in set(deleted_files) if path in removed)
+
+            self.codebase_registry.update(codebase_id, {
+                "status": "completed",
+                "total_files": previous_total + added - deleted,
+                "chunk_count": await self.vector_db.chunk_count(codebase_id),
+                # Counted over the whole codebase, as this run only saw the changed files
+                "duplicates_collapsed": await self.vector_db.duplicate_count(codebase_id),
+                "embedding_cache": cache_stats_from(stats),
+                "message": (
+                    f"Re-indexed {stats['processed_files']} files "
+                    f"({added} added, {len(changed_files) - added} modified, {deleted} deleted)"
+                )
+            })
+
+            logger.info(f"Codebase {codebase_id} re-indexed successfully")
+
+        except Exception as e:
+            logger.error(f"Re-indexing failed: {str(e)}")
+            self.codebase_registry.update(codebase_id, {
+                "status": "error",
+                "message": f"Re-indexing failed: {str(e)}"
+            })
+            if raise_errors:
+                raise
@@ -0,0 +1,130 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from config import JOB_QUEUE_DB_PATH, JOB_LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """Durable FIFO of ingestion jobs shared by the API and worker processes.
+
+    A worker claims a job by taking a lease on it and renews the lease while it
+    runs. If the worker dies, the lease expires and another worker picks the job
+    up again. Only one job per codebase runs at a time.
+    """
+
+    def __init__(self, db_path: Path = JOB_QUEUE_DB_PATH, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(db_path)
+        # Autocommit mode, so claims can run in explicit IMMEDIATE transactions
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                codebase_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                lease_expires_at REAL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id)")
+
+    def enqueue(self, codebase_id: str, kind: str, payload: Dict[str, Any]) -> int:
+        """Add a job and return its id"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (codebase_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                (codebase_id, kind, json.dumps(payload), time.time())
+            )
+        logger.info(f"Queued {kind} job {cursor.lastrowid} for codebase {codebase_id}")
+        return cursor.lastrowid
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the oldest runnable job to a worker, or return None if there is none"""
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two workers never claim the same job
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    """SELECT * FROM jobs
+                       WHERE (status = 'queued' OR (status = 'running' AND lease_expires_at < ?))
+                         AND codebase_id NOT IN (
+                             SELECT codebase_id FROM jobs WHERE status = 'running' AND lease_expires_at >= ?
+                         )
+                       ORDER BY id LIMIT 1""",
+                    (now, now)
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        """UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                           worker_id = ?, lease_expires_at = ? WHERE id = ?""",
+                        (worker_id, now + self.lease_seconds, row["id"])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["attempts"] += 1
+        return job
+
+    def renew_lease(self, job_id: int, worker_id: str) -> bool:
+        """Extend a running job's lease; False if the worker no longer holds it"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int):
+        """Mark a job as finished"""
+        self._finish(job_id, "done", None)
+
+    def fail(self, job_id: int, error: str):
+        """Mark a job as permanently failed"""
+        self._finish(job_id, "failed", error)
+
+    def release(self, job_id: int, error: str):
+        """Put a failed job back in the queue for another attempt"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'queued', error = ?, worker_id = NULL, lease_expires_at = NULL WHERE id = ?",
+                (error, job_id)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+    def _finish(self, job_id: int, status: str, error: Optional[str]):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL, finished_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
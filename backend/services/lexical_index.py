@@ -0,0 +1,200 @@
+import heapq
+import logging
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Tuple, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Identifiers and numbers; identifiers are further split on '_' and camelCase
+_TOKEN_PATTERN = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*|\d+')
+_CAMEL_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+# A query made of one identifier such as process_codebase_files, GROQ_API_KEY or vector_db.search
+_IDENTIFIER_QUERY = re.compile(r'^[A-Za-z_$][\w$]*(?:(?:\.|::)[A-Za-z_$][\w$]*)*$')
+
+def tokenize(text: str) -> List[str]:
+    """Split code or prose into lower-cased terms.
+
+    Each identifier yields itself plus its '_' / camelCase parts, so both
+    ``process_codebase_files`` and ``codebase`` match the same chunk.
+    """
+    terms = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group(0)
+        terms.append(token.lower())
+
+        parts = [part.lower() for piece in token.split('_') for part in _CAMEL_PATTERN.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(part for part in parts if len(part) > 1)
+
+    return terms
+
+def is_identifier_query(query: str) -> bool:
+    """Check whether a query looks like an exact code identifier rather than prose"""
+    query = query.strip()
+    if not _IDENTIFIER_QUERY.match(query):
+        return False
+
+    return (
+        '_' in query
+        or '.' in query
+        or '::' in query
+        or (query.isupper() and len(query) > 1)
+        or re.search(r'[a-z][A-Z]', query) is not None
+    )
+
+class LexicalIndex:
+    """BM25 inverted index over the chunks of one codebase"""
+
+    K1 = 1.2
+    B = 0.75
+    # Extra term frequency given to symbols a chunk defines
+    SYMBOL_BOOST = 3
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_files: Dict[str, str] = {}
+        # First and last source line of each chunk, when known
+        self.doc_spans: Dict[str, List[int]] = {}
+        # Entries indexing a collapsed copy of a stored chunk: entry id -> stored chunk id
+        self.doc_chunks: Dict[str, str] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(
+        self,
+        doc_id: str,
+        file_path: str,
+        text: str,
+        symbols: Iterable[str] = (),
+        span: Optional[Tuple[int, int]] = None,
+        chunk_id: Optional[str] = None
+    ):
+        """Index one chunk, boosting the symbols it contains.
+
+        ``chunk_id`` is given for a copy that is not stored itself: searches
+        matching it return the stored chunk it was collapsed into.
+        """
+        if doc_id in self.doc_lengths:
+            self.remove([doc_id])
+
+        terms = Counter(tokenize(text))
+        for symbol in symbols:
+            term = symbol.lower()
+            if term in terms:
+                terms[term] += self.SYMBOL_BOOST
+
+        for term, freq in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = freq
+
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.doc_files[doc_id] = file_path
+        if span:
+            self.doc_spans[doc_id] = list(span)
+        if chunk_id:
+            self.doc_chunks[doc_id] = chunk_id
+        self.total_length += length
+
+    def remove(self, doc_ids: Iterable[str]):
+        """Remove chunks from the index"""
+        doc_ids = {doc_id for doc_id in doc_ids if doc_id in self.doc_lengths}
+        if not doc_ids:
+            return
+
+        for term in list(self.postings):
+            docs = self.postings[term]
+            for doc_id in doc_ids.intersection(docs):
+                del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+
+        for doc_id in doc_ids:
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            self.doc_files.pop(doc_id, None)
+            self.doc_spans.pop(doc_id, None)
+            self.doc_chunks.pop(doc_id, None)
+
+    def remove_files(self, file_paths: Iterable[str]):
+        """Remove every chunk belonging to the given files"""
+        file_paths = set(file_paths)
+        self.remove([doc_id for doc_id, path in self.doc_files.items() if path in file_paths])
+
+    def file_paths(self) -> List[str]:
+        """Distinct file paths present in the index"""
+        return sorted(set(self.doc_files.values()))
+
+    def chunk_id(self, doc_id: str) -> str:
+        """Id of the stored chunk an entry leads to"""
+        return self.doc_chunks.get(doc_id, doc_id)
+
+    def stored_files(self, file_paths: Set[str]) -> Set[str]:
+        """Paths under which the chunks of the given files are stored, including those they were collapsed into"""
+        stored = set(file_paths)
+        for doc_id, chunk_id in self.doc_chunks.items():
+            if self.doc_files[doc_id] in file_paths and chunk_id in self.doc_files:
+                stored.add(self.doc_files[chunk_id])
+        return stored
+
+    def occurrences(self, term: str) -> List[str]:
+        """Ids of the chunks containing a term"""
+        return list(self.postings.get(term.lower(), {}))
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to k (stored chunk id, bm25 score) pairs, best first"""
+        doc_count = len(self.doc_lengths)
+        if not doc_count:
+            return []
+
+        avg_length = self.total_length / doc_count
+        scores: Dict[str, float] = {}
+
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+
+            # Terms in most chunks carry almost no weight but cost a full scan
+            if len(docs) > doc_count / 2 and doc_count > 100:
+                continue
+
+            idf = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, freq in docs.items():
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.K1 + 1) / (freq + norm)
+
+        if self.doc_chunks:
+            # A stored chunk ranks by its best matching copy
+            best: Dict[str, float] = {}
+            for doc_id, score in scores.items():
+                chunk_id = self.doc_chunks.get(doc_id, doc_id)
+                if score > best.get(chunk_id, 0.0):
+                    best[chunk_id] = score
+            scores = best
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def to_dict(self) -> Dict:
+        return {
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+            "doc_files": self.doc_files,
+            "doc_spans": self.doc_spans,
+            "doc_chunks": self.doc_chunks
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LexicalIndex":
+        index = cls()
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        index.doc_files = data["doc_files"]
+        index.doc_spans = data.get("doc_spans", {})
+        index.doc_chunks = data.get("doc_chunks", {})
+        index.total_length = sum(index.doc_lengths.values())
+        return index
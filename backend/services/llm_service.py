@@ -1,17 +1,62 @@
 import asyncio
+import json
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from groq import Groq
 from langchain_core.documents import Document
 
-from config import GROQ_API_KEY, GROQ_MODEL
+from config import (
+    GROQ_API_KEY,
+    GROQ_MODEL,
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT_SECONDS,
+    LLM_CODE_EXAMPLES_MODE
+)
+from services.metrics import timed_llm_call
 
 logger = logging.getLogger(__name__)
 
+# Prefix of the explanation returned when the LLM call fails
+EXPLANATION_FAILED_PREFIX = "Failed to generate explanation"
+
+# Marks the end of a streamed completion
+_STREAM_END = object()
+
+class ExplanationFailure(str):
+    """Failure message yielded by stream_explanation, distinguishable from the text before it"""
+
 class LLMService:
     def __init__(self):
         self.client = Groq(api_key=GROQ_API_KEY)
         self.model = GROQ_MODEL
+        self.code_examples_mode = LLM_CODE_EXAMPLES_MODE
+        # Bounds Groq calls in flight across all concurrent searches
+        self.semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    
+    async def _complete(self, call: str, messages: List[Dict[str, str]], max_tokens: int, **kwargs) -> str:
+        """Run one chat completion under the concurrency limit and timeout.
+
+        ``call`` names the purpose of the completion in the latency metrics.
+        """
+        async with self.semaphore:
+            try:
+                with timed_llm_call(call):
+                    response = await asyncio.wait_for(
+                        asyncio.to_thread(
+                            self.client.chat.completions.create,
+                            model=self.model,
+                            messages=messages,
+                            temperature=0.1,
+                            max_tokens=max_tokens,
+                            timeout=LLM_TIMEOUT_SECONDS,
+                            **kwargs
+                        ),
+                        timeout=LLM_TIMEOUT_SECONDS
+                    )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"LLM call timed out after {LLM_TIMEOUT_SECONDS}s")
+        return response.choices[0].message.content
     
     async def generate_explanation(
         self, 
@@ -20,16 +65,84 @@ class LLMService:
     ) -> str:
         """Generate AI explanation based on search results"""
         try:
-            # Prepare context from search results
-            context_parts = []
-            for i, doc in enumerate(search_results[:5]):  # Limit to top 5 results
-                file_path = doc.metadata.get("file_path", "Unknown")
-                content = doc.page_content[:800]  # Limit content length
-                context_parts.append(f"File: {file_path}\n{content}\n---")
-            
-            context = "\n".join(context_parts)
+            # Make async call to Groq
+            return await self._complete(
+                "explanation",
+                messages=self._explanation_messages(query, search_results),
+                max_tokens=1024
+            )
             
-            system_prompt = """You are a senior software engineer helping developers understand their codebase. 
+        except Exception as e:
+            logger.error(f"Failed to generate explanation: {str(e)}")
+            return f"{EXPLANATION_FAILED_PREFIX}: {str(e)}. Please try again."
+    
+    async def stream_explanation(
+        self,
+        query: str,
+        search_results: List[Document]
+    ) -> AsyncIterator[str]:
+        """Generate the AI explanation incrementally, yielding text as Groq produces it.
+
+        If the call fails, possibly after some text, the last item is an ExplanationFailure.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        messages = self._explanation_messages(query, search_results)
+        
+        def produce():
+            # The Groq client is synchronous, so the stream is drained on a worker thread
+            try:
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.1,
+                    max_tokens=1024,
+                    timeout=LLM_TIMEOUT_SECONDS,
+                    stream=True
+                )
+                for chunk in stream:
+                    if stop.is_set():
+                        break
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        loop.call_soon_threadsafe(queue.put_nowait, delta)
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+        
+        async with self.semaphore:
+            producer = asyncio.ensure_future(asyncio.to_thread(produce))
+            try:
+                with timed_llm_call("explanation_stream"):
+                    while True:
+                        item = await asyncio.wait_for(queue.get(), timeout=LLM_TIMEOUT_SECONDS)
+                        if item is _STREAM_END:
+                            break
+                        if isinstance(item, Exception):
+                            raise item
+                        yield item
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    e = TimeoutError(f"LLM stream stalled for {LLM_TIMEOUT_SECONDS}s")
+                logger.error(f"Failed to stream explanation: {str(e)}")
+                yield ExplanationFailure(f"{EXPLANATION_FAILED_PREFIX}: {str(e)}. Please try again.")
+            finally:
+                stop.set()
+                producer.cancel()
+    
+    def _explanation_messages(self, query: str, search_results: List[Document]) -> List[Dict[str, str]]:
+        """Build the chat messages asking for an explanation of the search results"""
+        # Prepare context from search results
+        context_parts = []
+        for i, doc in enumerate(search_results[:5]):  # Limit to top 5 results
+            file_path = doc.metadata.get("file_path", "Unknown")
+            content = doc.page_content[:800]  # Limit content length
+            context_parts.append(f"File: {file_path}\n{content}\n---")
+        
+        context = "\n".join(context_parts)
+        
+        system_prompt = """You are a senior software engineer helping developers understand their codebase. 
 You will be given a query about a codebase and relevant code snippets. 
 Your task is to provide a clear, comprehensive explanation that answers the query.
 
@@ -42,31 +155,18 @@ Guidelines:
 6. If the code shows security considerations, highlight them
 7. Format your response clearly with proper structure
 8. Be concise but thorough"""
-            
-            user_prompt = f"""Query: {query}
+        
+        user_prompt = f"""Query: {query}
 
 Relevant Code:
 {context}
 
 Please provide a comprehensive explanation that answers the query based on the provided code snippets."""
-            
-            # Make async call to Groq
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1024
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            logger.error(f"Failed to generate explanation: {str(e)}")
-            return f"Failed to generate explanation: {str(e)}. Please try again."
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
     
     async def extract_code_examples(
         self, 
@@ -75,32 +175,84 @@ Please provide a comprehensive explanation that answers the query based on the p
     ) -> List[Dict[str, Any]]:
         """Extract relevant code examples from search results"""
         try:
-            code_examples = []
+            snippets = self._select_snippets(search_results)
+            if not snippets:
+                return []
             
-            # Look for specific code patterns
-            for doc in search_results[:3]:
-                content = doc.page_content
-                file_path = doc.metadata.get("file_path", "")
-                
-                # Try to extract meaningful code blocks
-                if self._looks_like_function(content):
-                    # Use Groq to generate a better explanation for this code
-                    explanation = await self._generate_code_explanation(content, query)
-                    
-                    example = {
-                        "title": f"Code from {file_path}",
-                        "code": content[:500],
-                        "file_path": file_path,
-                        "explanation": explanation
-                    }
-                    code_examples.append(example)
+            # Use Groq to generate a better explanation for each snippet, all at once
+            if self.code_examples_mode == "batched":
+                explanations = await self._generate_code_explanations_batched(
+                    [content for _, content in snippets],
+                    query
+                )
+            else:
+                explanations = await asyncio.gather(*[
+                    self._generate_code_explanation(content, query)
+                    for _, content in snippets
+                ])
             
-            return code_examples[:3]  # Limit to 3 examples
+            return [
+                self._build_code_example(file_path, content, explanation)
+                for (file_path, content), explanation in zip(snippets, explanations)
+            ]
             
         except Exception as e:
             logger.error(f"Failed to extract code examples: {str(e)}")
             return []
     
+    async def iter_code_examples(
+        self,
+        query: str,
+        search_results: List[Document]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield code examples one by one, as soon as each explanation is ready"""
+        snippets = self._select_snippets(search_results)
+        if not snippets:
+            return
+        
+        if self.code_examples_mode == "batched":
+            explanations = await self._generate_code_explanations_batched(
+                [content for _, content in snippets],
+                query
+            )
+            for (file_path, content), explanation in zip(snippets, explanations):
+                yield self._build_code_example(file_path, content, explanation)
+            return
+        
+        async def explain(file_path: str, content: str):
+            explanation = await self._generate_code_explanation(content, query)
+            return self._build_code_example(file_path, content, explanation)
+        
+        tasks = [asyncio.ensure_future(explain(file_path, content)) for file_path, content in snippets]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _select_snippets(self, search_results: List[Document]) -> List[Tuple[str, str]]:
+        """Pick up to 3 (file_path, content) pairs that look like code"""
+        snippets = []
+        
+        # Look for specific code patterns
+        for doc in search_results[:3]:
+            content = doc.page_content
+            
+            # Try to extract meaningful code blocks
+            if self._looks_like_function(content):
+                snippets.append((doc.metadata.get("file_path", ""), content))
+        
+        return snippets
+    
+    def _build_code_example(self, file_path: str, content: str, explanation: str) -> Dict[str, Any]:
+        return {
+            "title": f"Code from {file_path}",
+            "code": content[:500],
+            "file_path": file_path,
+            "explanation": explanation
+        }
+    
     async def _generate_code_explanation(self, code: str, query: str) -> str:
         """Generate explanation for a specific code snippet"""
         try:
@@ -111,22 +263,67 @@ Code:
 
 Provide a brief, technical explanation of what this code does and how it relates to the query."""
 
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model=self.model,
+            return await self._complete(
+                "code_example",
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.1,
                 max_tokens=200
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             logger.error(f"Failed to generate code explanation: {str(e)}")
             return f"Code section from file"
     
+    async def _generate_code_explanations_batched(self, codes: List[str], query: str) -> List[str]:
+        """Explain several snippets with a single structured-output request"""
+        fallback = ["Code section from file"] * len(codes)
+        try:
+            snippets = "\n\n".join(
+                f"Snippet {i}:\n{code[:400]}" for i, code in enumerate(codes, start=1)
+            )
+            prompt = f"""Explain each code snippet below in the context of the query: "{query}"
+
+{snippets}
+
+For each snippet, provide a brief, technical explanation of what the code does and how it relates to the query.
+Respond with a JSON object of the form {{"explanations": ["<snippet 1 explanation>", ...]}} containing exactly {len(codes)} strings in snippet order."""
+
+            content = await self._complete(
+                "code_examples_batched",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=200 * len(codes),
+                response_format={"type": "json_object"}
+            )
+            
+            explanations = self._parse_explanations(content)
+            if explanations is None:
+                logger.warning("Batched code explanation response was not valid JSON")
+                return fallback
+            
+            # Pad or trim so every snippet gets exactly one explanation
+            return [
+                str(explanations[i]) if i < len(explanations) and explanations[i] else fallback[i]
+                for i in range(len(codes))
+            ]
+            
+        except Exception as e:
+            logger.error(f"Failed to generate batched code explanations: {str(e)}")
+            return fallback
+    
+    def _parse_explanations(self, content: str) -> Optional[List[Any]]:
+        """Pull the explanations list out of a JSON completion"""
+        try:
+            data = json.loads(content)
+        except (TypeError, ValueError):
+            return None
+        
+        if isinstance(data, dict):
+            data = data.get("explanations")
+        return data if isinstance(data, list) else None
+    
     def _looks_like_function(self, content: str) -> bool:
         """Check if content contains function-like code"""
         function_indicators = [
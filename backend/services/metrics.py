@@ -0,0 +1,118 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Optional, Tuple
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    CONTENT_TYPE_LATEST,
+    generate_latest,
+    multiprocess
+)
+
+# Per-file parse stages take well under a millisecond, LLM calls take seconds
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    "codebase_stage_duration_seconds",
+    "Time spent in one ingestion or search stage",
+    ["stage", "codebase", "language"],
+    buckets=STAGE_BUCKETS
+)
+STAGE_ITEMS = Counter(
+    "codebase_stage_items_total",
+    "Files, chunks or queries handled by an ingestion or search stage",
+    ["stage", "codebase", "language"]
+)
+LLM_CALL_SECONDS = Histogram(
+    "codebase_llm_call_duration_seconds",
+    "Duration of Groq chat completions",
+    ["call", "outcome"],
+    buckets=LLM_BUCKETS
+)
+
+# Stage durations of the request being handled, reported in its Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def observe_stage(stage: str, seconds: float, codebase_id: str = "", language: str = "", items: int = 1):
+    """Record one run of a stage, and add it to the current request's timings"""
+    STAGE_SECONDS.labels(stage, codebase_id, language).observe(seconds)
+    STAGE_ITEMS.labels(stage, codebase_id, language).inc(items)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def timed_stage(stage: str, codebase_id: str = "", language: str = "", items: int = 1):
+    """Time the enclosed block as one run of a stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started, codebase_id, language, items)
+
+@contextmanager
+def request_timings():
+    """Collect the stage durations of everything run inside the block, across awaits and threads"""
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    started = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings["total"] = time.perf_counter() - started
+        _request_timings.reset(token)
+
+def server_timing_header(timings: Dict[str, float], description: Optional[Dict[str, str]] = None) -> str:
+    """Format stage durations as a Server-Timing header value"""
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    entries.extend(f'{name};desc="{value}"' for name, value in (description or {}).items())
+    return ", ".join(entries)
+
+@contextmanager
+def timed_llm_call(call: str):
+    """Time one Groq call, labelled by its purpose and whether it succeeded"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        LLM_CALL_SECONDS.labels(call, outcome).observe(time.perf_counter() - started)
+
+class StageClock:
+    """Measures consecutive stages of one file's processing without touching the metrics.
+
+    Parse workers run in other processes, so they collect (stage, language,
+    seconds) tuples that the parent records with ``observe_stage``.
+    """
+
+    def __init__(self, timings: Optional[List[Tuple[str, str, float]]], language: str):
+        self.timings = timings
+        self.language = language
+        self.started = time.perf_counter()
+
+    def lap(self, stage: str):
+        """Close the current stage and start the next one"""
+        now = time.perf_counter()
+        if self.timings is not None:
+            self.timings.append((stage, self.language, now - self.started))
+        self.started = now
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, and its content type.
+
+    When PROMETHEUS_MULTIPROC_DIR is set (several API or worker processes),
+    the values of all processes are aggregated.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
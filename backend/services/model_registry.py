@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+from typing import Dict, Any, List
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from config import EMBEDDING_MODEL, EMBEDDING_ENGINE
+from utils.process_utils import get_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_ENGINES = ("torch", "onnx", "onnx-int8")
+
+def embedding_model_id(model_name: str = EMBEDDING_MODEL, engine: str = EMBEDDING_ENGINE) -> str:
+    """Name for the vectors a model produces on an engine; PyTorch keeps the bare model name"""
+    return model_name if engine == "torch" else f"{model_name}@{engine}"
+
+class ModelRegistry:
+    """Process-wide registry that loads each embedding model once per engine, on first use"""
+
+    def __init__(self):
+        self._models: Dict[str, Embeddings] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_embeddings(self, model_name: str = EMBEDDING_MODEL, engine: str = EMBEDDING_ENGINE) -> Embeddings:
+        """Return the shared embedding model, loading it if needed"""
+        model_id = embedding_model_id(model_name, engine)
+        model = self._models.get(model_id)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if model_id not in self._models:
+                self._models[model_id] = self._load(model_name, engine)
+            return self._models[model_id]
+
+    def embeddings(self, model_name: str = EMBEDDING_MODEL, engine: str = EMBEDDING_ENGINE) -> Embeddings:
+        """Return a lightweight handle that loads the model on its first embed call"""
+        return SharedEmbeddings(self, model_name, engine)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load time and memory cost of every model loaded so far"""
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def _load(self, model_name: str, engine: str) -> Embeddings:
+        if engine not in EMBEDDING_ENGINES:
+            raise ValueError(f"Unknown embedding engine {engine}, expected one of {', '.join(EMBEDDING_ENGINES)}")
+
+        model_id = embedding_model_id(model_name, engine)
+        logger.info(f"Loading embedding model {model_id}...")
+        rss_before = get_rss_bytes()
+        started = time.perf_counter()
+
+        if engine == "torch":
+            model = HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs={'device': 'cpu'},
+                encode_kwargs={'normalize_embeddings': True}
+            )
+        else:
+            from services.onnx_embeddings import OnnxEmbeddings
+
+            model = OnnxEmbeddings(model_name, quantized=engine == "onnx-int8")
+
+        load_seconds = time.perf_counter() - started
+        rss_after = get_rss_bytes()
+        self._stats[model_id] = {
+            "load_seconds": round(load_seconds, 3),
+            "rss_delta_bytes": rss_after - rss_before,
+            "rss_after_load_bytes": rss_after,
+            "loaded_at": time.time()
+        }
+
+        logger.info(
+            f"Loaded {model_id} in {load_seconds:.2f}s "
+            f"(+{(rss_after - rss_before) / (1024 * 1024):.1f}MB resident)"
+        )
+        return model
+
+class SharedEmbeddings(Embeddings):
+    """Embeddings handle that delegates to the registry's shared model instance"""
+
+    def __init__(self, registry: ModelRegistry, model_name: str, engine: str = EMBEDDING_ENGINE):
+        self.registry = registry
+        self.model_name = model_name
+        self.engine = engine
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.registry.get_embeddings(self.model_name, self.engine).embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.registry.get_embeddings(self.model_name, self.engine).embed_query(text)
+
+# Shared by every service in this process
+model_registry = ModelRegistry()
@@ -0,0 +1,409 @@
+import json
+import logging
+import shutil
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Operators of Chroma metadata filters and how to evaluate them
+_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+}
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma metadata filter against one chunk's metadata"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if key not in metadata and next(iter(condition)) not in ("$ne", "$nin"):
+                return False
+            if not all(_OPERATORS[operator](value, operand) for operator, operand in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class NumpyCollection:
+    """Exact vector index of one codebase: a matrix of normalized embeddings.
+
+    Implements the part of Chroma's collection API that ``VectorDBService``
+    uses. Queries are one matrix multiply plus ``argpartition`` and return
+    squared L2 distances (``2 - 2 * cosine``), the same as Chroma's default
+    space for normalized embeddings. Vectors live in a memory-mapped raw float32
+    file and records in a SQLite sidecar, in matrix row order. Ids and metadata
+    are loaded on open; texts stay on disk until a result needs them.
+    ``persist()`` writes only the records changed since the last call and
+    appends added vectors to the file, which is only rewritten after deletes.
+    Indexes changed by another process are reloaded.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.path / "records.sqlite3"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.ids: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.vectors: Optional[np.ndarray] = None
+        # Raw float32 rows; the sidecar holds the file name and row width, its record count the row count
+        self._vectors_name: Optional[str] = None
+        self._dim = 0
+        # Vectors added since the matrix was last assembled
+        self._appended: List[np.ndarray] = []
+        # Records changed since the last persist; texts of added ones are held until then
+        self._added: Dict[str, str] = {}
+        self._deleted: Set[str] = set()
+        self._updated: Set[str] = set()
+        self._dirty = False
+        # Identity and SQLite data_version of the sidecar as last loaded
+        self._inode: Optional[int] = None
+        self._data_version: Optional[int] = None
+        self._load()
+
+    def count(self) -> int:
+        with self._lock:
+            self._reload_if_changed()
+            return len(self.ids)
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        documents: Optional[List[str]] = None
+    ):
+        with self._lock:
+            self._reload_if_changed()
+            documents = documents or [""] * len(ids)
+            metadatas = metadatas or [None] * len(ids)
+            # Like Chroma, ids already in the collection are left as they are
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self.rows]
+            if len(keep) < len(ids):
+                logger.warning(f"Ignored {len(ids) - len(keep)} existing ids added to {self.path}")
+            if not keep:
+                return
+            start = len(self.ids)
+            for offset, i in enumerate(keep):
+                self.ids.append(ids[i])
+                self.metadatas.append(dict(metadatas[i] or {}))
+                self.rows[ids[i]] = start + offset
+                self._added[ids[i]] = documents[i]
+            self._appended.append(_normalize(np.asarray([embeddings[i] for i in keep], dtype=np.float32)))
+            self._dirty = True
+
+    def update(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        with self._lock:
+            self._reload_if_changed()
+            for doc_id, metadata in zip(ids, metadatas):
+                row = self.rows.get(doc_id)
+                if row is not None:
+                    self.metadatas[row] = {**self.metadatas[row], **metadata}
+                    self._updated.add(doc_id)
+            self._dirty = True
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            self._reload_if_changed()
+            doomed = {self.rows[doc_id] for doc_id in ids if doc_id in self.rows}
+            if not doomed:
+                return
+            for row in doomed:
+                doc_id = self.ids[row]
+                self._added.pop(doc_id, None)
+                self._updated.discard(doc_id)
+                self._deleted.add(doc_id)
+            keep = [row for row in range(len(self.ids)) if row not in doomed]
+            matrix = self._matrix()
+            self.vectors = np.ascontiguousarray(matrix[keep])
+            self.ids = [self.ids[row] for row in keep]
+            self.metadatas = [self.metadatas[row] for row in keep]
+            self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+            self._dirty = True
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            self._reload_if_changed()
+            if ids is not None:
+                rows = [self.rows[doc_id] for doc_id in ids if doc_id in self.rows]
+            else:
+                rows = range(len(self.ids))
+            rows = [row for row in rows if matches_where(self.metadatas[row], where)]
+            return self._results(rows, include, self._matrix() if "embeddings" in include else None)
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, List[Any]]:
+        """Exact top-k for each query vector, all queries answered by one matrix multiply"""
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        with self._lock:
+            self._reload_if_changed()
+            matrix = self._matrix()
+            candidates = None
+            if where:
+                candidates = np.array(
+                    [row for row, metadata in enumerate(self.metadatas) if matches_where(metadata, where)],
+                    dtype=np.int64
+                )
+                matrix = matrix[candidates]
+
+            queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+            k = min(n_results, matrix.shape[0])
+            results = {key: [] for key in ["ids"] + include}
+            if k == 0:
+                for values in results.values():
+                    values.extend([] for _ in queries)
+                return results
+
+            similarities = queries @ matrix.T
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            for query_index, row_candidates in enumerate(top):
+                order = row_candidates[np.argsort(-similarities[query_index, row_candidates])]
+                rows = candidates[order] if candidates is not None else order
+                page = self._results(rows.tolist(), [key for key in include if key != "distances"])
+                for key, values in page.items():
+                    results[key].append(values)
+                if "distances" in include:
+                    distances = 2.0 - 2.0 * similarities[query_index, order]
+                    results["distances"].append(np.maximum(distances, 0.0).tolist())
+            return results
+
+    def persist(self):
+        """Write pending changes in one transaction, after the vectors they refer to"""
+        with self._lock:
+            if not self._dirty:
+                return
+            conn = self._connect()
+            if self._deleted or self._vectors_name is None:
+                # Removed rows shift the ones after them, so the matrix goes to a new file
+                matrix = self._matrix()
+                vectors_name = f"vectors-{uuid.uuid4().hex[:12]}.f32"
+                matrix.tofile(self.path / vectors_name)
+            else:
+                # Added rows go after the persisted ones, which readers may have mapped.
+                # Rows left behind by a persist that never committed are overwritten.
+                vectors_name = self._vectors_name
+                persisted = len(self.ids) - sum(len(part) for part in self._appended)
+                with open(self.path / vectors_name, "r+b") as f:
+                    f.seek(persisted * self._dim * 4)
+                    for part in self._appended:
+                        f.write(part.tobytes())
+                    f.truncate()
+                matrix = self._matrix()
+            dim = matrix.shape[1] if matrix.size else self._dim
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Deletes go first: a deleted id may have been added again since
+                conn.executemany("DELETE FROM records WHERE id = ?", [(doc_id,) for doc_id in self._deleted])
+                conn.executemany(
+                    "INSERT INTO records (id, document, metadata) VALUES (?, ?, ?)",
+                    [(doc_id, document, json.dumps(self.metadatas[self.rows[doc_id]])) for doc_id, document in self._added.items()]
+                )
+                conn.executemany(
+                    "UPDATE records SET metadata = ? WHERE id = ?",
+                    [(json.dumps(self.metadatas[self.rows[doc_id]]), doc_id) for doc_id in self._updated if doc_id not in self._added]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [("vectors", vectors_name), ("dim", str(dim))]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                if vectors_name != self._vectors_name:
+                    (self.path / vectors_name).unlink(missing_ok=True)
+                raise
+
+            # Readers that mapped the old file keep it open until they reload
+            if self._vectors_name and self._vectors_name != vectors_name:
+                try:
+                    (self.path / self._vectors_name).unlink(missing_ok=True)
+                except OSError as e:
+                    logger.warning(f"Could not remove old vectors of {self.path}: {str(e)}")
+            self._vectors_name = vectors_name
+            self._dim = dim
+            self.vectors = self._map_vectors()
+            self._added, self._deleted, self._updated = {}, set(), set()
+            self._dirty = False
+            self._inode = self.db_path.stat().st_ino
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """The sidecar connection, creating the sidecar if needed"""
+        if self._conn is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # Transactions are opened explicitly, so a load reads one snapshot
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS records (
+                    seq INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    document TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return self._conn
+
+    def _map_vectors(self) -> Optional[np.ndarray]:
+        """Memory-map the persisted rows of the vectors file"""
+        if not self.ids:
+            return None
+        return np.memmap(self.path / self._vectors_name, dtype=np.float32, mode="r", shape=(len(self.ids), self._dim))
+
+    def _matrix(self) -> np.ndarray:
+        """All vectors as one matrix, folding in those added since the last call"""
+        if self._appended:
+            parts = ([self.vectors] if self.vectors is not None else []) + self._appended
+            self.vectors = np.concatenate(parts)
+            self._appended = []
+        if self.vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.vectors
+
+    def _documents(self, ids: List[str]) -> List[str]:
+        """Texts of the given records, from memory if not yet persisted and from the sidecar otherwise"""
+        stored = [doc_id for doc_id in ids if doc_id not in self._added]
+        found: Dict[str, str] = {}
+        if stored and self._conn is not None:
+            # Stays under SQLite's default limit of bound parameters
+            for start in range(0, len(stored), 900):
+                batch = stored[start:start + 900]
+                found.update(self._conn.execute(
+                    f"SELECT id, document FROM records WHERE id IN ({','.join('?' * len(batch))})", batch
+                ))
+        return [self._added[doc_id] if doc_id in self._added else found.get(doc_id, "") for doc_id in ids]
+
+    def _results(self, rows: List[int], include: List[str], matrix: Optional[np.ndarray] = None) -> Dict[str, List[Any]]:
+        results = {"ids": [self.ids[row] for row in rows]}
+        if "documents" in include:
+            results["documents"] = self._documents(results["ids"])
+        if "metadatas" in include:
+            results["metadatas"] = [dict(self.metadatas[row]) for row in rows]
+        if "embeddings" in include:
+            results["embeddings"] = [matrix[row].tolist() for row in rows]
+        return results
+
+    def _load(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.ids, self.metadatas, self.rows = [], [], {}
+        self.vectors = None
+        self._vectors_name = None
+        self._dim = 0
+        self._appended = []
+        self._added, self._deleted, self._updated = {}, set(), set()
+        self._inode = None
+        self._data_version = None
+
+        try:
+            if not self.db_path.exists():
+                # Deleted by another process, or never written
+                return
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                meta = dict(conn.execute("SELECT key, value FROM meta"))
+                records = conn.execute("SELECT id, metadata FROM records ORDER BY seq").fetchall()
+            finally:
+                conn.execute("COMMIT")
+            self._inode = self.db_path.stat().st_ino
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if "vectors" not in meta:
+                return
+
+            self.ids = [doc_id for doc_id, _ in records]
+            self.metadatas = [json.loads(metadata) for _, metadata in records]
+            self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+            self._vectors_name = meta["vectors"]
+            self._dim = int(meta["dim"])
+            self.vectors = self._map_vectors()
+        except Exception as e:
+            logger.error(f"Failed to load vector index {self.path}: {str(e)}")
+            self.ids, self.metadatas, self.rows = [], [], {}
+            self.vectors = None
+            self._vectors_name = None
+
+    def _reload_if_changed(self):
+        """Pick up an index persisted by another process, unless this one has unsaved changes"""
+        if self._dirty:
+            return
+        try:
+            inode = self.db_path.stat().st_ino
+        except FileNotFoundError:
+            inode = None
+        if inode != self._inode:
+            self._load()
+        elif self._conn is not None and self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._load()
+
+class NumpyVectorClient:
+    """Stores NumPy collections in one directory each, mirroring the Chroma client methods in use"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.collections: Dict[str, NumpyCollection] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_collection(self, name: str, embedding_function: Any = None) -> NumpyCollection:
+        with self._lock:
+            collection = self.collections.get(name)
+            if collection is None:
+                collection = NumpyCollection(self.path / name)
+                self.collections[name] = collection
+            return collection
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            collection = self.collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            shutil.rmtree(self.path / name, ignore_errors=True)
@@ -0,0 +1,128 @@
+import logging
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import ONNX_MODEL_DIR, EMBEDDING_MAX_TOKENS, EMBEDDING_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+def onnx_model_path(model_name: str, quantized: bool = False, model_dir: Path = ONNX_MODEL_DIR) -> Path:
+    """Local ONNX export of a sentence-transformers model, fetched or quantized on first use.
+
+    The fp32 graph is the ``onnx/model.onnx`` export published with the model on
+    the Hugging Face hub (or a file already placed in ``model_dir``). The int8
+    variant is produced from it with ONNX Runtime's dynamic quantization.
+    """
+    target_dir = Path(model_dir) / model_name.replace("/", "__")
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    fp32_path = target_dir / "model.onnx"
+    if not fp32_path.exists():
+        from huggingface_hub import hf_hub_download
+
+        logger.info(f"Downloading ONNX export of {model_name}...")
+        shutil.copyfile(hf_hub_download(model_name, "onnx/model.onnx"), fp32_path)
+
+    if not quantized:
+        return fp32_path
+
+    int8_path = target_dir / "model_int8.onnx"
+    if not int8_path.exists():
+        try:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+        except ImportError as e:
+            raise ImportError('EMBEDDING_ENGINE=onnx-int8 needs the onnx package to quantize the model (pip install ".[onnx]")') from e
+
+        logger.info(f"Quantizing {model_name} to int8...")
+        tmp_path = int8_path.with_suffix(".tmp")
+        # Weights become int8, activations are quantized per batch at run time
+        quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+        tmp_path.replace(int8_path)
+    return int8_path
+
+def tokenizer_path(model_name: str, model_dir: Path = ONNX_MODEL_DIR) -> Path:
+    """Local copy of the model's fast tokenizer definition"""
+    path = Path(model_dir) / model_name.replace("/", "__") / "tokenizer.json"
+    if not path.exists():
+        from huggingface_hub import hf_hub_download
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(hf_hub_download(model_name, "tokenizer.json"), path)
+    return path
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers embeddings computed with ONNX Runtime on CPU.
+
+    Drop-in replacement for ``HuggingFaceEmbeddings`` with mean pooling and
+    normalized output. Texts are sorted by length before batching so each batch
+    pads to similar lengths.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantized: bool = False,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_tokens: int = EMBEDDING_MAX_TOKENS,
+        threads: Optional[int] = None
+    ):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError('EMBEDDING_ENGINE=onnx needs ONNX Runtime (pip install ".[onnx]")') from e
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path(model_name)))
+        self.tokenizer.enable_truncation(max_length=max_tokens)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id("[PAD]") or 0)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(onnx_model_path(model_name, quantized)),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        # Some exports take no token_type_ids
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[List[float]] = [[] for _ in texts]
+        for start in range(0, len(order), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            embedded = self._embed_batch([texts[i] for i in positions])
+            for position, vector in zip(positions, embedded.tolist()):
+                vectors[position] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean over real tokens, then unit length, as the sentence-transformers pipeline does
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
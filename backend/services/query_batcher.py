@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Any
+from langchain_core.embeddings import Embeddings
+
+from config import QUERY_BATCHING, QUERY_BATCH_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+class QueryEmbeddingBatcher:
+    """Gathers query embeddings from concurrent searches into one model call.
+
+    A query arriving while the batcher is idle is embedded at once. Queries
+    arriving while a batch is being embedded wait for it, and as soon as it
+    finishes, up to ``max_batch_size`` of them are embedded together with a
+    single ``embed_documents`` call and the vectors are handed back to each
+    caller. A query thus waits at most for the batch ahead of it, never for
+    a timer.
+    Batches run on a dedicated thread so they never queue behind other work
+    in the default thread pool.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        enabled: bool = QUERY_BATCHING,
+        max_batch_size: int = QUERY_BATCH_MAX_SIZE
+    ):
+        self.embeddings = embeddings
+        self.enabled = enabled
+        self.max_batch_size = max_batch_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-embed")
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        # Whether a batch is being embedded; the next one starts when it finishes
+        self._running = False
+        self.batches = 0
+        self.queries = 0
+
+    async def embed(self, query: str) -> List[float]:
+        """Embed a single query, sharing a forward pass with concurrent callers"""
+        loop = asyncio.get_running_loop()
+        
+        if not self.enabled:
+            return await loop.run_in_executor(self._executor, self.embeddings.embed_query, query)
+
+        future = loop.create_future()
+        self._pending.append((query, future))
+        if not self._running:
+            self._flush()
+
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching counters since startup"""
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0
+        }
+
+    def _flush(self):
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if batch:
+            self._running = True
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        # Identical queries waiting together share one row of the batch
+        texts = list(dict.fromkeys(query for query, _ in batch))
+        loop = asyncio.get_running_loop()
+
+        try:
+            vectors = await loop.run_in_executor(self._executor, self.embeddings.embed_documents, texts)
+        except Exception as e:
+            logger.error(f"Failed to embed query batch: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            # Queries that arrived meanwhile go next
+            self._running = False
+            self._flush()
+
+        self.batches += 1
+        self.queries += len(batch)
+
+        by_text = dict(zip(texts, vectors))
+        for query, future in batch:
+            # The caller may have been cancelled while the batch was running
+            if not future.done():
+                future.set_result(by_text[query])
@@ -0,0 +1,114 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different queries share an entry"""
+    return " ".join(query.split()).casefold()
+
+class ResponseCache:
+    """LRU cache of search responses with a TTL and a memory cap.
+
+    Entries are keyed by codebase id and normalized query, and remember the
+    index generation (the registry's ``index_version``) they were computed at.
+    A lookup at a newer generation misses, so responses computed against an
+    index that changed meanwhile are never served, even when the index was
+    changed by another process.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[float, int, int, Dict[str, Any]]]" = OrderedDict()
+        # Newest generation seen per codebase
+        self.generations: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, codebase_id: str, query: str, generation: int) -> Optional[Dict[str, Any]]:
+        """Return a response cached at this generation, or None on a miss or expired entry"""
+        key = (codebase_id, normalize_query(query))
+        with self._lock:
+            self._observe(codebase_id, generation)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, _, entry_generation, value = entry
+            if expires_at < time.monotonic() or entry_generation != generation:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, codebase_id: str, query: str, value: Dict[str, Any], generation: int):
+        """Store a JSON-serializable response computed at the given generation"""
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        key = (codebase_id, normalize_query(query))
+        with self._lock:
+            # The codebase was re-indexed or deleted while this response was computed
+            if generation < self.generations.get(codebase_id, generation):
+                return
+            self._observe(codebase_id, generation)
+
+            if key in self.entries:
+                self._remove(key)
+
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, size, generation, value)
+            self.total_bytes += size
+
+            while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, codebase_id: str, generation: Optional[int] = None):
+        """Drop every cached response for a codebase, optionally recording its new generation"""
+        with self._lock:
+            if generation is not None:
+                self._observe(codebase_id, generation)
+            for key in [key for key in self.entries if key[0] == codebase_id]:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "size_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def _observe(self, codebase_id: str, generation: int):
+        if generation > self.generations.get(codebase_id, generation - 1):
+            self.generations[codebase_id] = generation
+
+    def _remove(self, key: Tuple[str, str]):
+        _, size, _, _ = self.entries.pop(key)
+        self.total_bytes -= size
@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import os
+import shutil
+from itertools import islice
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config import SOURCE_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+class SourceStore:
+    """Copies of indexed files, so exact ranges of them can be served after ingestion.
+
+    Parse workers write each file with the bytes its chunk offsets were computed
+    from. Files are stored per codebase under a hash of their path, which keeps
+    upload paths out of the filesystem layout.
+    """
+
+    def __init__(self, store_dir: Path = SOURCE_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+    def put(self, codebase_id: str, file_path: str, content: bytes):
+        """Store a file's content, replacing any previous version"""
+        path = self._path(codebase_id, file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Workers never share a temporary file, even for the same path
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(content)
+        tmp_path.replace(path)
+
+    def read_bytes(self, codebase_id: str, file_path: str, start_byte: int, end_byte: int) -> Optional[bytes]:
+        """Bytes start_byte to end_byte (exclusive) of a file, or None if it is not stored"""
+        try:
+            with open(self._path(codebase_id, file_path), "rb") as f:
+                f.seek(start_byte)
+                return f.read(max(0, end_byte - start_byte))
+        except FileNotFoundError:
+            return None
+
+    def read_lines(
+        self,
+        codebase_id: str,
+        file_path: str,
+        start_line: int,
+        end_line: Optional[int] = None
+    ) -> Optional[Tuple[bytes, int, int]]:
+        """Lines start_line to end_line (1-based, inclusive) of a file, or None if it is not stored.
+
+        Returns the content, which like chunk byte ranges ends before the last
+        line's newline, the byte offset it starts at and the last line read,
+        which is earlier than end_line at the end of the file. Without end_line
+        the rest of the file is read.
+        """
+        try:
+            with open(self._path(codebase_id, file_path), "rb") as f:
+                start_byte = sum(len(line) for line in islice(f, start_line - 1))
+                count = None if end_line is None else end_line - start_line + 1
+                lines = list(islice(f, count))
+        except FileNotFoundError:
+            return None
+
+        content = b"".join(lines)
+        last_line = start_line + len(lines) - 1
+        if content.endswith(b"\n"):
+            if count is not None and len(lines) == count:
+                content = content[:-1]
+            else:
+                # As at parse time, a file ending in a newline has an empty last line
+                last_line += 1
+        return content, start_byte, last_line
+
+    def delete_files(self, codebase_id: str, file_paths: List[str]):
+        """Remove files of a codebase"""
+        for file_path in file_paths:
+            self._path(codebase_id, file_path).unlink(missing_ok=True)
+
+    def delete(self, codebase_id: str):
+        """Remove every file of a codebase"""
+        shutil.rmtree(self.store_dir / codebase_id, ignore_errors=True)
+        logger.info(f"Deleted stored source files of codebase {codebase_id}")
+
+    def _path(self, codebase_id: str, file_path: str) -> Path:
+        digest = hashlib.sha1(file_path.encode("utf-8")).hexdigest()
+        return self.store_dir / codebase_id / digest[:2] / digest
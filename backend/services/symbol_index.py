@@ -0,0 +1,129 @@
+import difflib
+import logging
+from bisect import bisect_left
+from typing import List, Dict, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+def parse_defined_symbols(value: Any) -> List[Dict[str, Any]]:
+    """Decode a chunk's "defined_symbols" metadata ("kind:name:line" entries)"""
+    if not value:
+        return []
+
+    entries = value if isinstance(value, list) else str(value).split(",")
+    symbols = []
+    for entry in entries:
+        parts = entry.strip().split(":")
+        if len(parts) != 3 or not parts[2].isdigit():
+            continue
+        symbols.append({"kind": parts[0], "name": parts[1], "line": int(parts[2])})
+    return symbols
+
+class SymbolIndex:
+    """Symbol table of one codebase: name -> definition sites"""
+
+    def __init__(self):
+        self.definitions: Dict[str, List[Dict[str, Any]]] = {}
+        self._sorted_names: Optional[List[str]] = None
+        self._names_by_lower: Optional[Dict[str, List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.definitions)
+
+    def add(
+        self,
+        name: str,
+        kind: str,
+        file_path: str,
+        line: int,
+        chunk_index: Optional[int] = None,
+        chunk_id: Optional[str] = None
+    ):
+        """Record one definition site"""
+        self.definitions.setdefault(name, []).append({
+            "name": name,
+            "kind": kind,
+            "file_path": file_path,
+            "line": line,
+            "chunk_index": chunk_index,
+            "chunk_id": chunk_id
+        })
+        self._invalidate()
+
+    def remove_files(self, file_paths: Iterable[str]):
+        """Drop every definition located in the given files"""
+        file_paths = set(file_paths)
+        for name in list(self.definitions):
+            sites = [site for site in self.definitions[name] if site["file_path"] not in file_paths]
+            if sites:
+                self.definitions[name] = sites
+            else:
+                del self.definitions[name]
+        self._invalidate()
+
+    def lookup(self, query: str, mode: str = "exact", limit: int = 20) -> List[Dict[str, Any]]:
+        """Find definitions by exact name, name prefix or fuzzy match"""
+        # Matching ignores case, but an exact-case match is listed first
+        if mode == "prefix":
+            names = self._prefix_names(query, limit)
+        elif mode == "fuzzy":
+            names = self._fuzzy_names(query, limit)
+        else:
+            names = self._exact_names(query)
+
+        results = []
+        for name in names:
+            results.extend(self.definitions[name])
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def _exact_names(self, query: str) -> List[str]:
+        if query in self.definitions:
+            others = [name for name in self._lower_index().get(query.lower(), []) if name != query]
+            return [query] + others
+        return self._lower_index().get(query.lower(), [])
+
+    def _prefix_names(self, query: str, limit: int) -> List[str]:
+        prefix = query.lower()
+        sorted_names = self._sorted()
+        lower_index = self._lower_index()
+
+        names = []
+        position = bisect_left(sorted_names, prefix)
+        while position < len(sorted_names) and sorted_names[position].startswith(prefix):
+            names.extend(lower_index[sorted_names[position]])
+            if len(names) >= limit:
+                break
+            position += 1
+        return names
+
+    def _fuzzy_names(self, query: str, limit: int) -> List[str]:
+        lower_index = self._lower_index()
+        matches = difflib.get_close_matches(query.lower(), lower_index.keys(), n=limit, cutoff=0.6)
+        return [name for match in matches for name in lower_index[match]]
+
+    def _sorted(self) -> List[str]:
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self._lower_index())
+        return self._sorted_names
+
+    def _lower_index(self) -> Dict[str, List[str]]:
+        if self._names_by_lower is None:
+            self._names_by_lower = {}
+            for name in self.definitions:
+                self._names_by_lower.setdefault(name.lower(), []).append(name)
+        return self._names_by_lower
+
+    def _invalidate(self):
+        self._sorted_names = None
+        self._names_by_lower = None
+
+    def to_dict(self) -> Dict:
+        return {"definitions": self.definitions}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SymbolIndex":
+        index = cls()
+        index.definitions = data["definitions"]
+        return index
@@ -1,32 +1,61 @@
 import asyncio
+import fnmatch
 import logging
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
 import chromadb
 from chromadb.config import Settings
 from langchain_core.documents import Document
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
 import json
+import uuid
 
 from config import *
+from services.embedding_cache import EmbeddingCache, CachedEmbeddings
+from services.model_registry import model_registry
+from services.query_batcher import QueryEmbeddingBatcher
+from services.index_store import IndexStore
+from services.lexical_index import LexicalIndex, is_identifier_query
+from services.symbol_index import SymbolIndex, parse_defined_symbols
+from services.numpy_index import NumpyVectorClient
+from services.metrics import timed_stage
 
 logger = logging.getLogger(__name__)
 
+def parse_duplicate_paths(value: Any) -> List[str]:
+    """Decode a chunk's "duplicate_paths" metadata, the other files holding a copy of it"""
+    if not value:
+        return []
+    return value if isinstance(value, list) else str(value).split(", ")
+
 class VectorDBService:
     def __init__(self):
-        # Use free local embeddings instead of OpenAI
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=EMBEDDING_MODEL,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        # Use free local embeddings instead of OpenAI, shared with the rest of the process
+        self.embeddings = model_registry.embeddings(EMBEDDING_MODEL)
+        # Chunk embeddings are content-addressed so re-uploads skip the model
+        self.embedding_cache = EmbeddingCache()
+        self.cached_embeddings = CachedEmbeddings(self.embeddings, self.embedding_cache)
+        # Concurrent searches share query forward passes
+        self.query_batcher = QueryEmbeddingBatcher(self.embeddings)
+        # Per-codebase BM25 indexes used alongside vector search, and symbol tables
+        self.lexical_indexes = IndexStore(LEXICAL_INDEX_DIR, LexicalIndex)
+        self.symbol_indexes = IndexStore(SYMBOL_INDEX_DIR, SymbolIndex)
         self.client = None
-        self.vectorstores = {}
+        self.collections = {}
+        # Index version of each codebase when its collection handle was cached
+        self.collection_versions: Dict[str, int] = {}
     
     async def initialize(self):
-        """Initialize ChromaDB client"""
+        """Initialize the vector store client"""
         try:
-            self.client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+            if VECTOR_BACKEND == "numpy":
+                # Exact search in this process; files are shared with workers through the disk
+                self.client = NumpyVectorClient(VECTOR_INDEX_DIR)
+                logger.info("NumPy vector index initialized successfully")
+                return
+            if CHROMA_HOST:
+                # A Chroma server lets API and ingestion worker processes share collections
+                self.client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+            else:
+                self.client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
             logger.info("ChromaDB initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {str(e)}")
@@ -91,76 +120,352 @@ class VectorDBService:
         
         return cleaned_documents
     
-    async def add_documents(self, codebase_id: str, documents: List[Document]):
-        """Add documents to vector database with cleaned metadata"""
+    async def add_documents(self, codebase_id: str, documents: List[Document]) -> Dict[str, Any]:
+        """Add documents to vector database with cleaned metadata.
+
+        Returns embedding cache statistics for this batch of documents.
+        """
+        cache_stats = {"hits": 0, "misses": 0, "hit_rate": 0.0}
         try:
             if not documents:
-                return
+                return cache_stats
             
-            # Clean all documents' metadata first
-            logger.info(f"Cleaning metadata for {len(documents)} documents...")
-            cleaned_documents = self._clean_documents(documents)
+            # Add documents in batches, embedding only chunks missing from the cache
+            batch_size = EMBED_BATCH_SIZE
+            for i in range(0, len(documents), batch_size):
+                batch, embeddings, hits = await self.embed_documents(documents[i:i + batch_size])
+                cache_stats["hits"] += hits
+                cache_stats["misses"] += len(batch) - hits
+                
+                await self.store_embeddings(codebase_id, batch, embeddings)
+                logger.info(f"Added batch {i//batch_size + 1}/{(len(documents)-1)//batch_size + 1} for codebase {codebase_id}")
             
-            # Create collection name for this codebase
-            collection_name = f"{COLLECTION_NAME}_{codebase_id}"
+            await self.finalize_codebase(codebase_id)
+            
+            total = cache_stats["hits"] + cache_stats["misses"]
+            cache_stats["hit_rate"] = round(cache_stats["hits"] / total, 4) if total else 0.0
+            
+            logger.info(
+                f"Successfully added {len(documents)} documents to codebase {codebase_id} "
+                f"(embedding cache hit rate {cache_stats['hit_rate']:.0%})"
+            )
+            return cache_stats
             
-            # Create vectorstore
-            vectorstore = Chroma(
-                collection_name=collection_name,
-                embedding_function=self.embeddings,
-                persist_directory=CHROMA_PERSIST_DIR
+        except Exception as e:
+            logger.error(f"Failed to add documents: {str(e)}")
+            raise
+    
+    async def embed_documents(
+        self,
+        documents: List[Document]
+    ) -> Tuple[List[Document], List[List[float]], int]:
+        """Clean metadata and embed a batch of documents.
+
+        Returns the cleaned documents, their vectors and the number of embedding cache hits.
+        """
+        cleaned_documents = self._clean_documents(documents)
+        texts = [doc.page_content for doc in cleaned_documents]
+        codebase_id = cleaned_documents[0].metadata.get("codebase_id", "") if cleaned_documents else ""
+        
+        with timed_stage("embed", codebase_id, items=len(texts)):
+            embeddings, hits = await asyncio.to_thread(
+                self.cached_embeddings.embed_with_stats,
+                texts
+            )
+        return cleaned_documents, embeddings, hits
+    
+    async def store_embeddings(
+        self,
+        codebase_id: str,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Insert already embedded documents into the codebase collection and lexical index"""
+        collection = await self._get_collection(codebase_id)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in documents]
+        
+        with timed_stage("vector_insert", codebase_id, items=len(ids)):
+            await asyncio.to_thread(
+                collection.add,
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=[doc.metadata for doc in documents],
+                documents=[doc.page_content for doc in documents]
             )
+        
+        lexical_index = self.lexical_indexes.get(codebase_id)
+        symbol_index = self.symbol_indexes.get(codebase_id)
+        with timed_stage("lexical_index", codebase_id, items=len(ids)):
+            for doc_id, doc in zip(ids, documents):
+                self._index_chunk(lexical_index, symbol_index, doc_id, doc)
+        
+        return ids
+    
+    async def index_copies(self, codebase_id: str, copies: List[Tuple[str, Document]]):
+        """Index collapsed copies, given as (stored chunk id, copy), under their own file paths.
+
+        Copies are neither embedded nor stored, but their symbols and terms stay
+        searchable and lead to the chunk they were collapsed into.
+        """
+        lexical_index = self.lexical_indexes.get(codebase_id)
+        symbol_index = self.symbol_indexes.get(codebase_id)
+        with timed_stage("lexical_index", codebase_id, items=len(copies)):
+            for chunk_id, doc in copies:
+                self._index_chunk(lexical_index, symbol_index, str(uuid.uuid4()), doc, chunk_id)
+    
+    def _index_chunk(
+        self,
+        lexical_index: LexicalIndex,
+        symbol_index: SymbolIndex,
+        doc_id: str,
+        doc: Document,
+        chunk_id: Optional[str] = None
+    ):
+        """Add a chunk to the lexical and symbol indexes; ``chunk_id`` is the stored chunk of a copy"""
+        file_path = doc.metadata.get("file_path", "")
+        symbols = parse_defined_symbols(doc.metadata.get("defined_symbols"))
+        
+        lexical_index.add(
+            doc_id,
+            file_path,
+            doc.page_content,
+            [symbol["name"] for symbol in symbols],
+            (doc.metadata.get("start_line"), doc.metadata.get("end_line")),
+            chunk_id
+        )
+        for symbol in symbols:
+            symbol_index.add(
+                symbol["name"],
+                symbol["kind"],
+                file_path,
+                symbol["line"],
+                doc.metadata.get("chunk_index"),
+                chunk_id or doc_id
+            )
+    
+    async def finalize_codebase(self, codebase_id: str):
+        """Persist per-codebase indexes once a batch of changes is complete"""
+        collection = self.collections.get(codebase_id)
+        # Chroma writes through on every call; the NumPy backend writes its files here
+        if hasattr(collection, "persist"):
+            await asyncio.to_thread(collection.persist)
+        await asyncio.to_thread(self.lexical_indexes.save, codebase_id)
+        await asyncio.to_thread(self.symbol_indexes.save, codebase_id)
+    
+    async def delete_files(self, codebase_id: str, file_paths: List[str]) -> List[str]:
+        """Delete all chunks belonging to the given files.
+
+        Returns the file paths that actually had chunks in the collection.
+        """
+        try:
+            if not file_paths:
+                return []
+            
+            collection = await self._get_collection(codebase_id)
             
-            # Add documents in batches
-            batch_size = 50
-            for i in range(0, len(cleaned_documents), batch_size):
-                batch = cleaned_documents[i:i + batch_size]
-                await asyncio.to_thread(vectorstore.add_documents, batch)
-                logger.info(f"Added batch {i//batch_size + 1}/{(len(cleaned_documents)-1)//batch_size + 1} for codebase {codebase_id}")
+            deleting = set(file_paths)
+            existing = set()
+            # Chunks whose copies in other files outlive them, by chunk id
+            promoted = {}
+            batch_size = 500
+            for i in range(0, len(file_paths), batch_size):
+                where = {"file_path": {"$in": file_paths[i:i + batch_size]}}
+                
+                stale = await asyncio.to_thread(collection.get, where=where, include=["metadatas"])
+                if not stale["ids"]:
+                    continue
+                
+                survivor_metadata = {}
+                for doc_id, metadata in zip(stale["ids"], stale["metadatas"]):
+                    copies = parse_duplicate_paths(metadata.get("duplicate_paths"))
+                    existing.add(metadata.get("file_path"))
+                    existing.update(path for path in copies if path in deleting)
+                    survivors = [path for path in copies if path not in deleting]
+                    if survivors:
+                        survivor_metadata[doc_id] = self._with_duplicates({**metadata, "file_path": survivors[0]}, survivors[1:])
+                
+                if survivor_metadata:
+                    # Keep the text and vector for the first surviving copy
+                    kept = await asyncio.to_thread(
+                        collection.get,
+                        ids=list(survivor_metadata),
+                        include=["documents", "embeddings"]
+                    )
+                    for doc_id, text, embedding in zip(kept["ids"], kept["documents"], kept["embeddings"]):
+                        promoted[doc_id] = (Document(page_content=text, metadata=survivor_metadata[doc_id]), embedding)
+                await asyncio.to_thread(collection.delete, ids=stale["ids"])
             
-            # Persist the vectorstore
-            await asyncio.to_thread(vectorstore.persist)
+            # Remaining chunks drop the deleted files from their copies
+            referencing = await asyncio.to_thread(
+                collection.get,
+                where={"duplicate_count": {"$gt": 0}},
+                include=["metadatas"]
+            )
+            updated_ids, updated_metadatas = [], []
+            for doc_id, metadata in zip(referencing["ids"], referencing["metadatas"]):
+                paths = parse_duplicate_paths(metadata.get("duplicate_paths"))
+                removed = [path for path in paths if path in deleting]
+                if removed:
+                    existing.update(removed)
+                    updated_ids.append(doc_id)
+                    updated_metadatas.append(self._with_duplicates(metadata, [path for path in paths if path not in deleting]))
+            if updated_ids:
+                await asyncio.to_thread(collection.update, ids=updated_ids, metadatas=updated_metadatas)
             
-            # Store reference
-            self.vectorstores[codebase_id] = vectorstore
+            self.lexical_indexes.get(codebase_id).remove_files(existing)
+            self.symbol_indexes.get(codebase_id).remove_files(existing)
+            if promoted:
+                # Chunks keep their ids so the copies indexed against them still lead to them
+                documents, embeddings = zip(*promoted.values())
+                await self.store_embeddings(codebase_id, list(documents), list(embeddings), list(promoted))
+            await self.finalize_codebase(codebase_id)
             
-            logger.info(f"Successfully added {len(cleaned_documents)} documents to codebase {codebase_id}")
+            logger.info(f"Deleted chunks for {len(existing)} files from codebase {codebase_id}")
+            return sorted(existing)
             
         except Exception as e:
-            logger.error(f"Failed to add documents: {str(e)}")
+            logger.error(f"Failed to delete files: {str(e)}")
             raise
     
+    async def record_duplicates(self, codebase_id: str, duplicates: Dict[Tuple[str, int], List[str]]):
+        """Record on chunks, given by (file path, chunk index), the other files holding a copy of them"""
+        collection = await self._get_collection(codebase_id)
+        file_paths = list(dict.fromkeys(file_path for file_path, _ in duplicates))
+        
+        ids, metadatas = [], []
+        batch_size = 500
+        for i in range(0, len(file_paths), batch_size):
+            results = await asyncio.to_thread(
+                collection.get,
+                where={"file_path": {"$in": file_paths[i:i + batch_size]}},
+                include=["metadatas"]
+            )
+            for doc_id, metadata in zip(results["ids"], results["metadatas"]):
+                paths = duplicates.get((metadata.get("file_path"), metadata.get("chunk_index")))
+                if paths:
+                    ids.append(doc_id)
+                    metadatas.append(self._with_duplicates(metadata, paths))
+        
+        if ids:
+            await asyncio.to_thread(collection.update, ids=ids, metadatas=metadatas)
+        logger.info(f"Recorded copies in other files for {len(ids)} chunks of codebase {codebase_id}")
+    
+    async def duplicate_count(self, codebase_id: str) -> int:
+        """Number of copies in other files recorded on the codebase's stored chunks"""
+        collection = await self._get_collection(codebase_id)
+        results = await asyncio.to_thread(
+            collection.get,
+            where={"duplicate_count": {"$gt": 0}},
+            include=["metadatas"]
+        )
+        return sum(int(metadata.get("duplicate_count", 0)) for metadata in results["metadatas"])
+    
+    def _with_duplicates(self, metadata: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+        return {**metadata, "duplicate_paths": ", ".join(paths), "duplicate_count": len(paths)}
+    
     async def search(
         self, 
         codebase_id: str, 
         query: str, 
-        k: int = 10
+        k: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        max_distance: Optional[float] = None
     ) -> List[Document]:
-        """Search for relevant documents"""
+        """Search for relevant documents, fusing vector and lexical (BM25) rankings.
+
+        ``where`` is a Chroma metadata filter applied before ranking. Vector-only
+        matches farther than ``max_distance`` (default SEARCH_MAX_DISTANCE) are dropped.
+        """
+        if max_distance is None:
+            max_distance = SEARCH_MAX_DISTANCE
         try:
-            # Get or create vectorstore
-            vectorstore = self.vectorstores.get(codebase_id)
-            if not vectorstore:
-                collection_name = f"{COLLECTION_NAME}_{codebase_id}"
-                vectorstore = Chroma(
-                    collection_name=collection_name,
-                    embedding_function=self.embeddings,
-                    persist_directory=CHROMA_PERSIST_DIR
-                )
-                self.vectorstores[codebase_id] = vectorstore
+            collection = await self._get_collection(codebase_id)
+            with timed_stage("lexical_search", codebase_id):
+                if where:
+                    # Some lexical candidates will be filtered out, so over-fetch them
+                    lexical_hits = self.lexical_indexes.get(codebase_id).search(query, k * 4)
+                    allowed = await self._filter_ids(collection, [doc_id for doc_id, _ in lexical_hits], where)
+                    lexical_hits = [hit for hit in lexical_hits if hit[0] in allowed][:k]
+                else:
+                    lexical_hits = self.lexical_indexes.get(codebase_id).search(query, k)
+            
+            # Exact identifiers are answered from the inverted index without the embedding model
+            if lexical_hits and is_identifier_query(query):
+                documents = await self._fetch_documents(collection, [doc_id for doc_id, _ in lexical_hits])
+                best_score = lexical_hits[0][1]
+                for doc, (_, score) in zip(documents, lexical_hits):
+                    # Scale BM25 to a pseudo-distance where the best match is 0
+                    doc.metadata["score"] = round(1 - score / best_score, 4)
+                    doc.metadata["retrieval"] = "lexical"
+                
+                logger.info(f"Found {len(documents)} lexical matches for identifier query: {query}")
+                return documents
             
             # Perform similarity search
-            results = await asyncio.to_thread(
-                vectorstore.similarity_search_with_score, 
-                query, 
-                k=k
-            )
+            with timed_stage("query_embedding", codebase_id):
+                query_embedding = await self.query_batcher.embed(query)
+            with timed_stage("vector_search", codebase_id):
+                results = await asyncio.to_thread(
+                    collection.query,
+                    query_embeddings=[query_embedding],
+                    n_results=k,
+                    where=where,
+                    include=["documents", "metadatas", "distances"]
+                )
+            
+            docs_by_id = {}
+            distances = {}
+            for doc_id, text, metadata, distance in zip(
+                results["ids"][0],
+                results["documents"][0],
+                results["metadatas"][0],
+                results["distances"][0]
+            ):
+                docs_by_id[doc_id] = self._to_document(doc_id, text, metadata)
+                distances[doc_id] = distance
+            
+            # Reciprocal rank fusion of both rankings
+            fused = {}
+            for rank, doc_id in enumerate(results["ids"][0]):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1 / (RRF_K + rank + 1)
+            for rank, (doc_id, _) in enumerate(lexical_hits):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1 / (RRF_K + rank + 1)
+            ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+            
+            # Chunks found only lexically still get a real distance for display and ordering
+            lexical_only = [doc_id for doc_id in ranked if doc_id not in docs_by_id]
+            if lexical_only:
+                extra = await asyncio.to_thread(
+                    collection.get,
+                    ids=lexical_only,
+                    include=["documents", "metadatas", "embeddings"]
+                )
+                for doc_id, text, metadata, embedding in zip(
+                    extra["ids"], extra["documents"], extra["metadatas"], extra["embeddings"]
+                ):
+                    docs_by_id[doc_id] = self._to_document(doc_id, text, metadata)
+                    distances[doc_id] = float(sum((a - b) ** 2 for a, b in zip(embedding, query_embedding)))
+            
+            vector_ids = set(results["ids"][0])
+            lexical_ids = {doc_id for doc_id, _ in lexical_hits}
             
             # Add score to metadata and filter by threshold
             documents = []
-            for doc, score in results:
+            for doc_id in ranked:
+                if doc_id not in docs_by_id:
+                    continue
+                
+                doc = docs_by_id[doc_id]
+                score = distances[doc_id]
                 doc.metadata["score"] = score
-                if score < 1.5:  # ChromaDB uses distance, lower is better
+                if doc_id in lexical_ids:
+                    doc.metadata["retrieval"] = "hybrid" if doc_id in vector_ids else "lexical"
+                else:
+                    doc.metadata["retrieval"] = "vector"
+                # ChromaDB uses distance, lower is better; lexical matches skip the cutoff
+                if score < max_distance or doc_id in lexical_ids:
                     documents.append(doc)
             
             logger.info(f"Found {len(documents)} relevant documents for query: {query}")
@@ -170,6 +475,141 @@ class VectorDBService:
             logger.error(f"Search failed: {str(e)}")
             raise
     
+    async def retrieve(
+        self,
+        codebase_id: str,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        depth: int = RETRIEVE_CANDIDATES,
+        language: Optional[str] = None,
+        file_type: Optional[str] = None,
+        path_glob: Optional[str] = None
+    ) -> Tuple[List[Document], bool]:
+        """Return one page of ranked chunks matching the filters, and whether more follow.
+
+        Fused rankings change with the number of candidates, so every page of one
+        listing must be cut from a ranking of the same ``depth``.
+        """
+        conditions = []
+        if language:
+            conditions.append({"language": language.lower()})
+        if file_type:
+            file_type = file_type.lower()
+            conditions.append({"file_type": file_type if file_type.startswith(".") else f".{file_type}"})
+        if path_glob:
+            # Chroma has no pattern matching, so resolve the glob against the indexed paths,
+            # which include collapsed copies stored under the path of the chunk they copy
+            lexical_index = self.lexical_indexes.get(codebase_id)
+            paths = {path for path in lexical_index.file_paths() if fnmatch.fnmatchcase(path, path_glob)}
+            if not paths:
+                return [], False
+            conditions.append({"file_path": {"$in": sorted(lexical_index.stored_files(paths))}})
+        
+        if len(conditions) > 1:
+            where = {"$and": conditions}
+        else:
+            where = conditions[0] if conditions else None
+        
+        # Vector queries cannot skip results, so rank the whole candidate pool and slice it
+        documents = await self.search(codebase_id, query, k=max(depth, offset + limit), where=where)
+        if path_glob:
+            # Other chunks of the files holding a matching copy are not part of the listing
+            documents = [
+                doc for doc in documents
+                if any(
+                    fnmatch.fnmatchcase(path, path_glob)
+                    for path in [doc.metadata.get("file_path", "")] + parse_duplicate_paths(doc.metadata.get("duplicate_paths"))
+                )
+            ]
+        return documents[offset:offset + limit], len(documents) > offset + limit
+    
+    def lookup_symbol(
+        self,
+        codebase_id: str,
+        query: str,
+        mode: str = "exact",
+        limit: int = 20,
+        include_usages: bool = True
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Answer "where is X defined / used" from the symbol table and inverted index"""
+        definitions = self.symbol_indexes.get(codebase_id).lookup(query, mode, limit)
+        
+        usages = []
+        if include_usages:
+            lexical_index = self.lexical_indexes.get(codebase_id)
+            # The inverted index is case-insensitive, so each spelling is looked up once
+            names = dict.fromkeys(name.lower() for name in [query] + [site["name"] for site in definitions])
+            for name in names:
+                for doc_id in lexical_index.occurrences(name):
+                    span = lexical_index.doc_spans.get(doc_id) or [None, None]
+                    usages.append({
+                        "name": name,
+                        "file_path": lexical_index.doc_files.get(doc_id, ""),
+                        "chunk_id": lexical_index.chunk_id(doc_id),
+                        "start_line": span[0],
+                        "end_line": span[1]
+                    })
+                    if len(usages) >= limit:
+                        break
+                if len(usages) >= limit:
+                    break
+        
+        return {"definitions": definitions, "usages": usages}
+    
+    def sync_index_version(self, codebase_id: str, index_version: int):
+        """Drop the cached collection handle of a codebase whose index changed since it was cached.
+
+        A retried upload deletes and recreates the collection, possibly in
+        another process, which leaves handles cached here pointing at the deleted one.
+        """
+        if self.collection_versions.get(codebase_id) != index_version:
+            self.collections.pop(codebase_id, None)
+            self.collection_versions[codebase_id] = index_version
+    
+    async def _get_collection(self, codebase_id: str):
+        """Get (or create) the Chroma collection of a codebase"""
+        collection = self.collections.get(codebase_id)
+        if collection is None:
+            collection_name = f"{COLLECTION_NAME}_{codebase_id}"
+            collection = await asyncio.to_thread(
+                self.client.get_or_create_collection,
+                collection_name,
+                embedding_function=None
+            )
+            self.collections[codebase_id] = collection
+        return collection
+    
+    async def _filter_ids(self, collection, ids: List[str], where: Dict[str, Any]) -> set:
+        """Ids among the given chunks whose metadata matches a Chroma filter"""
+        if not ids:
+            return set()
+        results = await asyncio.to_thread(collection.get, ids=ids, where=where, include=[])
+        return set(results["ids"])
+    
+    async def _fetch_documents(self, collection, ids: List[str]) -> List[Document]:
+        """Load chunks by id, preserving the order of ids"""
+        results = await asyncio.to_thread(
+            collection.get,
+            ids=ids,
+            include=["documents", "metadatas"]
+        )
+        by_id = {
+            doc_id: self._to_document(doc_id, text, metadata)
+            for doc_id, text, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+        }
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+    
+    def _to_document(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]]) -> Document:
+        metadata = dict(metadata or {})
+        metadata["chunk_id"] = doc_id
+        return Document(page_content=text, metadata=metadata)
+    
+    async def chunk_count(self, codebase_id: str) -> int:
+        """Number of chunks stored for a codebase"""
+        collection = await self._get_collection(codebase_id)
+        return await asyncio.to_thread(collection.count)
+    
     async def delete_codebase(self, codebase_id: str):
         """Delete codebase from vector database"""
         try:
@@ -178,8 +618,10 @@ class VectorDBService:
             if self.client:
                 self.client.delete_collection(collection_name)
             
-            if codebase_id in self.vectorstores:
-                del self.vectorstores[codebase_id]
+            self.collections.pop(codebase_id, None)
+            self.collection_versions.pop(codebase_id, None)
+            self.lexical_indexes.delete(codebase_id)
+            self.symbol_indexes.delete(codebase_id)
             
             logger.info(f"Deleted codebase {codebase_id}")
             
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# The backend modules import each other from the backend directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "test")
@@ -0,0 +1,67 @@
+import asyncio
+
+import worker
+from services.codebase_registry import CodebaseRegistry
+from services.ingestion_jobs import IngestionJobRunner
+from services.job_queue import JobQueue
+
+
+class StubVectorDB:
+    def sync_index_version(self, codebase_id, version):
+        pass
+
+    async def delete_codebase(self, codebase_id):
+        pass
+
+
+class StubFileParser:
+    source_store = None
+
+
+def make_worker(tmp_path):
+    registry = CodebaseRegistry(tmp_path / "registry.sqlite3")
+    runner = IngestionJobRunner(StubFileParser(), StubVectorDB(), registry)
+
+    async def failing_ingest(codebase_id, sources, total_files):
+        raise RuntimeError("embedding service unavailable")
+
+    runner.ingest = failing_ingest
+
+    ingestion_worker = worker.IngestionWorker.__new__(worker.IngestionWorker)
+    ingestion_worker.worker_id = "test-worker"
+    ingestion_worker.job_queue = JobQueue(tmp_path / "jobs.sqlite3")
+    ingestion_worker.codebase_registry = registry
+    ingestion_worker.runner = runner
+    return ingestion_worker
+
+
+def test_failing_upload_is_retried_then_dead_lettered(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker, "JOB_MAX_ATTEMPTS", 3)
+    ingestion_worker = make_worker(tmp_path)
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+    (spool_dir / "000000").write_bytes(b"print('hello')\n")
+
+    ingestion_worker.codebase_registry.create("codebase", {"status": "processing", "total_files": 1})
+    job_id = ingestion_worker.job_queue.enqueue(
+        "codebase", "upload", {"spool_dir": str(spool_dir), "files": ["hello.py"]}
+    )
+
+    for attempt in range(1, 4):
+        job = ingestion_worker.job_queue.claim("test-worker")
+        assert job["id"] == job_id
+        assert job["attempts"] == attempt
+        asyncio.run(ingestion_worker.run_job(job))
+
+        if attempt < 3:
+            # Queued again with its files kept for the next attempt
+            assert ingestion_worker.job_queue.stats() == {"queued": 1}
+            assert spool_dir.exists()
+            assert ingestion_worker.codebase_registry.get("codebase")["status"] == "processing"
+
+    assert ingestion_worker.job_queue.claim("test-worker") is None
+    assert ingestion_worker.job_queue.stats() == {"failed": 1}
+    assert not spool_dir.exists()
+    status = ingestion_worker.codebase_registry.get("codebase")
+    assert status["status"] == "error"
+    assert "embedding service unavailable" in status["message"]
@@ -0,0 +1,95 @@
+"""Check that an optimized embedding engine agrees with the PyTorch fp32 model.
+
+Run from the backend directory:
+
+    python tools/embedding_agreement.py --engine onnx-int8 --path /path/to/repo
+
+Embeds real chunks of a source tree with both engines and reports the cosine
+similarity of each pair of vectors, how often each chunk keeps the same nearest
+neighbours, and the throughput of both engines. Exits with status 1 when the
+mean cosine is below --min-cosine.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import EMBEDDING_MODEL, SUPPORTED_EXTENSIONS, MAX_FILE_SIZE
+from services.file_parser import FileParserService
+from services.model_registry import model_registry, EMBEDDING_ENGINES
+from utils.file_utils import get_supported_files
+
+def sample_chunks(root: Path, limit: int) -> list:
+    """Chunks of the tree's files, as the ingestion pipeline would embed them"""
+    parser = FileParserService()
+    chunks = []
+    for path in sorted(get_supported_files(root, SUPPORTED_EXTENSIONS, True, MAX_FILE_SIZE)):
+        filename = path.relative_to(root).as_posix()
+        chunks.extend(doc.page_content for doc in parser.parse_content(filename, path.read_bytes(), "agreement"))
+        if len(chunks) >= limit:
+            break
+    return chunks[:limit]
+
+def embed_timed(engine: str, chunks: list) -> tuple:
+    model = model_registry.get_embeddings(EMBEDDING_MODEL, engine)
+    # Warm up outside the timing
+    model.embed_documents(chunks[:8])
+    started = time.perf_counter()
+    vectors = np.asarray(model.embed_documents(chunks), dtype=np.float32)
+    return vectors, len(chunks) / (time.perf_counter() - started)
+
+def neighbour_overlap(reference: np.ndarray, candidate: np.ndarray, k: int) -> float:
+    """Mean share of each chunk's k nearest chunks that both engines agree on"""
+    k = min(k, len(reference) - 1)
+    if k < 1:
+        return 1.0
+    overlaps = []
+    for vectors in (reference, candidate):
+        similarities = vectors @ vectors.T
+        np.fill_diagonal(similarities, -np.inf)
+        overlaps.append(np.argsort(-similarities, axis=1)[:, :k])
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(*overlaps)]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare an embedding engine against the PyTorch fp32 model")
+    parser.add_argument("--engine", default="onnx-int8", choices=[engine for engine in EMBEDDING_ENGINES if engine != "torch"])
+    parser.add_argument("--path", default=str(Path(__file__).resolve().parent.parent), help="Source tree to take chunks from")
+    parser.add_argument("--limit", type=int, default=500, help="Number of chunks to embed")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours compared per chunk")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    chunks = sample_chunks(Path(args.path).resolve(), args.limit)
+    if not chunks:
+        parser.error(f"No supported files found under {args.path}")
+
+    reference, reference_rate = embed_timed("torch", chunks)
+    candidate, candidate_rate = embed_timed(args.engine, chunks)
+
+    # Both engines return unit vectors
+    cosines = np.sum(reference * candidate, axis=1)
+    report = {
+        "model": EMBEDDING_MODEL,
+        "engine": args.engine,
+        "chunks": len(chunks),
+        "cosine_mean": round(float(cosines.mean()), 5),
+        "cosine_p01": round(float(np.percentile(cosines, 1)), 5),
+        "cosine_min": round(float(cosines.min()), 5),
+        f"neighbour_overlap_at_{args.k}": round(neighbour_overlap(reference, candidate, args.k), 4),
+        "torch_chunks_per_second": round(reference_rate, 1),
+        "engine_chunks_per_second": round(candidate_rate, 1),
+        "speedup": round(candidate_rate / reference_rate, 2)
+    }
+    print(json.dumps(report, indent=2))
+
+    if report["cosine_mean"] < args.min_cosine:
+        print(f"Mean cosine {report['cosine_mean']} is below {args.min_cosine}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Sweep chunking and retrieval settings against labelled queries.
+
+Run from the backend directory:
+
+    python tools/parameter_sweep.py --path /path/to/repo --labels queries.jsonl --output sweep.json
+
+The labels file holds one JSON object per line (or a JSON array of them)
+naming the files a query should find, relative to the codebase root:
+
+    {"query": "where are refresh tokens rotated", "expected": ["auth/tokens.py"]}
+
+Each CHUNKING_STRATEGY / CHUNK_SIZE / CHUNK_OVERLAP combination is ingested in
+a fresh process and directory, so caches and indexes never carry over between
+configurations. Only the recursive splitter uses CHUNK_OVERLAP, so overlap
+values are swept under that strategy alone; syntax runs keep its default.
+Every MAX_SEARCH_RESULTS (k) and SEARCH_MAX_DISTANCE value is then searched on
+that index. The report lists recall@k, index size, ingestion time and query
+latency per configuration, and marks the Pareto-optimal ones: those no other
+configuration beats on recall, p95 latency, index size and LLM context size
+at once.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Objectives of the Pareto front: (report field, True when higher is better)
+OBJECTIVES = [
+    ("recall_at_k", True),
+    ("query_p95_ms", False),
+    ("index_bytes", False),
+    ("mean_context_chars", False)
+]
+
+def load_labels(path: Path) -> List[Dict[str, Any]]:
+    """Read labelled queries from a JSON array or JSON lines file"""
+    text = path.read_text(encoding="utf-8").strip()
+    entries = json.loads(text) if text.startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    labels = []
+    for entry in entries:
+        expected = entry["expected"]
+        if isinstance(expected, str):
+            expected = [expected]
+        labels.append({
+            "query": entry["query"],
+            "expected": sorted({Path(file_path).as_posix() for file_path in expected})
+        })
+    return labels
+
+def parse_grid(value: str, cast=float) -> list:
+    """Comma-separated values of one swept parameter"""
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+def directory_bytes(path: Path) -> int:
+    if not path.exists():
+        return 0
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+def score_query(results: List[Tuple[List[str], int]], expected: List[str]) -> Dict[str, float]:
+    """Recall of the expected files, reciprocal rank of the first one and context size.
+
+    ``results`` holds the file paths and content length of each returned chunk, in rank order.
+    """
+    found = set()
+    first_rank = None
+    for rank, (paths, _) in enumerate(results, start=1):
+        matched = set(paths) & set(expected)
+        if matched and first_rank is None:
+            first_rank = rank
+        found |= matched
+    return {
+        "recall": len(found) / len(expected),
+        "reciprocal_rank": 1 / first_rank if first_rank else 0.0,
+        "results": len(results),
+        "context_chars": sum(length for _, length in results)
+    }
+
+async def evaluate_configuration(args, labels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Ingest the codebase with the chunk settings of this process and search it with every k and cutoff"""
+    os.chdir(args.workdir)
+    os.environ.setdefault("GROQ_API_KEY", "parameter-sweep")
+    import main
+    from config import CHUNKING_STRATEGY, CHUNK_SIZE, CHUNK_OVERLAP, SUPPORTED_EXTENSIONS, MAX_FILE_SIZE
+    from config import CHROMA_PERSIST_DIR, VECTOR_INDEX_DIR, LEXICAL_INDEX_DIR, SYMBOL_INDEX_DIR
+    from services.ingestion_jobs import read_local_files
+    from services.vector_db import parse_duplicate_paths
+    from utils.file_utils import get_supported_files
+
+    root = Path(args.path)
+    filenames = [
+        path.relative_to(root).as_posix()
+        for path in sorted(get_supported_files(root, SUPPORTED_EXTENSIONS, True, MAX_FILE_SIZE))
+    ]
+
+    async with main.lifespan(main.app):
+        # Load the embedding model outside the measurements
+        await asyncio.to_thread(main.vector_db.embeddings.embed_query, "warm up")
+
+        codebase_id = str(uuid.uuid4())
+        main.codebase_registry.create(codebase_id, {"status": "processing", "total_files": len(filenames), "processed_files": 0})
+        started = time.perf_counter()
+        await main.ingestion_runner.process_upload(codebase_id, read_local_files(root, filenames), len(filenames))
+        ingestion_seconds = time.perf_counter() - started
+        status = main.codebase_registry.get(codebase_id)
+        if status["status"] != "completed":
+            raise RuntimeError(f"Ingestion failed: {status['message']}")
+
+        index_bytes = sum(
+            directory_bytes(Path(directory))
+            for directory in (CHROMA_PERSIST_DIR, VECTOR_INDEX_DIR, LEXICAL_INDEX_DIR, SYMBOL_INDEX_DIR)
+        )
+        await main.vector_db.search(codebase_id, labels[0]["query"], k=max(args.k))
+
+        rows = []
+        for k, max_distance in itertools.product(args.k, args.max_distance):
+            scores, latencies = [], []
+            for label in labels:
+                started = time.perf_counter()
+                documents = await main.vector_db.search(codebase_id, label["query"], k=k, max_distance=max_distance)
+                latencies.append(time.perf_counter() - started)
+                # A collapsed chunk stands for every file it was copied to
+                results = [
+                    ([doc.metadata.get("file_path", "")] + parse_duplicate_paths(doc.metadata.get("duplicate_paths")), len(doc.page_content))
+                    for doc in documents
+                ]
+                scores.append(score_query(results, label["expected"]))
+
+            latencies_ms = np.asarray(latencies) * 1000
+            rows.append({
+                "chunking_strategy": CHUNKING_STRATEGY,
+                "chunk_size": CHUNK_SIZE,
+                "chunk_overlap": CHUNK_OVERLAP,
+                "k": k,
+                "max_distance": max_distance,
+                "recall_at_k": round(float(np.mean([score["recall"] for score in scores])), 4),
+                "mrr": round(float(np.mean([score["reciprocal_rank"] for score in scores])), 4),
+                "mean_results": round(float(np.mean([score["results"] for score in scores])), 2),
+                "mean_context_chars": round(float(np.mean([score["context_chars"] for score in scores])), 1),
+                "chunks": status["chunk_count"],
+                "index_bytes": index_bytes,
+                "ingestion_seconds": round(ingestion_seconds, 3),
+                "query_p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+                "query_p95_ms": round(float(np.percentile(latencies_ms, 95)), 3)
+            })
+    return rows
+
+def chunking_configurations(strategies: List[str], chunk_sizes: List[int], chunk_overlaps: List[int]) -> List[Tuple[str, int, Optional[int]]]:
+    """(strategy, size, overlap) combinations to ingest; overlap is None where the strategy ignores it"""
+    configurations = []
+    for strategy, chunk_size in itertools.product(strategies, chunk_sizes):
+        if strategy != "recursive":
+            configurations.append((strategy, chunk_size, None))
+            continue
+        for chunk_overlap in chunk_overlaps:
+            if chunk_overlap < chunk_size:
+                configurations.append((strategy, chunk_size, chunk_overlap))
+    return configurations
+
+def run_configuration(args, strategy: str, chunk_size: int, chunk_overlap: Optional[int]) -> List[Dict[str, Any]]:
+    """Evaluate one chunking configuration in a child process with its own state directory"""
+    with tempfile.TemporaryDirectory(prefix="codebase-sweep-") as workdir:
+        result_path = Path(workdir) / "result.json"
+        env = {**os.environ, "CHUNKING_STRATEGY": strategy, "CHUNK_SIZE": str(chunk_size)}
+        if chunk_overlap is not None:
+            env["CHUNK_OVERLAP"] = str(chunk_overlap)
+        command = [
+            sys.executable, __file__,
+            "--path", args.path,
+            "--labels", args.labels,
+            "--k", ",".join(str(k) for k in args.k),
+            "--max-distance", ",".join(str(distance) for distance in args.max_distance),
+            "--workdir", workdir,
+            "--result", str(result_path)
+        ]
+        subprocess.run(command, env=env, check=True)
+        return json.loads(result_path.read_text())
+
+def pareto_front(rows: List[Dict[str, Any]]) -> List[int]:
+    """Indexes of the rows that no other row matches or beats on every objective while beating on one"""
+    def key(row):
+        return [row[field] if higher else -row[field] for field, higher in OBJECTIVES]
+
+    values = [key(row) for row in rows]
+    front = []
+    for i, value in enumerate(values):
+        dominated = any(
+            all(a >= b for a, b in zip(other, value)) and any(a > b for a, b in zip(other, value))
+            for j, other in enumerate(values) if j != i
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+def print_table(rows: List[Dict[str, Any]]):
+    columns = [
+        "chunking_strategy", "chunk_size", "chunk_overlap", "k", "max_distance", "recall_at_k", "mrr", "mean_context_chars",
+        "chunks", "index_bytes", "ingestion_seconds", "query_p50_ms", "query_p95_ms", "pareto"
+    ]
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).rjust(width) for column, width in zip(columns, widths)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep chunking and retrieval settings against labelled queries")
+    parser.add_argument("--path", required=True, help="Codebase to index")
+    parser.add_argument("--labels", required=True, help="JSON lines of {\"query\": ..., \"expected\": [file paths]}")
+    parser.add_argument("--chunk-size", default="500,1000,1500", help="CHUNK_SIZE values")
+    parser.add_argument("--chunk-overlap", default="0,200", help="CHUNK_OVERLAP values, swept under the recursive strategy")
+    parser.add_argument("--chunking-strategy", default="syntax,recursive", help="CHUNKING_STRATEGY values")
+    parser.add_argument("--k", default="5,10,20", help="MAX_SEARCH_RESULTS values")
+    parser.add_argument("--max-distance", default="1.0,1.25,1.5,4.0", help="SEARCH_MAX_DISTANCE values, 4.0 keeps every match")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    # Set when the tool runs one chunking configuration in a child process
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    args.path = str(Path(args.path).resolve())
+    args.labels = str(Path(args.labels).resolve())
+    args.k = parse_grid(args.k, int)
+    args.max_distance = parse_grid(args.max_distance)
+    labels = load_labels(Path(args.labels))
+    if not labels:
+        parser.error(f"No labelled queries in {args.labels}")
+
+    if args.result:
+        rows = asyncio.run(evaluate_configuration(args, labels))
+        Path(args.result).write_text(json.dumps(rows))
+        return
+
+    output = Path(args.output).resolve() if args.output else None
+    rows = []
+    configurations = chunking_configurations(
+        parse_grid(args.chunking_strategy, str.strip),
+        parse_grid(args.chunk_size, int),
+        parse_grid(args.chunk_overlap, int)
+    )
+    for strategy, chunk_size, chunk_overlap in configurations:
+        overlap = "" if chunk_overlap is None else f" CHUNK_OVERLAP={chunk_overlap}"
+        print(f"Evaluating CHUNKING_STRATEGY={strategy} CHUNK_SIZE={chunk_size}{overlap}...", file=sys.stderr)
+        rows.extend(run_configuration(args, strategy, chunk_size, chunk_overlap))
+
+    front = set(pareto_front(rows))
+    for i, row in enumerate(rows):
+        row["pareto"] = i in front
+
+    report = {
+        "codebase": args.path,
+        "queries": len(labels),
+        "objectives": {field: "max" if higher else "min" for field, higher in OBJECTIVES},
+        "configurations": rows,
+        "pareto_front": [row for row in rows if row["pareto"]]
+    }
+    print_table(rows)
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import ast
+import re
+import logging
+from bisect import bisect_left
+from itertools import accumulate
+from typing import List, Dict, Any, Tuple, Optional, Callable
+
+from utils.text_processing import extract_symbol_definitions
+
+logger = logging.getLogger(__name__)
+
+# A chunk as (text, first line, last line, symbol); lines are 1-based
+Chunk = Tuple[str, int, int, Optional[str]]
+
+# Languages whose blocks are delimited by braces, with definitions found by the source scanner
+BRACE_EXTENSIONS = {'.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c', '.h', '.cs', '.go', '.rs', '.php', '.swift', '.kt'}
+
+# Line starts of comments, doc comments and annotations that belong to the definition below them
+_BRACE_COMMENT_PREFIXES = ('//', '/*', '*', '@')
+_COMMENT_PREFIXES = {
+    '.rs': _BRACE_COMMENT_PREFIXES + ('#[',),
+    '.php': _BRACE_COMMENT_PREFIXES + ('#[',),
+    '.cs': _BRACE_COMMENT_PREFIXES + ('[',),
+}
+
+# Strings and comments (whose braces do not count) or a brace / statement end
+_BRACE_TOKENS = re.compile(
+    r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`|//[^\n]*|/\*.*?\*/|[{};]',
+    re.DOTALL
+)
+
+class _Unit:
+    """A run of lines that should stay together: a definition or the code around definitions"""
+
+    __slots__ = ("start", "end", "symbol", "children")
+
+    def __init__(self, start: int, end: int, symbol: Optional[str], children: Optional[List["_Unit"]] = None):
+        self.start = start
+        self.end = end
+        self.symbol = symbol
+        self.children = children or []
+
+class CodeChunker:
+    """Splits source code on function and class boundaries.
+
+    Each definition becomes one chunk; small neighbouring units are merged up to
+    ``chunk_size`` characters, and only definitions larger than that are split,
+    on their inner definitions or statements where possible. Python is parsed
+    with ``ast``; brace languages use the source scanner's definitions plus brace
+    matching. Chunks do not overlap.
+    """
+
+    def __init__(self, chunk_size: int, split_text: Callable[[str], List[str]]):
+        self.chunk_size = chunk_size
+        # Used for single lines longer than a chunk (e.g. minified code)
+        self.split_text = split_text
+
+    def split(
+        self,
+        content: str,
+        file_ext: str,
+        definitions: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[List[Chunk]]:
+        """Chunk a file, or return None if its structure cannot be determined.
+
+        ``definitions`` are the file's symbols with lines of ``content``, if already
+        scanned; brace languages otherwise scan for them here.
+        """
+        lines = content.split('\n')
+        if file_ext == '.py':
+            units = self._python_units(content)
+            comment_prefixes = ('#',)
+        elif file_ext in BRACE_EXTENSIONS:
+            if definitions is None:
+                definitions = extract_symbol_definitions(content, file_ext)
+            units = self._brace_units(content, definitions)
+            comment_prefixes = _COMMENT_PREFIXES.get(file_ext, _BRACE_COMMENT_PREFIXES)
+        else:
+            return None
+
+        if not units:
+            return None
+
+        self._attach_leading_comments(units, lines, comment_prefixes)
+        # Character offset of the start of each line, plus the end of the file
+        offsets = [0] + list(accumulate(len(line) + 1 for line in lines))
+        return self._pack(self._fill(units, 1, len(lines), None), lines, offsets)
+
+    def _python_units(self, content: str) -> Optional[List[_Unit]]:
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError) as e:
+            logger.debug(f"Falling back to text splitting: {str(e)}")
+            return None
+        return self._python_definitions(tree.body, "")
+
+    def _python_definitions(self, body: List[ast.stmt], prefix: str) -> List[_Unit]:
+        units = []
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+                units.append(self._python_unit(node, start, prefix + node.name))
+        return units
+
+    def _python_unit(self, node: ast.AST, start: int, symbol: str) -> _Unit:
+        """A definition whose children are its body statements, so oversized ones split between statements"""
+        children = []
+        for child in node.body:
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                child_start = min([child.lineno] + [decorator.lineno for decorator in child.decorator_list])
+                children.append(self._python_unit(child, child_start, f"{symbol}.{child.name}"))
+            else:
+                children.append(_Unit(child.lineno, child.end_lineno, symbol))
+        return _Unit(start, node.end_lineno, symbol, children)
+
+    def _brace_units(self, content: str, definitions: List[Dict[str, Any]]) -> Optional[List[_Unit]]:
+        if not definitions:
+            return None
+
+        # Match braces once, ignoring those inside strings and comments
+        pairs: Dict[int, int] = {}
+        opening: List[int] = []
+        statement_ends: List[int] = []
+        stack = []
+        for match in _BRACE_TOKENS.finditer(content):
+            token = match.group(0)
+            if token == '{':
+                stack.append(match.start())
+                opening.append(match.start())
+            elif token == '}':
+                if stack:
+                    pairs[stack.pop()] = match.start()
+            elif token == ';':
+                statement_ends.append(match.start())
+
+        line_starts = [0] + [match.end() for match in re.finditer('\n', content)]
+
+        blocks = []
+        seen_lines = set()
+        definition_lines = sorted({definition["line"] for definition in definitions})
+        for definition in sorted(definitions, key=lambda item: item["line"]):
+            line = definition["line"]
+            if line in seen_lines:
+                continue
+
+            # The body is the first block opened before the declaration ends; prototypes have none
+            line_start = line_starts[line - 1]
+            position = bisect_left(opening, line_start)
+            if position == len(opening) or opening[position] not in pairs:
+                continue
+            brace = opening[position]
+            semicolon = bisect_left(statement_ends, line_start)
+            if semicolon < len(statement_ends) and statement_ends[semicolon] < brace:
+                continue
+            # Nor do declarations without semicolons (Kotlin, Swift) whose next brace belongs to a later definition
+            following = bisect_left(definition_lines, line + 1)
+            if following < len(definition_lines) and line_starts[definition_lines[following] - 1] <= brace:
+                continue
+
+            seen_lines.add(line)
+            end_line = bisect_left(line_starts, pairs[brace] + 1)
+            blocks.append((line, end_line, definition["name"]))
+
+        # Definitions inside another definition's block become its children
+        units: List[_Unit] = []
+        stack: List[_Unit] = []
+        for start, end, name in blocks:
+            while stack and stack[-1].end < start:
+                stack.pop()
+            if stack and end <= stack[-1].end:
+                unit = _Unit(start, end, f"{stack[-1].symbol}.{name}")
+                stack[-1].children.append(unit)
+            elif stack:
+                # Overlaps the enclosing block without nesting in it; a regex false positive
+                continue
+            else:
+                unit = _Unit(start, end, name)
+                units.append(unit)
+            stack.append(unit)
+
+        return units
+
+    def _attach_leading_comments(
+        self,
+        units: List[_Unit],
+        lines: List[str],
+        prefixes: Tuple[str, ...],
+        previous_end: int = 0
+    ):
+        """Move doc comments, decorators and annotations just above a definition into it"""
+        for unit in units:
+            while unit.start - 1 > previous_end and lines[unit.start - 2].strip().startswith(prefixes):
+                unit.start -= 1
+            self._attach_leading_comments(unit.children, lines, prefixes, unit.start)
+            previous_end = unit.end
+
+    def _fill(self, units: List[_Unit], start: int, end: int, symbol: Optional[str]) -> List[_Unit]:
+        """Cover lines start..end in order, adding units for the code between definitions"""
+        filled = []
+        line = start
+        for unit in units:
+            if unit.end < line:
+                # Several statements on one line
+                continue
+            unit.start = max(unit.start, line)
+            if unit.start > line:
+                filled.append(_Unit(line, unit.start - 1, symbol))
+            filled.append(unit)
+            line = unit.end + 1
+        if line <= end:
+            filled.append(_Unit(line, end, symbol))
+        return filled
+
+    def _pack(self, units: List[_Unit], lines: List[str], offsets: List[int]) -> List[Chunk]:
+        """Merge consecutive small units into chunks and split the oversized ones"""
+        chunks = []
+        pending: List[_Unit] = []
+        pending_size = 0
+
+        def flush():
+            if pending:
+                chunks.append(self._chunk(pending[0].start, pending[-1].end, pending, lines))
+                pending.clear()
+
+        for unit in units:
+            size = offsets[unit.end] - offsets[unit.start - 1]
+            if size > self.chunk_size:
+                flush()
+                pending_size = 0
+                children = self._fill(unit.children, unit.start, unit.end, unit.symbol)
+                if unit.children and len(children) > 1:
+                    chunks.extend(self._pack(children, lines, offsets))
+                else:
+                    chunks.extend(self._split_lines(unit, lines))
+                continue
+
+            if pending_size + size > self.chunk_size:
+                flush()
+                pending_size = 0
+            pending.append(unit)
+            pending_size += size
+
+        flush()
+        return [chunk for chunk in chunks if chunk[0].strip()]
+
+    def _chunk(self, start: int, end: int, units: List[_Unit], lines: List[str]) -> Chunk:
+        symbols = list(dict.fromkeys(unit.symbol for unit in units if unit.symbol))
+        return '\n'.join(lines[start - 1:end]), start, end, ", ".join(symbols) or None
+
+    def _split_lines(self, unit: _Unit, lines: List[str]) -> List[Chunk]:
+        """Split a unit without usable inner structure into runs of whole lines"""
+        chunks = []
+        piece_start = unit.start
+        size = 0
+        for line_number in range(unit.start, unit.end + 1):
+            line = lines[line_number - 1]
+            if len(line) > self.chunk_size:
+                if line_number > piece_start:
+                    chunks.append(self._chunk(piece_start, line_number - 1, [unit], lines))
+                chunks.extend((text, line_number, line_number, unit.symbol) for text in self.split_text(line))
+                piece_start = line_number + 1
+                size = 0
+                continue
+
+            if size + len(line) + 1 > self.chunk_size and line_number > piece_start:
+                chunks.append(self._chunk(piece_start, line_number - 1, [unit], lines))
+                piece_start = line_number
+                size = 0
+            size += len(line) + 1
+
+        if piece_start <= unit.end:
+            chunks.append(self._chunk(piece_start, unit.end, [unit], lines))
+        return chunks
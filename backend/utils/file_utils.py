@@ -1,32 +1,144 @@
 import os
+import re
 import shutil
 import logging
-from pathlib import Path
-from typing import List, Set
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import List, Dict, Set, Optional, IO, Tuple
 
 logger = logging.getLogger(__name__)
 
-def get_supported_files(directory: Path, extensions: Set[str]) -> List[Path]:
+# Common non-source directories
+SKIP_DIRS = {
+    'node_modules', '__pycache__', 'build', 'dist', 'target',
+    '.git', '.svn', '.hg', 'venv', 'env', '.env'
+}
+
+def is_skipped_dir(name: str) -> bool:
+    """Check if a directory should not be searched for source files"""
+    return name.startswith('.') or name in SKIP_DIRS
+
+def get_supported_files(
+    directory: Path,
+    extensions: Set[str],
+    respect_gitignore: bool = False,
+    max_file_size: Optional[int] = None
+) -> List[Path]:
     """Recursively get all supported files from directory"""
     supported_files = []
+    ignore_rules = GitIgnoreRules() if respect_gitignore else None
     
     for root, dirs, files in os.walk(directory):
+        relative_root = Path(root).relative_to(directory).as_posix()
+        relative_root = "" if relative_root == "." else relative_root
+        if ignore_rules is not None:
+            ignore_rules.load(Path(root) / '.gitignore', relative_root)
+        
         # Skip common non-source directories
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {
-            'node_modules', '__pycache__', 'build', 'dist', 'target',
-            '.git', '.svn', '.hg', 'venv', 'env', '.env'
-        }]
+        dirs[:] = [d for d in dirs if not is_skipped_dir(d)]
+        if ignore_rules is not None:
+            dirs[:] = [d for d in dirs if not ignore_rules.is_ignored(_join(relative_root, d), True)]
         
         for file in files:
             if file.startswith('.'):
                 continue
                 
             file_path = Path(root) / file
-            if file_path.suffix.lower() in extensions:
-                supported_files.append(file_path)
+            if file_path.suffix.lower() not in extensions:
+                continue
+            if ignore_rules is not None and ignore_rules.is_ignored(_join(relative_root, file), False):
+                continue
+            if max_file_size is not None:
+                # Broken symlinks and files removed or locked during the walk are skipped
+                try:
+                    size = file_path.stat().st_size
+                except OSError as e:
+                    logger.warning(f"Skipping {file_path}: {str(e)}")
+                    continue
+                if size > max_file_size:
+                    logger.warning(f"File {file_path} exceeds size limit")
+                    continue
+            
+            supported_files.append(file_path)
     
     return supported_files
 
+class GitIgnoreRules:
+    """The .gitignore patterns of a directory tree, in the order git applies them"""
+    
+    def __init__(self):
+        # (directory the .gitignore is in, compiled pattern, negated, directories only)
+        self.rules: List[Tuple[str, "re.Pattern", bool, bool]] = []
+    
+    def load(self, gitignore_path: Path, base: str):
+        """Add the patterns of a .gitignore located in the tree-relative directory base"""
+        if not gitignore_path.is_file():
+            return
+        
+        with open(gitignore_path, encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                line = line.rstrip()
+                if not line or line.startswith('#'):
+                    continue
+                
+                negated = line.startswith('!')
+                pattern = line[1:] if negated else line
+                dirs_only = pattern.endswith('/')
+                pattern = pattern.rstrip('/')
+                
+                # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+                anchored = '/' in pattern
+                regex = _glob_to_regex(pattern.lstrip('/'))
+                if not anchored:
+                    regex = f'(?:.*/)?{regex}'
+                self.rules.append((base, re.compile(f'^{regex}$'), negated, dirs_only))
+    
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """Check a tree-relative path; its parent directories must already have been checked"""
+        ignored = False
+        for base, regex, negated, dirs_only in self.rules:
+            if dirs_only and not is_dir:
+                continue
+            if base:
+                if not path.startswith(base + '/'):
+                    continue
+                relative = path[len(base) + 1:]
+            else:
+                relative = path
+            if regex.match(relative):
+                ignored = not negated
+        return ignored
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob to a regular expression"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            regex.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            regex.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            regex.append('[' + pattern[i + 1:end].replace('!', '^', 1) + ']')
+            i = end + 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(regex)
+
+def _join(base: str, name: str) -> str:
+    return f"{base}/{name}" if base else name
+
 def clean_filename(filename: str) -> str:
     """Clean filename for safe storage"""
     import re
@@ -57,6 +169,113 @@ def is_binary_file(file_path: Path) -> bool:
     try:
         with open(file_path, 'rb') as f:
             chunk = f.read(1024)
-            return b'\0' in chunk
+            return is_binary_content(chunk)
     except Exception:
-        return True
\ No newline at end of file
+        return True
+
+def is_binary_content(content: bytes) -> bool:
+    """Check if file content is binary"""
+    return b'\0' in content[:1024]
+
+def read_file_bytes(file_path: Path) -> bytes:
+    """Read a whole file with unbuffered reads straight into the returned bytes"""
+    with open(file_path, 'rb', buffering=0) as f:
+        return f.readall()
+
+def extract_archive(
+    archive_path: Path,
+    dest_dir: Path,
+    extensions: Set[str],
+    max_file_size: int,
+    max_total_size: int
+) -> List[str]:
+    """Extract the supported source files of a zip or tar archive, returning their relative paths.
+
+    Members are filtered like get_supported_files before anything is written,
+    links and paths escaping dest_dir are ignored, and binary or oversized
+    files are dropped. Of several members with the same normalized path, the
+    last one is kept, as extracting them in order would leave it. Raises ValueError for unknown formats or archives that
+    expand beyond max_total_size.
+    """
+    # Size written for each extracted path
+    extracted: Dict[str, int] = {}
+    total_size = 0
+    
+    def extract_member(name: str, size: int, open_member) -> None:
+        nonlocal total_size
+        relative_path = _archive_member_path(name, extensions)
+        if relative_path is None:
+            return
+        if size > max_file_size:
+            logger.warning(f"Archive member {name} exceeds size limit")
+            return
+        
+        # A later member with the same path replaces the earlier one
+        total_size -= extracted.pop(relative_path, 0)
+        total_size += size
+        if total_size > max_total_size:
+            raise ValueError(f"Archive expands beyond {max_total_size} bytes")
+        
+        target = dest_dir / relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open_member() as source, open(target, 'wb') as f:
+            # Do not trust the size recorded in the archive header
+            written = _copy_limited(source, f, max_file_size)
+        
+        if written is None or is_binary_file(target):
+            target.unlink()
+            return
+        total_size += written - size
+        extracted[relative_path] = written
+    
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                # Symbolic links are stored as regular entries with a link file mode
+                if info.is_dir() or (info.external_attr >> 16) & 0o170000 == 0o120000:
+                    continue
+                extract_member(info.filename, info.file_size, lambda info=info: archive.open(info))
+    elif tarfile.is_tarfile(archive_path):
+        # Members are read in order, so compressed archives are decompressed once
+        with tarfile.open(archive_path, 'r:*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                extract_member(member.name, member.size, lambda member=member: archive.extractfile(member))
+    else:
+        raise ValueError("Unsupported archive format. Upload a .zip, .tar or .tar.gz file")
+    
+    return list(extracted)
+
+def strip_common_root(paths: List[str]) -> List[str]:
+    """Drop a top-level directory shared by every path (e.g. "repo-main/" in GitHub archives)"""
+    if not paths:
+        return paths
+    
+    roots = {path.split('/', 1)[0] for path in paths}
+    if len(roots) != 1 or any('/' not in path for path in paths):
+        return paths
+    return [path.split('/', 1)[1] for path in paths]
+
+def _archive_member_path(name: str, extensions: Set[str]) -> Optional[str]:
+    """Normalized relative path of an archive member, or None if it should not be extracted"""
+    path = PurePosixPath(name.replace('\\', '/'))
+    if path.is_absolute() or not path.parts or '..' in path.parts:
+        return None
+    if any(is_skipped_dir(part) for part in path.parts[:-1]) or path.name.startswith('.'):
+        return None
+    if path.suffix.lower() not in extensions:
+        return None
+    return str(path)
+
+def _copy_limited(source: IO[bytes], target: IO[bytes], limit: int) -> Optional[int]:
+    """Copy at most limit bytes, returning the number copied or None if the source is larger"""
+    copied = 0
+    while True:
+        chunk = source.read(1024 * 1024)
+        if not chunk:
+            return copied
+        copied += len(chunk)
+        if copied > limit:
+            return None
+        target.write(chunk)
@@ -0,0 +1,73 @@
+import re
+import hashlib
+from typing import List, Dict, Optional
+
+import numpy as np
+
+# Identifiers, numbers and single punctuation characters
+_TOKENS = re.compile(r'\w+|[^\w\s]')
+
+def simhash(text: str, min_tokens: int = 0, shingle_size: int = 3) -> Optional[int]:
+    """64-bit SimHash of a text's token shingles, or None if it has fewer than min_tokens tokens.
+
+    Texts that differ in a few tokens get fingerprints that differ in a few bits.
+    """
+    tokens = _TOKENS.findall(text)
+    if len(tokens) < max(min_tokens, shingle_size):
+        return None
+
+    shingles = [" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little") for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+    # Each fingerprint bit is set when most shingle hashes have it set
+    bits = np.unpackbits(hashes.view(np.uint8), bitorder="little").reshape(-1, 64)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(np.packbits(majority, bitorder="little").view(np.uint64)[0])
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return bin(a ^ b).count("1")
+
+class NearDuplicateIndex:
+    """Finds earlier fingerprints within ``max_distance`` bits of a new one.
+
+    Fingerprints are cut into ``max_distance + 1`` bands. Two fingerprints that
+    differ in at most ``max_distance`` bits agree exactly on at least one band,
+    so only fingerprints sharing a band value are compared.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        band_count = max_distance + 1
+        widths = [64 // band_count + (1 if band < 64 % band_count else 0) for band in range(band_count)]
+        self.bands = []
+        shift = 0
+        for width in widths:
+            self.bands.append((shift, (1 << width) - 1))
+            shift += width
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in self.bands]
+        self.fingerprints: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def find(self, fingerprint: int) -> List[int]:
+        """Keys of the earlier fingerprints close to this one, oldest first"""
+        candidates = set()
+        for (shift, mask), table in zip(self.bands, self.tables):
+            candidates.update(table.get((fingerprint >> shift) & mask, ()))
+        return sorted(
+            key for key in candidates
+            if hamming_distance(self.fingerprints[key], fingerprint) <= self.max_distance
+        )
+
+    def add(self, fingerprint: int) -> int:
+        """Index a fingerprint and return its key"""
+        key = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        for (shift, mask), table in zip(self.bands, self.tables):
+            table.setdefault((fingerprint >> shift) & mask, []).append(key)
+        return key
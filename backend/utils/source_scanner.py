@@ -0,0 +1,300 @@
+import re
+import logging
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Dict, Any, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Language of each source extension; others are plain text
+EXTENSION_LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.c': 'c',
+    '.h': 'c',
+    '.cs': 'csharp',
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+}
+
+# Imports kept per file
+MAX_IMPORTS = 10
+
+_NAME = r'[a-zA-Z_][a-zA-Z0-9_]*'
+_JS_NAME = r'[a-zA-Z_$][\w$]*'
+
+# Statements that look like a declaration to the C-family method patterns
+_STATEMENT = r'(?!(?:return|new|else|throw|case|await|yield|delete|typeof|goto|if|for|while|switch|catch|do|sizeof|using|lock|foreach)\b)'
+_NOT_KEYWORD = r'(?!(?:if|for|while|switch|catch|return|sizeof|else|do|new|delete|throw|case|foreach|using|lock|synchronized|typeof|function)\b)'
+# A C-family definition has a ( before any ;, =, { or } of its line. Checked ahead
+# of the return type and name, so other lines skip their backtracking type-token runs
+_PAREN_AHEAD = r'(?=[^\n;=(){}]*\()'
+
+# Line forms per language as (kind, pattern), tried in order at the start of each
+# line after its indentation. {name} marks the symbol name of "function" and
+# "class" kinds; "import" lines are kept whole; "import_block" opens a block whose
+# lines are all imports (Go). All rules run in one search over the whole file, so
+# they must never cross a line: whitespace is [ \t] rather than \s, negated
+# classes exclude \n and line ends are written (?=\n).
+_JS_MODIFIERS = r'(?:export[ \t]+)?(?:default[ \t]+)?'
+_JAVASCRIPT_RULES = [
+    ('import', r'import[ \t{*"\']'),
+    ('import', r'export[ \t][^\n]*?[ \t]from[ \t]'),
+    ('import', r'(?:const|let|var)[ \t][^=\n]*=[ \t]*require\('),
+    ('import', r'require\('),
+    ('class', r'(?:abstract[ \t]+)?class[ \t]+{name}'),
+    ('class', r'(?:declare[ \t]+)?(?:interface|enum)[ \t]+{name}'),
+    ('function', r'(?:async[ \t]+)?function[ \t]*\*?[ \t]*{name}[ \t]*[(<]'),
+    ('function', r'(?:const|let|var)[ \t]+{name}[ \t]*(?::[^=\n]+)?=[ \t]*(?:async[ \t]+)?(?:function\b|\((?:[^)\n]*\)[ \t]*(?::[^=\n]+)?=>|[^)\n]*(?=\n))|' + _JS_NAME + r'[ \t]*=>)'),
+    ('function', r'{name}[ \t]*:[ \t]*(?:async[ \t]+)?function\b'),
+    ('function', r'(?:(?:public|private|protected|static|readonly|override)[ \t]+)*{name}[ \t]*(?::[^=\n]+)?=[ \t]*(?:async[ \t]+)?\([^)\n]*\)[ \t]*(?::[^=\n]+)?=>'),
+    ('function', r'(?:(?:public|private|protected|static|readonly|async|override|abstract|get|set)[ \t]+)*' + _NOT_KEYWORD + r'{name}[ \t]*(?:<[^>\n]*>)?\([^)\n]*\)[ \t]*(?::[^{\n]+)?\{'),
+]
+
+_PYTHON_RULES = [
+    # Only unindented imports; the scan also leaves out those inside triple-quoted strings
+    ('import', r'(?<=\n)(?:import|from)[ \t]'),
+    ('function', r'(?:async[ \t]+)?def[ \t]+{name}[ \t]*\('),
+    ('class', r'class[ \t]+{name}'),
+]
+
+_JAVA_MODIFIERS = r'(?:@(?!interface\b)\w+(?:\([^)\n]*\))?[ \t]+)*(?:(?:public|private|protected|static|final|abstract|synchronized|native|default|strictfp|sealed|non-sealed)[ \t]+)*'
+_JAVA_RULES = [
+    ('import', r'import[ \t]'),
+    ('class', r'(?:class|interface|enum|record|@interface)[ \t]+{name}'),
+    ('function', _PAREN_AHEAD + _STATEMENT + r'(?:<[^>\n]*>[ \t]+)?[\w.$]+(?:<[^;(){}=\n]*>)?(?:\[\])*[ \t]+' + _NOT_KEYWORD + r'{name}[ \t]*\('),
+]
+
+_CSHARP_MODIFIERS = r'(?:\[[^\]\n]*\][ \t]*)*(?:(?:public|private|protected|internal|static|virtual|override|abstract|sealed|async|extern|unsafe|new|partial|readonly|const|volatile)[ \t]+)*'
+_CSHARP_RULES = [
+    ('import', r'using[ \t]+(?:static[ \t]+)?[\w.]+(?:[ \t]*=[ \t]*[\w.<>, ]+)?[ \t]*;'),
+    ('class', r'(?:class|interface|struct|enum|record(?:[ \t]+(?:struct|class))?)[ \t]+{name}'),
+    ('function', _PAREN_AHEAD + _STATEMENT + r'[\w.?]+(?:<[^;(){}=\n]*>)?(?:\[[, \t]*\])*\??[ \t]+' + _NOT_KEYWORD + r'{name}[ \t]*[(<]'),
+]
+
+_C_RULES = [
+    ('import', r'#[ \t]*include\b'),
+    ('function', r'(?:template[ \t]*<[^>\n]*>[ \t]*)?' + _PAREN_AHEAD + _STATEMENT + r'(?:[A-Za-z_][\w:*&<>,]*[ \t]+)+[*&]*(?:\w+::)*~?' + _NOT_KEYWORD + r'{name}[ \t]*\('),
+    # Constructors and destructors defined outside their class
+    ('function', r'(?:\w+::)+~?{name}[ \t]*\((?![^\n]*;\n)'),
+    # Return type on the line above (GNU style); only unindented, so calls are not taken for definitions
+    ('function', r'(?<![ \t])' + _NOT_KEYWORD + r'{name}[ \t]*\((?![^\n]*;\n)'),
+    ('class', r'(?:template[ \t]*<[^>\n]*>[ \t]*)?(?:typedef[ \t]+)?(?:class|struct|union|enum(?:[ \t]+class)?)[ \t]+(?:\w+[ \t]+)*?{name}[ \t]*(?:final[ \t]*)?(?:[:{]|(?=\n))'),
+]
+
+_GO_RULES = [
+    ('import_block', r'import[ \t]*\('),
+    ('import', r'import[ \t]'),
+    ('function', r'func[ \t]+(?:\([^)\n]*\)[ \t]*)?{name}[ \t]*[(\[]'),
+    ('class', r'type[ \t]+{name}(?:\[[^\]\n]*\])?[ \t]+(?:struct|interface)\b'),
+]
+
+_RUST_VISIBILITY = r'(?:pub(?:[ \t]*\([^)\n]*\))?[ \t]+)?'
+_RUST_RULES = [
+    ('import', _RUST_VISIBILITY + r'use[ \t]'),
+    ('import', r'extern[ \t]+crate[ \t]'),
+    ('function', _RUST_VISIBILITY + r'(?:(?:default|const|async|unsafe|extern(?:[ \t]+"[^"\n]*")?)[ \t]+)*fn[ \t]+{name}'),
+    ('function', r'macro_rules![ \t]*{name}'),
+    ('class', _RUST_VISIBILITY + r'(?:unsafe[ \t]+)?(?:struct|enum|trait|union|type|mod)[ \t]+{name}'),
+    ('class', r'(?:unsafe[ \t]+)?impl(?:[ \t]*<[^{\n]*?>)?[ \t]+(?:[\w:]+(?:<[^{\n]*?>)?[ \t]+for[ \t]+)?{name}'),
+]
+
+_RUBY_RULES = [
+    ('import', r'(?:require|require_relative)\b'),
+    ('function', r'def[ \t]+(?:self\.)?{name}'),
+    ('class', r'(?:class|module)[ \t]+{name}'),
+]
+
+_PHP_RULES = [
+    ('import', r'use[ \t]'),
+    ('import', r'(?:require|include)(?:_once)?\b'),
+    ('function', r'(?:(?:public|private|protected|static|final|abstract)[ \t]+)*function[ \t]+&?{name}[ \t]*\('),
+    ('class', r'(?:(?:abstract|final|readonly)[ \t]+)*(?:class|interface|trait|enum)[ \t]+{name}'),
+]
+
+_SWIFT_MODIFIERS = r'(?:@\w+(?:\([^)\n]*\))?[ \t]+)*(?:(?:public|private|fileprivate|internal|open|static|class(?=[ \t]+(?:func|var|let|subscript|override|final|public|private|fileprivate|internal|open|required|convenience|dynamic)\b)|final|override|mutating|nonmutating|convenience|required|dynamic|indirect|nonisolated)[ \t]+)*'
+_SWIFT_RULES = [
+    ('import', r'import[ \t]'),
+    ('function', r'func[ \t]+{name}[ \t]*[(<]'),
+    ('class', r'(?:class|struct|enum|protocol|extension|actor)[ \t]+{name}'),
+]
+
+_KOTLIN_MODIFIERS = r'(?:@\w+(?:\([^)\n]*\))?[ \t]+)*(?:(?:public|private|protected|internal|open|abstract|sealed|data|enum|inner|annotation|value|final|override|suspend|inline|operator|infix|tailrec|external|expect|actual|companion)[ \t]+)*'
+_KOTLIN_RULES = [
+    ('import', r'import[ \t]'),
+    ('function', r'fun[ \t]+(?:<[^>\n]*>[ \t]*)?(?:[\w.]+(?:<[^>\n]*>)?\??\.)?{name}[ \t]*[(<]'),
+    ('class', r'(?:class|interface|object)[ \t]+{name}'),
+]
+
+def _compile(
+    rules: List[Tuple[str, str]],
+    name: str = _NAME,
+    modifiers: str = '',
+    atomic: bool = False
+) -> Tuple["re.Pattern", Dict[str, str]]:
+    """Combine a language's rules into one pattern, and map its groups back to their kind.
+
+    The pattern matches from the newline before a line, so a search over the
+    file only tries it at line starts, and takes the whole indentation, so a
+    failed line is never retried with less of it. ``modifiers`` is matched
+    once before any rule, rather than by each of them, and ``atomic`` keeps a
+    rule from giving any of them back: a line of many modifiers or annotations
+    then fails in one step instead of once per modifier.
+    """
+    if atomic:
+        # An atomic group, written as a lookahead that captures and a backreference to it
+        modifiers = f'(?=(?P<modifiers>{modifiers}))(?P=modifiers)'
+    alternatives = []
+    kinds = {}
+    for i, (kind, pattern) in enumerate(rules):
+        group = f"{kind}_{i}"
+        kinds[group] = kind
+        if '{name}' in pattern:
+            alternatives.append(pattern.replace('{name}', f'(?P<{group}>{name})'))
+        else:
+            alternatives.append(f'(?P<{group}>{pattern})')
+    return re.compile(r'\n[ \t]*(?![ \t])' + modifiers + '(?:' + '|'.join(f'(?:{alternative})' for alternative in alternatives) + ')'), kinds
+
+_JAVASCRIPT = _compile(_JAVASCRIPT_RULES, _JS_NAME, _JS_MODIFIERS)
+_C = _compile(_C_RULES)
+_LINE_PATTERNS = {
+    '.py': _compile(_PYTHON_RULES),
+    '.js': _JAVASCRIPT,
+    '.jsx': _JAVASCRIPT,
+    '.ts': _JAVASCRIPT,
+    '.tsx': _JAVASCRIPT,
+    '.java': _compile(_JAVA_RULES, modifiers=_JAVA_MODIFIERS, atomic=True),
+    '.cpp': _C,
+    '.c': _C,
+    '.h': _C,
+    '.cs': _compile(_CSHARP_RULES, modifiers=_CSHARP_MODIFIERS, atomic=True),
+    '.php': _compile(_PHP_RULES),
+    '.rb': _compile(_RUBY_RULES),
+    '.go': _compile(_GO_RULES),
+    '.rs': _compile(_RUST_RULES),
+    '.swift': _compile(_SWIFT_RULES, modifiers=_SWIFT_MODIFIERS, atomic=True),
+    '.kt': _compile(_KOTLIN_RULES, modifiers=_KOTLIN_MODIFIERS, atomic=True),
+}
+
+class SourceScan:
+    """What the parser needs from one file: cleaned text, definitions, imports and line positions.
+
+    ``cleaned`` has trailing whitespace removed and runs of blank lines capped at
+    two; ``line_map[i]`` is the original 1-based line of its line i. Symbols are
+    {"name", "kind", "line"} dicts with original line numbers, and
+    ``line_offsets[i]`` is the character offset at which original line i + 1 starts.
+    """
+
+    __slots__ = ("cleaned", "line_map", "symbols", "imports", "line_offsets")
+
+    def __init__(
+        self,
+        cleaned: str,
+        line_map: List[int],
+        symbols: List[Dict[str, Any]],
+        imports: List[str],
+        line_offsets: List[int]
+    ):
+        self.cleaned = cleaned
+        self.line_map = line_map
+        self.symbols = symbols
+        self.imports = imports
+        self.line_offsets = line_offsets
+
+    @property
+    def functions(self) -> List[str]:
+        return [symbol["name"] for symbol in self.symbols if symbol["kind"] != "class"]
+
+    @property
+    def classes(self) -> List[str]:
+        return [symbol["name"] for symbol in self.symbols if symbol["kind"] == "class"]
+
+# Three or more blank lines in text framed by newlines
+_BLANK_RUN = re.compile('\n\n\n\n+')
+# Python triple-quoted strings, whose lines are text rather than code
+_TRIPLE_QUOTED = re.compile(r'("""|\'\'\')[\s\S]*?\1')
+
+def _clean(framed: str, line_count: int) -> Tuple[str, List[int]]:
+    """Keep at most two of each run of blank lines in right-stripped lines framed by newlines.
+
+    Works on whole runs rather than line by line: a run of three or more blank
+    lines is four or more consecutive newlines once the text is framed by newlines.
+    """
+    if '\n\n\n\n' not in framed:
+        return framed[1:-1], list(range(1, line_count + 1))
+
+    line_map: List[int] = []
+    next_line = 0
+    line_index = 0
+    position = 0
+    for run in _BLANK_RUN.finditer(framed):
+        line_index += framed.count('\n', position, run.start())
+        position = run.start()
+        # The run's blank lines start at line_index; keep its first two
+        line_map.extend(range(next_line + 1, line_index + 3))
+        next_line = line_index + run.end() - run.start() - 1
+    line_map.extend(range(next_line + 1, line_count + 1))
+    return _BLANK_RUN.sub('\n\n\n', framed)[1:-1], line_map
+
+def scan_source(content: str, file_ext: str, max_imports: int = MAX_IMPORTS) -> SourceScan:
+    """Clean a file and collect its definitions, imports and line offsets.
+
+    Cleaning uses whole-list string operations; definitions and imports come from
+    one search of the language's combined rules over the file.
+    """
+    lines = content.split('\n')
+    line_offsets = list(accumulate(map((1).__add__, map(len, lines[:-1])), initial=0))
+    stripped = list(map(str.rstrip, lines))
+    # One newline-framed copy serves both cleaning and the search
+    framed = '\n' + '\n'.join(stripped) + '\n'
+    cleaned, line_map = _clean(framed, len(stripped))
+
+    symbols: List[Dict[str, Any]] = []
+    imports: List[str] = []
+    compiled = _LINE_PATTERNS.get(file_ext)
+    if compiled is None:
+        return SourceScan(cleaned, line_map, symbols, imports, line_offsets)
+
+    pattern, kinds = compiled
+    # Python imports inside docstrings are text, not imports
+    strings = []
+    if file_ext == '.py' and ('"""' in framed or "\'\'\'" in framed):
+        strings = [(match.start(), match.end()) for match in _TRIPLE_QUOTED.finditer(framed)]
+    string_starts = [start for start, _ in strings]
+
+    line_index = 0
+    position = 0
+    for match in pattern.finditer(framed):
+        group = match.lastgroup
+        kind = kinds[group]
+        if kind == 'import' and len(imports) >= max_imports:
+            continue
+        # Matches start at the newline before their line
+        line_index += framed.count('\n', position, match.start())
+        position = match.start()
+        if kind == 'import':
+            if strings:
+                inside = bisect_right(string_starts, position) - 1
+                if inside >= 0 and position < strings[inside][1]:
+                    continue
+            imports.append(stripped[line_index].strip())
+        elif kind == 'import_block':
+            for statement in stripped[line_index + 1:]:
+                statement = statement.strip()
+                if statement.startswith(')'):
+                    break
+                if statement and not statement.startswith('//') and len(imports) < max_imports:
+                    imports.append(statement)
+        else:
+            symbols.append({"name": match.group(group), "kind": kind, "line": line_index + 1})
+
+    return SourceScan(cleaned, line_map, symbols, imports, line_offsets)
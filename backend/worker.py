@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from services.file_parser import FileParserService, shutdown_parse_executor
+from services.vector_db import VectorDBService
+from services.codebase_registry import CodebaseRegistry
+from services.ingestion_jobs import IngestionJobRunner, remove_spooled_files
+from services.job_queue import JobQueue
+from config import *
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class IngestionWorker:
+    """Takes upload and re-index jobs from the job queue and runs them one at a time.
+
+    Start as many worker processes as ingestion throughput requires; the API
+    process then only enqueues jobs and serves searches.
+    """
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self.job_queue = JobQueue()
+        self.codebase_registry = CodebaseRegistry()
+        self.vector_db = VectorDBService()
+        self.runner = IngestionJobRunner(FileParserService(), self.vector_db, self.codebase_registry)
+        self.stopping = asyncio.Event()
+
+    async def run(self):
+        """Process jobs until asked to stop"""
+        await self.vector_db.initialize()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # Finish the current job, then exit
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        logger.info(f"Ingestion worker {self.worker_id} started")
+        try:
+            while not self.stopping.is_set():
+                job = self.job_queue.claim(self.worker_id)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self.stopping.wait(), JOB_POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self.run_job(job)
+        finally:
+            shutdown_parse_executor()
+            logger.info(f"Ingestion worker {self.worker_id} stopped")
+
+    async def run_job(self, job: dict):
+        """Run one claimed job, keeping its lease alive while it runs"""
+        logger.info(f"Worker {self.worker_id} running {job['kind']} job {job['id']} (attempt {job['attempts']})")
+
+        if job["attempts"] > JOB_MAX_ATTEMPTS:
+            self._give_up(job, f"Gave up after {JOB_MAX_ATTEMPTS} attempts")
+            return
+
+        heartbeat = asyncio.ensure_future(self._renew_lease(job["id"]))
+        try:
+            await self.runner.run_job(job, retryable=True)
+            self.job_queue.complete(job["id"])
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {str(e)}")
+            if job["attempts"] < JOB_MAX_ATTEMPTS:
+                self._retry(job, str(e))
+            else:
+                self._give_up(job, str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _renew_lease(self, job_id: int):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            if not self.job_queue.renew_lease(job_id, self.worker_id):
+                logger.warning(f"Worker {self.worker_id} lost the lease on job {job_id}")
+                return
+
+    def _retry(self, job: dict, error: str):
+        self.job_queue.release(job["id"], error)
+        self.codebase_registry.update(job["codebase_id"], {
+            "status": "processing" if job["kind"] == "upload" else "updating",
+            "message": f"Retrying after attempt {job['attempts']} failed: {error}"
+        })
+
+    def _give_up(self, job: dict, error: str):
+        self.job_queue.fail(job["id"], error)
+        remove_spooled_files(job["payload"])
+        self.codebase_registry.update(job["codebase_id"], {
+            "status": "error",
+            "message": f"Processing failed: {error}"
+        })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run an ingestion worker")
+    parser.add_argument(
+        "--worker-id",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Name recorded on the jobs this worker claims"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics of this worker on this port"
+    )
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+
+        start_http_server(args.metrics_port)
+
+    asyncio.run(IngestionWorker(args.worker_id).run())